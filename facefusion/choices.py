@@ -1,18 +1,21 @@
 from typing import List
 
-from facefusion.typing import VideoMemoryStrategy, FaceSelectorMode, FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, FaceMaskType, FaceMaskRegion, TempFrameFormat, OutputVideoEncoder, OutputVideoPreset
+from facefusion.typing import ExecutionGraphOptimization, ExecutionMode, ExecutionMemoryOption, ExecutionPrecision, FaceSelectorMode, FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, FaceMaskType, FaceMaskRegion, TempFrameFormat, OutputVideoEncoder, OutputVideoPreset
 from facefusion.common_helper import create_int_range, create_float_range
 
-video_memory_strategies : List[VideoMemoryStrategy] = [ 'strict', 'moderate', 'tolerant' ]
+execution_graph_optimizations : List[ExecutionGraphOptimization] = [ 'disabled', 'basic', 'extended', 'all' ]
+execution_modes : List[ExecutionMode] = [ 'sequential', 'parallel' ]
+execution_memory_options : List[ExecutionMemoryOption] = [ 'cpu-memory-arena', 'memory-pattern' ]
+execution_precisions : List[ExecutionPrecision] = [ 'auto', 'fp32', 'fp16', 'int8' ]
 face_analyser_orders : List[FaceAnalyserOrder] = [ 'left-right', 'right-left', 'top-bottom', 'bottom-top', 'small-large', 'large-small', 'best-worst', 'worst-best' ]
 face_analyser_ages : List[FaceAnalyserAge] = [ 'child', 'teen', 'adult', 'senior' ]
 face_analyser_genders : List[FaceAnalyserGender] = [ 'male', 'female' ]
 face_detector_models : List[str] = [ 'retinaface', 'yunet' ]
-face_detector_sizes : List[str] = [ '160x160', '320x320', '480x480', '512x512', '640x640', '768x768', '960x960', '1024x1024' ]
+face_detector_sizes : List[str] = [ '160x160', '320x320', '480x480', '512x512', '640x640', '768x768', '960x960', '1024x1024', 'adaptive' ]
 face_selector_modes : List[FaceSelectorMode] = [ 'reference', 'one', 'many' ]
 face_mask_types : List[FaceMaskType] = [ 'box', 'occlusion', 'region' ]
 face_mask_regions : List[FaceMaskRegion] = [ 'skin', 'left-eyebrow', 'right-eyebrow', 'left-eye', 'right-eye', 'eye-glasses', 'nose', 'mouth', 'upper-lip', 'lower-lip' ]
-temp_frame_formats : List[TempFrameFormat] = [ 'jpg', 'png', 'bmp' ]
+temp_frame_formats : List[TempFrameFormat] = [ 'jpg', 'png', 'bmp', 'raw' ]
 output_video_encoders : List[OutputVideoEncoder] = [ 'libx264', 'libx265', 'libvpx-vp9', 'h264_nvenc', 'hevc_nvenc' ]
 output_video_presets : List[OutputVideoPreset] = [ 'ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow' ]
 
@@ -20,11 +23,15 @@ video_template_sizes : List[int] = [ 240, 360, 480, 540, 720, 1080, 1440, 2160 ]
 
 execution_thread_count_range : List[int] = create_int_range(1, 128, 1)
 execution_queue_count_range : List[int] = create_int_range(1, 32, 1)
+execution_op_thread_count_range : List[int] = create_int_range(0, 128, 1)
+video_memory_limit_range : List[int] = create_int_range(0, 128, 1)
 system_memory_limit_range : List[int] = create_int_range(0, 128, 1)
 face_detector_score_range : List[float] = create_float_range(0.0, 1.0, 0.05)
+face_presence_score_range : List[float] = create_float_range(0.0, 1.0, 0.05)
 face_mask_blur_range : List[float] = create_float_range(0.0, 1.0, 0.05)
 face_mask_padding_range : List[int] = create_int_range(0, 100, 1)
 reference_face_distance_range : List[float] = create_float_range(0.0, 1.5, 0.05)
 temp_frame_quality_range : List[int] = create_int_range(0, 100, 1)
+temp_frame_dedup_threshold_range : List[int] = create_int_range(0, 32, 1)
 output_image_quality_range : List[int] = create_int_range(0, 100, 1)
 output_video_quality_range : List[int] = create_int_range(0, 100, 1)
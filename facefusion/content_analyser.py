@@ -1,21 +1,17 @@
 from typing import Any, Dict
 from functools import lru_cache
-import threading
 import cv2
 import numpy
-import onnxruntime
 from tqdm import tqdm
 
 import facefusion.globals
 from facefusion import wording
 from facefusion.typing import Frame, ModelValue, Fps
-from facefusion.execution_helper import apply_execution_provider_options
-from facefusion.vision import get_video_frame, count_video_frame_total, read_image, detect_video_fps
+from facefusion.inference_manager import get_inference_session, clear_inference_session
+from facefusion.vision import read_video_frames, count_video_frame_total, read_image, detect_video_fps
 from facefusion.filesystem import resolve_relative_path
 from facefusion.download import conditional_download
 
-CONTENT_ANALYSER = None
-THREAD_LOCK : threading.Lock = threading.Lock()
 MODELS : Dict[str, ModelValue] =\
 {
 	'open_nsfw':
@@ -30,19 +26,11 @@ STREAM_COUNTER = 0
 
 
 def get_content_analyser() -> Any:
-	global CONTENT_ANALYSER
-
-	with THREAD_LOCK:
-		if CONTENT_ANALYSER is None:
-			model_path = MODELS.get('open_nsfw').get('path')
-			CONTENT_ANALYSER = onnxruntime.InferenceSession(model_path, providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-	return CONTENT_ANALYSER
+	return get_inference_session(MODELS.get('open_nsfw').get('path'))
 
 
 def clear_content_analyser() -> None:
-	global CONTENT_ANALYSER
-
-	CONTENT_ANALYSER = None
+	clear_inference_session(MODELS.get('open_nsfw').get('path'))
 
 
 def pre_check() -> bool:
@@ -93,11 +81,9 @@ def analyse_video(video_path : str, start_frame : int, end_frame : int) -> bool:
 	rate = 0.0
 	counter = 0
 	with tqdm(total = len(frame_range), desc = wording.get('analysing'), unit = 'frame', ascii = ' =', disable = facefusion.globals.log_level in [ 'warn', 'error' ]) as progress:
-		for frame_number in frame_range:
-			if frame_number % int(video_fps) == 0:
-				frame = get_video_frame(video_path, frame_number)
-				if analyse_frame(frame):
-					counter += 1
+		for frame in read_video_frames(video_path, frame_range.start, frame_range.stop, int(video_fps)):
+			if frame is not None and analyse_frame(frame):
+				counter += 1
 			rate = counter * int(video_fps) / len(frame_range) * 100
 			progress.update()
 			progress.set_postfix(rate = rate)
@@ -15,17 +15,18 @@ from argparse import ArgumentParser, HelpFormatter
 import facefusion.choices
 import facefusion.globals
 from facefusion.face_analyser import get_one_face, get_average_face
-from facefusion.face_store import get_reference_faces, append_reference_face
-from facefusion import face_analyser, face_masker, content_analyser, config, metadata, logger, wording
+from facefusion.face_store import get_reference_faces, append_reference_face, resolve_face_index_path, load_static_faces, save_static_faces, set_frame_hash_recording, get_frame_hashes, clear_frame_hashes
+from facefusion import face_analyser, face_masker, scene_detector, content_analyser, config, metadata, logger, wording
 from facefusion.content_analyser import analyse_image, analyse_video
 from facefusion.processors.frame.core import get_frame_processors_modules, load_frame_processor_module
 from facefusion.common_helper import create_metavar
 from facefusion.execution_helper import encode_execution_providers, decode_execution_providers
 from facefusion.normalizer import normalize_output_path, normalize_padding, normalize_fps
 from facefusion.memory import limit_system_memory
-from facefusion.filesystem import list_directory, get_temp_frame_paths, create_temp, move_temp, clear_temp, is_image, is_video
-from facefusion.ffmpeg import extract_frames, compress_image, merge_video, restore_audio
-from facefusion.vision import get_video_frame, read_image, read_static_images, pack_resolution, detect_video_resolution, detect_video_fps, create_video_resolutions
+from facefusion.inference_manager import preload_inference_sessions, resolve_model_path
+from facefusion.filesystem import list_directory, get_temp_frame_paths, write_temp_frame_groups, create_temp, move_temp, clear_temp, is_image, is_video
+from facefusion.ffmpeg import extract_frames, compress_image, merge_video, has_audio
+from facefusion.vision import get_video_frame, read_image, read_static_images, pack_resolution, unpack_resolution, restrict_video_resolution, detect_video_resolution, detect_video_fps, create_video_resolutions, group_temp_frames
 
 onnxruntime.set_default_logger_severity(3)
 warnings.filterwarnings('ignore', category = UserWarning, module = 'gradio')
@@ -51,9 +52,15 @@ def cli() -> None:
 	group_execution.add_argument('--execution-providers', help = wording.get('execution_providers_help').format(choices = ', '.join(execution_providers)), default = config.get_str_list('execution.execution_providers', 'cpu'), choices = execution_providers, nargs = '+', metavar = 'EXECUTION_PROVIDERS')
 	group_execution.add_argument('--execution-thread-count', help = wording.get('execution_thread_count_help'), type = int, default = config.get_int_value('execution.execution_thread_count', '4'), choices = facefusion.choices.execution_thread_count_range, metavar = create_metavar(facefusion.choices.execution_thread_count_range))
 	group_execution.add_argument('--execution-queue-count', help = wording.get('execution_queue_count_help'), type = int, default = config.get_int_value('execution.execution_queue_count', '1'), choices = facefusion.choices.execution_queue_count_range, metavar = create_metavar(facefusion.choices.execution_queue_count_range))
+	group_execution.add_argument('--execution-graph-optimization', help = wording.get('execution_graph_optimization_help'), default = config.get_str_value('execution.execution_graph_optimization', 'all'), choices = facefusion.choices.execution_graph_optimizations)
+	group_execution.add_argument('--execution-intra-op-thread-count', help = wording.get('execution_intra_op_thread_count_help'), type = int, default = config.get_int_value('execution.execution_intra_op_thread_count', '0'), choices = facefusion.choices.execution_op_thread_count_range, metavar = create_metavar(facefusion.choices.execution_op_thread_count_range))
+	group_execution.add_argument('--execution-inter-op-thread-count', help = wording.get('execution_inter_op_thread_count_help'), type = int, default = config.get_int_value('execution.execution_inter_op_thread_count', '0'), choices = facefusion.choices.execution_op_thread_count_range, metavar = create_metavar(facefusion.choices.execution_op_thread_count_range))
+	group_execution.add_argument('--execution-mode', help = wording.get('execution_mode_help'), default = config.get_str_value('execution.execution_mode', 'sequential'), choices = facefusion.choices.execution_modes)
+	group_execution.add_argument('--execution-memory-options', help = wording.get('execution_memory_options_help').format(choices = ', '.join(facefusion.choices.execution_memory_options)), default = config.get_str_list('execution.execution_memory_options', 'cpu-memory-arena memory-pattern'), choices = facefusion.choices.execution_memory_options, nargs = '*', metavar = 'EXECUTION_MEMORY_OPTIONS')
+	group_execution.add_argument('--execution-precision', help = wording.get('execution_precision_help'), default = config.get_str_value('execution.execution_precision', 'auto'), choices = facefusion.choices.execution_precisions)
 	# memory
 	group_memory = program.add_argument_group('memory')
-	group_memory.add_argument('--video-memory-strategy', help = wording.get('video_memory_strategy_help'), default = config.get_str_value('memory.video_memory_strategy', 'strict'), choices = facefusion.choices.video_memory_strategies)
+	group_memory.add_argument('--video-memory-limit', help = wording.get('video_memory_limit_help'), type = int, default = config.get_int_value('memory.video_memory_limit', '0'), choices = facefusion.choices.video_memory_limit_range, metavar = create_metavar(facefusion.choices.video_memory_limit_range))
 	group_memory.add_argument('--system-memory-limit', help = wording.get('system_memory_limit_help'), type = int, default = config.get_int_value('memory.system_memory_limit', '0'), choices = facefusion.choices.system_memory_limit_range, metavar = create_metavar(facefusion.choices.system_memory_limit_range))
 	# face analyser
 	group_face_analyser = program.add_argument_group('face analyser')
@@ -63,6 +70,7 @@ def cli() -> None:
 	group_face_analyser.add_argument('--face-detector-model', help = wording.get('face_detector_model_help'), default = config.get_str_value('face_analyser.face_detector_model', 'retinaface'), choices = facefusion.choices.face_detector_models)
 	group_face_analyser.add_argument('--face-detector-size', help = wording.get('face_detector_size_help'), default = config.get_str_value('face_analyser.face_detector_size', '640x640'), choices = facefusion.choices.face_detector_sizes)
 	group_face_analyser.add_argument('--face-detector-score', help = wording.get('face_detector_score_help'), type = float, default = config.get_float_value('face_analyser.face_detector_score', '0.5'), choices = facefusion.choices.face_detector_score_range, metavar = create_metavar(facefusion.choices.face_detector_score_range))
+	group_face_analyser.add_argument('--face-presence-score', help = wording.get('face_presence_score_help'), type = float, default = config.get_float_value('face_analyser.face_presence_score'), choices = facefusion.choices.face_presence_score_range, metavar = create_metavar(facefusion.choices.face_presence_score_range))
 	# face selector
 	group_face_selector = program.add_argument_group('face selector')
 	group_face_selector.add_argument('--face-selector-mode', help = wording.get('face_selector_mode_help'), default = config.get_str_value('face_selector.face_selector_mode', 'reference'), choices = facefusion.choices.face_selector_modes)
@@ -81,6 +89,7 @@ def cli() -> None:
 	group_frame_extraction.add_argument('--trim-frame-end',	help = wording.get('trim_frame_end_help'), type = int, default = facefusion.config.get_int_value('frame_extraction.trim_frame_end'))
 	group_frame_extraction.add_argument('--temp-frame-format', help = wording.get('temp_frame_format_help'), default = config.get_str_value('frame_extraction.temp_frame_format', 'jpg'), choices = facefusion.choices.temp_frame_formats)
 	group_frame_extraction.add_argument('--temp-frame-quality', help = wording.get('temp_frame_quality_help'), type = int, default = config.get_int_value('frame_extraction.temp_frame_quality', '100'), choices = facefusion.choices.temp_frame_quality_range, metavar = create_metavar(facefusion.choices.temp_frame_quality_range))
+	group_frame_extraction.add_argument('--temp-frame-dedup-threshold', help = wording.get('temp_frame_dedup_threshold_help'), type = int, default = config.get_int_value('frame_extraction.temp_frame_dedup_threshold'), choices = facefusion.choices.temp_frame_dedup_threshold_range, metavar = create_metavar(facefusion.choices.temp_frame_dedup_threshold_range))
 	group_frame_extraction.add_argument('--keep-temp', help = wording.get('keep_temp_help'), action = 'store_true',	default = config.get_bool_value('frame_extraction.keep_temp'))
 	# output creation
 	group_output_creation = program.add_argument_group('output creation')
@@ -89,7 +98,9 @@ def cli() -> None:
 	group_output_creation.add_argument('--output-video-preset', help = wording.get('output_video_preset_help'), default = config.get_str_value('output_creation.output_video_preset', 'veryfast'), choices = facefusion.choices.output_video_presets)
 	group_output_creation.add_argument('--output-video-quality', help = wording.get('output_video_quality_help'), type = int, default = config.get_int_value('output_creation.output_video_quality', '80'), choices = facefusion.choices.output_video_quality_range, metavar = create_metavar(facefusion.choices.output_video_quality_range))
 	group_output_creation.add_argument('--output-video-resolution', help = wording.get('output_video_resolution_help'), default = config.get_str_value('output_creation.output_video_resolution'))
+	group_output_creation.add_argument('--output-video-max-height', help = wording.get('output_video_max_height_help'), type = int, default = config.get_int_value('output_creation.output_video_max_height'))
 	group_output_creation.add_argument('--output-video-fps', help = wording.get('output_video_fps_help'), type = float)
+	group_output_creation.add_argument('--output-video-watermark', help = wording.get('output_video_watermark_help'), default = config.get_str_value('output_creation.output_video_watermark'))
 	group_output_creation.add_argument('--skip-audio', help = wording.get('skip_audio_help'), action = 'store_true', default = config.get_bool_value('output_creation.skip_audio'))
 	# frame processors
 	available_frame_processors = list_directory('facefusion/processors/frame/modules')
@@ -116,12 +127,19 @@ def apply_args(program : ArgumentParser) -> None:
 	facefusion.globals.skip_download = args.skip_download
 	facefusion.globals.headless = args.headless
 	facefusion.globals.log_level = args.log_level
+	logger.init(facefusion.globals.log_level)
 	# execution
 	facefusion.globals.execution_providers = decode_execution_providers(args.execution_providers)
 	facefusion.globals.execution_thread_count = args.execution_thread_count
 	facefusion.globals.execution_queue_count = args.execution_queue_count
+	facefusion.globals.execution_graph_optimization = args.execution_graph_optimization
+	facefusion.globals.execution_intra_op_thread_count = args.execution_intra_op_thread_count
+	facefusion.globals.execution_inter_op_thread_count = args.execution_inter_op_thread_count
+	facefusion.globals.execution_mode = args.execution_mode
+	facefusion.globals.execution_memory_options = args.execution_memory_options
+	facefusion.globals.execution_precision = args.execution_precision
 	# memory
-	facefusion.globals.video_memory_strategy = args.video_memory_strategy
+	facefusion.globals.video_memory_limit = args.video_memory_limit
 	facefusion.globals.system_memory_limit = args.system_memory_limit
 	# face analyser
 	facefusion.globals.face_analyser_order = args.face_analyser_order
@@ -130,6 +148,7 @@ def apply_args(program : ArgumentParser) -> None:
 	facefusion.globals.face_detector_model = args.face_detector_model
 	facefusion.globals.face_detector_size = args.face_detector_size
 	facefusion.globals.face_detector_score = args.face_detector_score
+	facefusion.globals.face_presence_score = args.face_presence_score
 	# face selector
 	facefusion.globals.face_selector_mode = args.face_selector_mode
 	facefusion.globals.reference_face_position = args.reference_face_position
@@ -145,6 +164,7 @@ def apply_args(program : ArgumentParser) -> None:
 	facefusion.globals.trim_frame_end = args.trim_frame_end
 	facefusion.globals.temp_frame_format = args.temp_frame_format
 	facefusion.globals.temp_frame_quality = args.temp_frame_quality
+	facefusion.globals.temp_frame_dedup_threshold = args.temp_frame_dedup_threshold
 	facefusion.globals.keep_temp = args.keep_temp
 	# output creation
 	facefusion.globals.output_image_quality = args.output_image_quality
@@ -158,8 +178,13 @@ def apply_args(program : ArgumentParser) -> None:
 		else:
 			target_video_resolution = detect_video_resolution(args.target_path)
 			facefusion.globals.output_video_resolution = pack_resolution(target_video_resolution)
+		facefusion.globals.output_video_max_height = args.output_video_max_height
+		if facefusion.globals.output_video_max_height:
+			output_video_resolution = restrict_video_resolution(unpack_resolution(facefusion.globals.output_video_resolution), facefusion.globals.output_video_max_height)
+			facefusion.globals.output_video_resolution = pack_resolution(output_video_resolution)
 	if args.output_video_fps or is_video(args.target_path):
 		facefusion.globals.output_video_fps = normalize_fps(args.output_video_fps) or detect_video_fps(args.target_path)
+	facefusion.globals.output_video_watermark = args.output_video_watermark
 	facefusion.globals.skip_audio = args.skip_audio
 	# frame processors
 	available_frame_processors = list_directory('facefusion/processors/frame/modules')
@@ -173,7 +198,6 @@ def apply_args(program : ArgumentParser) -> None:
 
 def run(program : ArgumentParser) -> None:
 	apply_args(program)
-	logger.init(facefusion.globals.log_level)
 	if facefusion.globals.system_memory_limit > 0:
 		limit_system_memory(facefusion.globals.system_memory_limit)
 	if not pre_check() or not content_analyser.pre_check() or not face_analyser.pre_check() or not face_masker.pre_check():
@@ -210,6 +234,7 @@ def pre_check() -> bool:
 
 def conditional_process() -> None:
 	start_time = time.time()
+	preload_models()
 	for frame_processor_module in get_frame_processors_modules(facefusion.globals.frame_processors):
 		while not frame_processor_module.post_check():
 			logger.disable()
@@ -224,6 +249,15 @@ def conditional_process() -> None:
 		process_video(start_time)
 
 
+def preload_models() -> None:
+	model_paths = face_analyser.get_model_paths() + face_masker.get_model_paths()
+	for frame_processor_module in get_frame_processors_modules(facefusion.globals.frame_processors):
+		model_options = frame_processor_module.get_options('model')
+		if model_options:
+			model_paths.append(resolve_model_path(model_options))
+	preload_inference_sessions(model_paths)
+
+
 def conditional_append_reference_faces() -> None:
 	if 'reference' in facefusion.globals.face_selector_mode and not get_reference_faces():
 		source_frames = read_static_images(facefusion.globals.source_paths)
@@ -295,28 +329,51 @@ def process_video(start_time : float) -> None:
 	extract_frames(facefusion.globals.target_path, facefusion.globals.output_video_resolution, facefusion.globals.output_video_fps)
 	# process frame
 	temp_frame_paths = get_temp_frame_paths(facefusion.globals.target_path)
+	temp_frame_groups = {}
+	if temp_frame_paths and facefusion.globals.face_detector_size == 'adaptive':
+		scene_detector.set_scene_cuts(scene_detector.detect_scene_cuts(temp_frame_paths))
+		logger.info(wording.get('detecting_scene_cuts').format(scene_cut_total = len(scene_detector.get_scene_cuts())), __name__.upper())
+	if temp_frame_paths and facefusion.globals.temp_frame_dedup_threshold is not None:
+		temp_frame_groups = group_temp_frames(temp_frame_paths, facefusion.globals.temp_frame_dedup_threshold)
+		temp_frame_paths = [ temp_frame_path for temp_frame_path in temp_frame_paths if temp_frame_path not in temp_frame_groups ]
+		logger.info(wording.get('deduplicating_frames').format(frame_total = len(temp_frame_groups)), __name__.upper())
+	write_temp_frame_groups(facefusion.globals.target_path, temp_frame_groups)
 	if temp_frame_paths:
-		for frame_processor_module in get_frame_processors_modules(facefusion.globals.frame_processors):
+		face_index_path = resolve_face_index_path(facefusion.globals.target_path, face_analyser.get_model_paths())
+		load_static_faces(face_index_path)
+		for index, frame_processor_module in enumerate(get_frame_processors_modules(facefusion.globals.frame_processors)):
 			logger.info(wording.get('processing'), frame_processor_module.NAME)
+			set_frame_hash_recording(index == 0 and face_index_path is not None)
 			frame_processor_module.process_video(facefusion.globals.source_paths, temp_frame_paths)
 			frame_processor_module.post_process()
+			set_frame_hash_recording(False)
+			if face_index_path:
+				save_static_faces(face_index_path, get_frame_hashes())
+		clear_frame_hashes()
+		face_masker.clear_occlusion_masks()
+		scene_detector.clear_scene_cuts()
+		if facefusion.globals.face_presence_score is not None:
+			face_presence_stats = face_analyser.get_face_presence_stats()
+			logger.info(wording.get('skipping_faceless_frames').format(skipped = face_presence_stats.get('skipped'), checked = face_presence_stats.get('checked')), __name__.upper())
+			face_analyser.clear_face_presence_stats()
 	else:
 		logger.error(wording.get('temp_frames_not_found'), __name__.upper())
 		return
-	# merge video
-	logger.info(wording.get('merging_video_fps').format(video_fps = facefusion.globals.output_video_fps), __name__.upper())
-	if not merge_video(facefusion.globals.target_path, facefusion.globals.output_video_fps):
-		logger.error(wording.get('merging_video_failed'), __name__.upper())
-		return
 	# handle audio
-	if facefusion.globals.skip_audio:
+	if facefusion.globals.skip_audio or not has_audio(facefusion.globals.target_path):
 		logger.info(wording.get('skipping_audio'), __name__.upper())
-		move_temp(facefusion.globals.target_path, facefusion.globals.output_path)
+		audio_path = None
 	else:
 		logger.info(wording.get('restoring_audio'), __name__.upper())
-		if not restore_audio(facefusion.globals.target_path, facefusion.globals.output_path, facefusion.globals.output_video_fps):
-			logger.warn(wording.get('restoring_audio_skipped'), __name__.upper())
-			move_temp(facefusion.globals.target_path, facefusion.globals.output_path)
+		audio_path = facefusion.globals.target_path
+	# merge video
+	logger.info(wording.get('merging_video_fps').format(video_fps = facefusion.globals.output_video_fps), __name__.upper())
+	if not merge_video(facefusion.globals.target_path, facefusion.globals.output_video_fps, audio_path):
+		if not audio_path or not merge_video(facefusion.globals.target_path, facefusion.globals.output_video_fps, None):
+			logger.error(wording.get('merging_video_failed'), __name__.upper())
+			return
+		logger.warn(wording.get('restoring_audio_skipped'), __name__.upper())
+	move_temp(facefusion.globals.target_path, facefusion.globals.output_path)
 	# clear temp
 	logger.info(wording.get('clearing_temp'), __name__.upper())
 	clear_temp(facefusion.globals.target_path)
@@ -1,6 +1,9 @@
-from typing import Any, List
+from typing import Any, List, Tuple
+import os
 import onnxruntime
 
+from facefusion.typing import ExecutionGraphOptimization, ExecutionMode, ExecutionPrecision
+
 
 def encode_execution_providers(execution_providers : List[str]) -> List[str]:
 	return [ execution_provider.replace('ExecutionProvider', '').lower() for execution_provider in execution_providers ]
@@ -27,6 +30,40 @@ def apply_execution_provider_options(execution_providers: List[str]) -> List[Any
 	return execution_providers_with_options
 
 
+def map_graph_optimization_level(execution_graph_optimization : ExecutionGraphOptimization) -> onnxruntime.GraphOptimizationLevel:
+	if execution_graph_optimization == 'basic':
+		return onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC
+	if execution_graph_optimization == 'extended':
+		return onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+	if execution_graph_optimization == 'all':
+		return onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+	return onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+
+
+def map_execution_mode(execution_mode : ExecutionMode) -> onnxruntime.ExecutionMode:
+	if execution_mode == 'parallel':
+		return onnxruntime.ExecutionMode.ORT_PARALLEL
+	return onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+
+
+def calc_op_thread_counts(execution_thread_count : int, execution_mode : ExecutionMode) -> Tuple[int, int]:
+	cpu_thread_count = os.cpu_count() or 1
+	op_thread_count = max(cpu_thread_count // max(execution_thread_count, 1), 1)
+
+	if execution_mode == 'parallel':
+		inter_op_thread_count = min(op_thread_count, 2)
+		return max(op_thread_count // inter_op_thread_count, 1), inter_op_thread_count
+	return op_thread_count, 1
+
+
+def resolve_execution_precision(execution_precision : ExecutionPrecision, execution_providers : List[str]) -> ExecutionPrecision:
+	if execution_precision == 'auto':
+		if any(execution_provider in [ 'CUDAExecutionProvider', 'TensorrtExecutionProvider', 'ROCMExecutionProvider', 'DmlExecutionProvider' ] for execution_provider in execution_providers):
+			return 'fp16'
+		return 'fp32'
+	return execution_precision
+
+
 def map_torch_backend(execution_providers : List[str]) -> str:
 	if 'CoreMLExecutionProvider' in execution_providers:
 		return 'mps'
@@ -1,27 +1,46 @@
-from typing import Any, Optional, List, Tuple
+from typing import Any, Dict, Optional, List, Tuple
 import threading
 import cv2
 import numpy
-import onnxruntime
 
+import facefusion.choices
 import facefusion.globals
 from facefusion.download import conditional_download
-from facefusion.face_store import get_static_faces, set_static_faces
-from facefusion.execution_helper import apply_execution_provider_options
-from facefusion.face_helper import warp_face_by_kps, create_static_anchors, distance_to_kps, distance_to_bbox, apply_nms
+from facefusion.face_store import get_static_faces, set_static_faces, get_reference_embeddings
+from facefusion.inference_manager import get_inference_session, clear_inference_session, resolve_model_path, conditional_quantize_models, run_batch
+from facefusion.face_helper import warp_face_by_kps, create_static_anchors, distance_to_kps, distance_to_bbox, apply_nms, pack_face_batch, unpack_face_batch, index_face_batch, count_face_batch
 from facefusion.filesystem import resolve_relative_path
-from facefusion.typing import Frame, Face, FaceSet, FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, ModelSet, Bbox, Kps, Score, Embedding
+from facefusion.typing import Frame, Face, FaceBatch, FaceSet, FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, ModelSet, Bbox, Kps, Score, Embedding
 from facefusion.vision import resize_frame_resolution, unpack_resolution
 
-FACE_ANALYSER = None
+FACE_DETECTOR_YUNET = None
+FACE_PRESENCE_DETECTOR = None
+FACE_PRESENCE_SIZE = 320
+FACE_PRESENCE_STATS : Dict[str, int] =\
+{
+	'checked': 0,
+	'skipped': 0
+}
 THREAD_SEMAPHORE : threading.Semaphore = threading.Semaphore()
 THREAD_LOCK : threading.Lock = threading.Lock()
+THREAD_LOCAL : threading.local = threading.local()
+FACE_DETECTOR_ADAPTIVE_SIZES : List[int] = [ unpack_resolution(face_detector_size)[0] for face_detector_size in facefusion.choices.face_detector_sizes if face_detector_size != 'adaptive' ]
+FACE_DETECTOR_ADAPTIVE_FACE_SIZE = 96
+FACE_DETECTOR_ADAPTIVE_INTERVAL = 25
 MODELS : ModelSet =\
 {
 	'face_detector_retinaface':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/retinaface_10g.onnx',
-		'path': resolve_relative_path('../.assets/models/retinaface_10g.onnx')
+		'path': resolve_relative_path('../.assets/models/retinaface_10g.onnx'),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/retinaface_10g_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 128.0,
+			'size': (640, 640),
+			'channel_order': 'bgr'
+		}
 	},
 	'face_detector_yunet':
 	{
@@ -31,55 +50,109 @@ MODELS : ModelSet =\
 	'face_recognizer_arcface_blendswap':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/arcface_w600k_r50.onnx',
-		'path': resolve_relative_path('../.assets/models/arcface_w600k_r50.onnx')
+		'path': resolve_relative_path('../.assets/models/arcface_w600k_r50.onnx'),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/arcface_w600k_r50_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (112, 112),
+			'template': 'arcface_112_v2'
+		}
 	},
 	'face_recognizer_arcface_inswapper':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/arcface_w600k_r50.onnx',
-		'path': resolve_relative_path('../.assets/models/arcface_w600k_r50.onnx')
+		'path': resolve_relative_path('../.assets/models/arcface_w600k_r50.onnx'),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/arcface_w600k_r50_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (112, 112),
+			'template': 'arcface_112_v2'
+		}
 	},
 	'face_recognizer_arcface_simswap':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/arcface_simswap.onnx',
-		'path': resolve_relative_path('../.assets/models/arcface_simswap.onnx')
+		'path': resolve_relative_path('../.assets/models/arcface_simswap.onnx'),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/arcface_simswap_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (112, 112),
+			'template': 'arcface_112_v2'
+		}
 	},
 	'gender_age':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/gender_age.onnx',
-		'path': resolve_relative_path('../.assets/models/gender_age.onnx')
+		'path': resolve_relative_path('../.assets/models/gender_age.onnx'),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/gender_age_int8.onnx'),
+			'mean': 0.0,
+			'standard_deviation': 1.0,
+			'size': (96, 96),
+			'template': 'arcface_128_v2'
+		}
 	}
 }
 
 
 def get_face_analyser() -> Any:
-	global FACE_ANALYSER
+	if facefusion.globals.face_detector_model == 'retinaface':
+		face_detector = get_inference_session(resolve_model_path(MODELS.get('face_detector_retinaface')))
+	if facefusion.globals.face_detector_model == 'yunet':
+		face_detector = get_face_detector_yunet()
+	face_recognizer = get_inference_session(resolve_model_path(MODELS.get('face_recognizer_' + facefusion.globals.face_recognizer_model)))
+	gender_age = get_inference_session(resolve_model_path(MODELS.get('gender_age')))
+	return\
+	{
+		'face_detector': face_detector,
+		'face_recognizer': face_recognizer,
+		'gender_age': gender_age
+	}
+
+
+def get_face_detector_yunet() -> Any:
+	global FACE_DETECTOR_YUNET
 
 	with THREAD_LOCK:
-		if FACE_ANALYSER is None:
-			if facefusion.globals.face_detector_model == 'retinaface':
-				face_detector = onnxruntime.InferenceSession(MODELS.get('face_detector_retinaface').get('path'), providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-			if facefusion.globals.face_detector_model == 'yunet':
-				face_detector = cv2.FaceDetectorYN.create(MODELS.get('face_detector_yunet').get('path'), '', (0, 0))
-			if facefusion.globals.face_recognizer_model == 'arcface_blendswap':
-				face_recognizer = onnxruntime.InferenceSession(MODELS.get('face_recognizer_arcface_blendswap').get('path'), providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-			if facefusion.globals.face_recognizer_model == 'arcface_inswapper':
-				face_recognizer = onnxruntime.InferenceSession(MODELS.get('face_recognizer_arcface_inswapper').get('path'), providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-			if facefusion.globals.face_recognizer_model == 'arcface_simswap':
-				face_recognizer = onnxruntime.InferenceSession(MODELS.get('face_recognizer_arcface_simswap').get('path'), providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-			gender_age = onnxruntime.InferenceSession(MODELS.get('gender_age').get('path'), providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-			FACE_ANALYSER =\
-			{
-				'face_detector': face_detector,
-				'face_recognizer': face_recognizer,
-				'gender_age': gender_age
-			}
-	return FACE_ANALYSER
+		if FACE_DETECTOR_YUNET is None:
+			FACE_DETECTOR_YUNET = cv2.FaceDetectorYN.create(MODELS.get('face_detector_yunet').get('path'), '', (0, 0))
+	return FACE_DETECTOR_YUNET
+
+
+def get_face_presence_detector() -> Any:
+	global FACE_PRESENCE_DETECTOR
+
+	with THREAD_LOCK:
+		if FACE_PRESENCE_DETECTOR is None:
+			FACE_PRESENCE_DETECTOR = cv2.FaceDetectorYN.create(MODELS.get('face_detector_yunet').get('path'), '', (0, 0))
+	return FACE_PRESENCE_DETECTOR
+
+
+def get_model_paths() -> List[str]:
+	model_paths =\
+	[
+		resolve_model_path(MODELS.get('face_recognizer_' + facefusion.globals.face_recognizer_model)),
+		resolve_model_path(MODELS.get('gender_age'))
+	]
+	if facefusion.globals.face_detector_model == 'retinaface':
+		model_paths.insert(0, resolve_model_path(MODELS.get('face_detector_retinaface')))
+	return model_paths
 
 
 def clear_face_analyser() -> Any:
-	global FACE_ANALYSER
+	global FACE_DETECTOR_YUNET, FACE_PRESENCE_DETECTOR
 
-	FACE_ANALYSER = None
+	FACE_DETECTOR_YUNET = None
+	FACE_PRESENCE_DETECTOR = None
+	for model_value in MODELS.values():
+		clear_inference_session(resolve_model_path(model_value))
 
 
 def pre_check() -> bool:
@@ -94,11 +167,92 @@ def pre_check() -> bool:
 			MODELS.get('gender_age').get('url')
 		]
 		conditional_download(download_directory_path, model_urls)
+	conditional_quantize_models(list(MODELS.values()))
 	return True
 
 
-def extract_faces(frame : Frame) -> List[Face]:
-	face_detector_width, face_detector_height = unpack_resolution(facefusion.globals.face_detector_size)
+def has_face_presence(frame : Frame) -> bool:
+	if facefusion.globals.face_presence_score is None:
+		return True
+	face_presence_detector = get_face_presence_detector()
+	temp_frame = resize_frame_resolution(frame, FACE_PRESENCE_SIZE, FACE_PRESENCE_SIZE)
+	temp_frame_height, temp_frame_width, _ = temp_frame.shape
+	with THREAD_SEMAPHORE:
+		face_presence_detector.setInputSize((temp_frame_width, temp_frame_height))
+		face_presence_detector.setScoreThreshold(facefusion.globals.face_presence_score)
+		_, detections = face_presence_detector.detect(temp_frame)
+	has_faces = detections is not None and len(detections) > 0
+	update_face_presence_stats(has_faces)
+	return has_faces
+
+
+def update_face_presence_stats(has_faces : bool) -> None:
+	with THREAD_LOCK:
+		FACE_PRESENCE_STATS['checked'] += 1
+		if not has_faces:
+			FACE_PRESENCE_STATS['skipped'] += 1
+
+
+def get_face_presence_stats() -> Dict[str, int]:
+	with THREAD_LOCK:
+		return FACE_PRESENCE_STATS.copy()
+
+
+def clear_face_presence_stats() -> None:
+	with THREAD_LOCK:
+		FACE_PRESENCE_STATS['checked'] = 0
+		FACE_PRESENCE_STATS['skipped'] = 0
+
+
+def extract_faces(frame : Frame) -> FaceBatch:
+	if facefusion.globals.face_detector_size == 'adaptive':
+		return extract_faces_adaptive(frame)
+	return detect_faces(frame, unpack_resolution(facefusion.globals.face_detector_size))
+
+
+def extract_faces_adaptive(frame : Frame) -> FaceBatch:
+	refresh_detector_size = calc_refresh_detector_size(frame)
+	face_detector_size = getattr(THREAD_LOCAL, 'face_detector_size', None)
+	frame_count = getattr(THREAD_LOCAL, 'frame_count', 0)
+
+	if face_detector_size is None or frame_count >= FACE_DETECTOR_ADAPTIVE_INTERVAL:
+		face_detector_size = refresh_detector_size
+		frame_count = 0
+	face_batch = detect_faces(frame, (face_detector_size, face_detector_size))
+	if not count_face_batch(face_batch) and face_detector_size != refresh_detector_size:
+		face_batch = detect_faces(frame, (refresh_detector_size, refresh_detector_size))
+		frame_count = 0
+	THREAD_LOCAL.face_detector_size = calc_adaptive_detector_size(frame, face_batch)
+	THREAD_LOCAL.frame_count = frame_count + 1
+	return face_batch
+
+
+def clear_adaptive_detector() -> None:
+	THREAD_LOCAL.face_detector_size = None
+	THREAD_LOCAL.frame_count = 0
+
+
+def calc_refresh_detector_size(frame : Frame) -> int:
+	frame_size = max(frame.shape[:2])
+	for face_detector_size in FACE_DETECTOR_ADAPTIVE_SIZES:
+		if face_detector_size >= 640 and face_detector_size * 3 >= frame_size:
+			return face_detector_size
+	return FACE_DETECTOR_ADAPTIVE_SIZES[-1]
+
+
+def calc_adaptive_detector_size(frame : Frame, face_batch : FaceBatch) -> Optional[int]:
+	if count_face_batch(face_batch):
+		frame_size = max(frame.shape[:2])
+		face_size = numpy.max(face_batch.bboxes[:, 2:] - face_batch.bboxes[:, :2], axis = 1).min()
+		for face_detector_size in FACE_DETECTOR_ADAPTIVE_SIZES:
+			if face_size * face_detector_size >= FACE_DETECTOR_ADAPTIVE_FACE_SIZE * frame_size:
+				return face_detector_size
+		return FACE_DETECTOR_ADAPTIVE_SIZES[-1]
+	return None
+
+
+def detect_faces(frame : Frame, face_detector_resolution : Tuple[int, int]) -> FaceBatch:
+	face_detector_width, face_detector_height = face_detector_resolution
 	frame_height, frame_width, _ = frame.shape
 	temp_frame = resize_frame_resolution(frame, face_detector_width, face_detector_height)
 	temp_frame_height, temp_frame_width, _ = temp_frame.shape
@@ -110,7 +264,7 @@ def extract_faces(frame : Frame) -> List[Face]:
 	elif facefusion.globals.face_detector_model == 'yunet':
 		bbox_list, kps_list, score_list = detect_with_yunet(temp_frame, temp_frame_height, temp_frame_width, ratio_height, ratio_width)
 		return create_faces(frame, bbox_list, kps_list, score_list)
-	return []
+	return pack_face_batch([])
 
 
 def detect_with_retinaface(temp_frame : Frame, temp_frame_height : int, temp_frame_width : int, face_detector_height : int, face_detector_width : int, ratio_height : float, ratio_width : float) -> Tuple[List[Bbox], List[Kps], List[Score]]:
@@ -176,63 +330,58 @@ def detect_with_yunet(temp_frame : Frame, temp_frame_height : int, temp_frame_wi
 	return bbox_list, kps_list, score_list
 
 
-def create_faces(frame : Frame, bbox_list : List[Bbox], kps_list : List[Kps], score_list : List[Score]) -> List[Face]:
-	faces = []
-	if facefusion.globals.face_detector_score > 0:
+def create_faces(frame : Frame, bbox_list : List[Bbox], kps_list : List[Kps], score_list : List[Score]) -> FaceBatch:
+	if facefusion.globals.face_detector_score > 0 and score_list:
 		sort_indices = numpy.argsort(-numpy.array(score_list))
-		bbox_list = [ bbox_list[index] for index in sort_indices ]
-		kps_list = [ kps_list[index] for index in sort_indices ]
-		score_list = [ score_list[index] for index in sort_indices ]
-		keep_indices = apply_nms(bbox_list, 0.4)
-		for index in keep_indices:
-			bbox = bbox_list[index]
-			kps = kps_list[index]
-			score = score_list[index]
-			embedding, normed_embedding = calc_embedding(frame, kps)
-			gender, age = detect_gender_age(frame, bbox)
-			faces.append(Face(
-				bbox = bbox,
-				kps = kps,
-				score = score,
-				embedding = embedding,
-				normed_embedding = normed_embedding,
-				gender = gender,
-				age = age
-			))
-	return faces
-
-
-def calc_embedding(temp_frame : Frame, kps : Kps) -> Tuple[Embedding, Embedding]:
+		bboxes = numpy.array(bbox_list)[sort_indices]
+		kps = numpy.array(kps_list)[sort_indices]
+		scores = numpy.array(score_list)[sort_indices]
+		keep_indices = apply_nms(bboxes, 0.4)
+		bboxes = bboxes[keep_indices]
+		kps = kps[keep_indices]
+		scores = scores[keep_indices]
+		embeddings, normed_embeddings = calc_embeddings(frame, kps)
+		genders, ages = detect_genders_ages(frame, bboxes)
+		return FaceBatch(
+			bboxes = bboxes,
+			kps = kps,
+			scores = scores,
+			embeddings = embeddings,
+			normed_embeddings = normed_embeddings,
+			genders = genders,
+			ages = ages
+		)
+	return pack_face_batch([])
+
+
+def calc_embeddings(temp_frame : Frame, kps_list : List[Kps]) -> Tuple[Embedding, Embedding]:
 	face_recognizer = get_face_analyser().get('face_recognizer')
-	crop_frame, matrix = warp_face_by_kps(temp_frame, kps, 'arcface_112_v2', (112, 112))
-	crop_frame = crop_frame.astype(numpy.float32) / 127.5 - 1
-	crop_frame = crop_frame[:, :, ::-1].transpose(2, 0, 1)
-	crop_frame = numpy.expand_dims(crop_frame, axis = 0)
-	embedding = face_recognizer.run(None,
-	{
-		face_recognizer.get_inputs()[0].name: crop_frame
-	})[0]
-	embedding = embedding.ravel()
-	normed_embedding = embedding / numpy.linalg.norm(embedding)
-	return embedding, normed_embedding
+	crop_frames = []
+
+	for kps in kps_list:
+		crop_frame, matrix = warp_face_by_kps(temp_frame, kps, 'arcface_112_v2', (112, 112))
+		crop_frame = crop_frame.astype(numpy.float32) / 127.5 - 1
+		crop_frames.append(crop_frame[:, :, ::-1].transpose(2, 0, 1))
+	embeddings = run_batch(face_recognizer, numpy.stack(crop_frames)).reshape(len(crop_frames), -1)
+	normed_embeddings = embeddings / numpy.linalg.norm(embeddings, axis = 1, keepdims = True)
+	return embeddings, normed_embeddings
 
 
-def detect_gender_age(frame : Frame, bbox : Bbox) -> Tuple[int, int]:
+def detect_genders_ages(frame : Frame, bbox_list : List[Bbox]) -> Tuple[numpy.ndarray[Any, Any], numpy.ndarray[Any, Any]]:
 	gender_age = get_face_analyser().get('gender_age')
-	bbox = bbox.reshape(2, -1)
-	scale = 64 / numpy.subtract(*bbox[::-1]).max()
-	translation = 48 - bbox.sum(axis = 0) * 0.5 * scale
-	affine_matrix = numpy.array([[ scale, 0, translation[0] ], [ 0, scale, translation[1] ]])
-	crop_frame = cv2.warpAffine(frame, affine_matrix, (96, 96))
-	crop_frame = crop_frame.astype(numpy.float32)[:, :, ::-1].transpose(2, 0, 1)
-	crop_frame = numpy.expand_dims(crop_frame, axis = 0)
-	prediction = gender_age.run(None,
-	{
-		gender_age.get_inputs()[0].name: crop_frame
-	})[0][0]
-	gender = int(numpy.argmax(prediction[:2]))
-	age = int(numpy.round(prediction[2] * 100))
-	return gender, age
+	crop_frames = []
+
+	for bbox in bbox_list:
+		bbox = bbox.reshape(2, -1)
+		scale = 64 / numpy.subtract(*bbox[::-1]).max()
+		translation = 48 - bbox.sum(axis = 0) * 0.5 * scale
+		affine_matrix = numpy.array([[ scale, 0, translation[0] ], [ 0, scale, translation[1] ]])
+		crop_frame = cv2.warpAffine(frame, affine_matrix, (96, 96))
+		crop_frames.append(crop_frame.astype(numpy.float32)[:, :, ::-1].transpose(2, 0, 1))
+	predictions = run_batch(gender_age, numpy.stack(crop_frames))
+	genders = numpy.argmax(predictions[:, :2], axis = 1).astype(int)
+	ages = numpy.round(predictions[:, 2] * 100).astype(int)
+	return genders, ages
 
 
 def get_one_face(frame : Frame, position : int = 0) -> Optional[Face]:
@@ -270,35 +419,39 @@ def get_average_face(frames : List[Frame], position : int = 0) -> Optional[Face]
 
 
 def get_many_faces(frame : Frame) -> List[Face]:
+	return unpack_face_batch(get_many_face_batch(frame))
+
+
+def get_many_face_batch(frame : Frame) -> FaceBatch:
 	try:
-		faces_cache = get_static_faces(frame)
-		if faces_cache:
-			faces = faces_cache
-		else:
-			faces = extract_faces(frame)
-			set_static_faces(frame, faces)
+		face_batch = get_static_faces(frame)
+		if face_batch is None:
+			face_batch = extract_faces(frame) if has_face_presence(frame) else pack_face_batch([])
+			set_static_faces(frame, face_batch)
 		if facefusion.globals.face_analyser_order:
-			faces = sort_by_order(faces, facefusion.globals.face_analyser_order)
+			face_batch = sort_by_order(face_batch, facefusion.globals.face_analyser_order)
 		if facefusion.globals.face_analyser_age:
-			faces = filter_by_age(faces, facefusion.globals.face_analyser_age)
+			face_batch = filter_by_age(face_batch, facefusion.globals.face_analyser_age)
 		if facefusion.globals.face_analyser_gender:
-			faces = filter_by_gender(faces, facefusion.globals.face_analyser_gender)
-		return faces
+			face_batch = filter_by_gender(face_batch, facefusion.globals.face_analyser_gender)
+		return face_batch
 	except (AttributeError, ValueError):
-		return []
+		return pack_face_batch([])
 
 
 def find_similar_faces(frame : Frame, reference_faces : FaceSet, face_distance : float) -> List[Face]:
 	similar_faces : List[Face] = []
-	many_faces = get_many_faces(frame)
+	many_face_batch = get_many_face_batch(frame)
 
 	if reference_faces:
 		for reference_set in reference_faces:
-			if not similar_faces:
-				for reference_face in reference_faces[reference_set]:
-					for face in many_faces:
-						if compare_faces(face, reference_face, face_distance):
-							similar_faces.append(face)
+			if not similar_faces and reference_faces[reference_set]:
+				reference_embeddings = get_reference_embeddings(reference_set)
+				if reference_embeddings is None or len(reference_embeddings) != len(reference_faces[reference_set]):
+					reference_embeddings = numpy.stack([ reference_face.normed_embedding for reference_face in reference_faces[reference_set] ])
+				face_distances = calc_face_distances(many_face_batch.normed_embeddings, reference_embeddings)
+				_, face_indices = numpy.nonzero(face_distances < face_distance)
+				similar_faces = unpack_face_batch(index_face_batch(many_face_batch, face_indices))
 	return similar_faces
 
 
@@ -313,45 +466,50 @@ def calc_face_distance(face : Face, reference_face : Face) -> float:
 	return 0
 
 
-def sort_by_order(faces : List[Face], order : FaceAnalyserOrder) -> List[Face]:
+def calc_face_distances(normed_embeddings : Embedding, reference_embeddings : Embedding) -> numpy.ndarray[Any, Any]:
+	return 1 - numpy.dot(reference_embeddings, normed_embeddings.T)
+
+
+def sort_by_order(face_batch : FaceBatch, order : FaceAnalyserOrder) -> FaceBatch:
+	bboxes = face_batch.bboxes
+	areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+
 	if order == 'left-right':
-		return sorted(faces, key = lambda face: face.bbox[0])
+		return index_face_batch(face_batch, numpy.argsort(bboxes[:, 0], kind = 'stable'))
 	if order == 'right-left':
-		return sorted(faces, key = lambda face: face.bbox[0], reverse = True)
+		return index_face_batch(face_batch, numpy.argsort(-bboxes[:, 0], kind = 'stable'))
 	if order == 'top-bottom':
-		return sorted(faces, key = lambda face: face.bbox[1])
+		return index_face_batch(face_batch, numpy.argsort(bboxes[:, 1], kind = 'stable'))
 	if order == 'bottom-top':
-		return sorted(faces, key = lambda face: face.bbox[1], reverse = True)
+		return index_face_batch(face_batch, numpy.argsort(-bboxes[:, 1], kind = 'stable'))
 	if order == 'small-large':
-		return sorted(faces, key = lambda face: (face.bbox[2] - face.bbox[0]) * (face.bbox[3] - face.bbox[1]))
+		return index_face_batch(face_batch, numpy.argsort(areas, kind = 'stable'))
 	if order == 'large-small':
-		return sorted(faces, key = lambda face: (face.bbox[2] - face.bbox[0]) * (face.bbox[3] - face.bbox[1]), reverse = True)
+		return index_face_batch(face_batch, numpy.argsort(-areas, kind = 'stable'))
 	if order == 'best-worst':
-		return sorted(faces, key = lambda face: face.score, reverse = True)
+		return index_face_batch(face_batch, numpy.argsort(-face_batch.scores, kind = 'stable'))
 	if order == 'worst-best':
-		return sorted(faces, key = lambda face: face.score)
-	return faces
-
-
-def filter_by_age(faces : List[Face], age : FaceAnalyserAge) -> List[Face]:
-	filter_faces = []
-	for face in faces:
-		if face.age < 13 and age == 'child':
-			filter_faces.append(face)
-		elif face.age < 19 and age == 'teen':
-			filter_faces.append(face)
-		elif face.age < 60 and age == 'adult':
-			filter_faces.append(face)
-		elif face.age > 59 and age == 'senior':
-			filter_faces.append(face)
-	return filter_faces
-
-
-def filter_by_gender(faces : List[Face], gender : FaceAnalyserGender) -> List[Face]:
-	filter_faces = []
-	for face in faces:
-		if face.gender == 0 and gender == 'female':
-			filter_faces.append(face)
-		if face.gender == 1 and gender == 'male':
-			filter_faces.append(face)
-	return filter_faces
+		return index_face_batch(face_batch, numpy.argsort(face_batch.scores, kind = 'stable'))
+	return face_batch
+
+
+def filter_by_age(face_batch : FaceBatch, age : FaceAnalyserAge) -> FaceBatch:
+	ages = face_batch.ages
+	if age == 'child':
+		return index_face_batch(face_batch, ages < 13)
+	if age == 'teen':
+		return index_face_batch(face_batch, ages < 19)
+	if age == 'adult':
+		return index_face_batch(face_batch, ages < 60)
+	if age == 'senior':
+		return index_face_batch(face_batch, ages > 59)
+	return index_face_batch(face_batch, numpy.zeros_like(ages, bool))
+
+
+def filter_by_gender(face_batch : FaceBatch, gender : FaceAnalyserGender) -> FaceBatch:
+	genders = face_batch.genders
+	if gender == 'female':
+		return index_face_batch(face_batch, genders == 0)
+	if gender == 'male':
+		return index_face_batch(face_batch, genders == 1)
+	return index_face_batch(face_batch, numpy.zeros_like(genders, bool))
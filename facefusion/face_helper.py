@@ -4,7 +4,7 @@ from functools import lru_cache
 import cv2
 import numpy
 
-from facefusion.typing import Bbox, Kps, Frame, Mask, Matrix, Template
+from facefusion.typing import Bbox, Kps, Frame, Face, FaceBatch, Mask, Matrix, Template
 
 TEMPLATES : Dict[Template, numpy.ndarray[Any, Any]] =\
 {
@@ -62,16 +62,23 @@ def warp_face_by_bbox(temp_frame : Frame, bbox : Bbox, crop_size : Size) -> Tupl
 	return crop_frame, affine_matrix
 
 
-def paste_back(temp_frame : Frame, crop_frame : Frame, crop_mask : Mask, affine_matrix : Matrix) -> Frame:
+def paste_back(temp_frame : Frame, crop_frame : Frame, crop_mask : Mask, affine_matrix : Matrix, paste_blend : float = 1.0) -> Frame:
 	inverse_matrix = cv2.invertAffineTransform(affine_matrix)
-	temp_frame_size = temp_frame.shape[:2][::-1]
-	inverse_crop_mask = cv2.warpAffine(crop_mask, inverse_matrix, temp_frame_size).clip(0, 1)
-	inverse_crop_frame = cv2.warpAffine(crop_frame, inverse_matrix, temp_frame_size, borderMode = cv2.BORDER_REPLICATE)
-	paste_frame = temp_frame.copy()
-	paste_frame[:, :, 0] = inverse_crop_mask * inverse_crop_frame[:, :, 0] + (1 - inverse_crop_mask) * temp_frame[:, :, 0]
-	paste_frame[:, :, 1] = inverse_crop_mask * inverse_crop_frame[:, :, 1] + (1 - inverse_crop_mask) * temp_frame[:, :, 1]
-	paste_frame[:, :, 2] = inverse_crop_mask * inverse_crop_frame[:, :, 2] + (1 - inverse_crop_mask) * temp_frame[:, :, 2]
-	return paste_frame
+	temp_frame_height, temp_frame_width = temp_frame.shape[:2]
+	crop_frame_height, crop_frame_width = crop_frame.shape[:2]
+	crop_points = numpy.array([[[ 0, 0 ]], [[ crop_frame_width, 0 ]], [[ 0, crop_frame_height ]], [[ crop_frame_width, crop_frame_height ]]], numpy.float32)
+	paste_points = cv2.transform(crop_points, inverse_matrix).reshape(-1, 2)
+	x1, y1 = numpy.maximum(numpy.floor(paste_points.min(axis = 0)).astype(int) - 2, 0)
+	x2, y2 = numpy.minimum(numpy.ceil(paste_points.max(axis = 0)).astype(int) + 2, [ temp_frame_width, temp_frame_height ])
+
+	if x2 > x1 and y2 > y1:
+		inverse_matrix[:, 2] -= [ x1, y1 ]
+		paste_size = (x2 - x1, y2 - y1)
+		inverse_crop_mask = cv2.warpAffine(crop_mask, inverse_matrix, paste_size).clip(0, 1) * paste_blend
+		inverse_crop_mask = numpy.expand_dims(inverse_crop_mask, axis = -1)
+		inverse_crop_frame = cv2.warpAffine(crop_frame, inverse_matrix, paste_size, borderMode = cv2.BORDER_REPLICATE)
+		temp_frame[y1:y2, x1:x2] = inverse_crop_mask * inverse_crop_frame + (1 - inverse_crop_mask) * temp_frame[y1:y2, x1:x2]
+	return temp_frame
 
 
 @lru_cache(maxsize = None)
@@ -121,3 +128,33 @@ def apply_nms(bbox_list : List[Bbox], iou_threshold : float) -> List[int]:
 		iou = width * height / (areas[index] + areas[remain_indices] - width * height)
 		indices = indices[numpy.where(iou <= iou_threshold)[0] + 1]
 	return keep_indices
+
+
+def calc_face_size(bbox : Bbox) -> float:
+	return max(bbox[2] - bbox[0], bbox[3] - bbox[1])
+
+
+def pack_face_batch(faces : List[Face]) -> FaceBatch:
+	if faces:
+		return FaceBatch(*[ numpy.stack([ numpy.asarray(value) for value in values ]) for values in zip(*faces) ])
+	return FaceBatch(
+		bboxes = numpy.empty((0, 4)),
+		kps = numpy.empty((0, 5, 2)),
+		scores = numpy.empty(0),
+		embeddings = numpy.empty((0, 512)),
+		normed_embeddings = numpy.empty((0, 512)),
+		genders = numpy.empty(0, int),
+		ages = numpy.empty(0, int)
+	)
+
+
+def unpack_face_batch(face_batch : FaceBatch) -> List[Face]:
+	return [ Face(*values) for values in zip(*face_batch) ]
+
+
+def index_face_batch(face_batch : FaceBatch, indices : Any) -> FaceBatch:
+	return FaceBatch(*[ values[indices] for values in face_batch ])
+
+
+def count_face_batch(face_batch : FaceBatch) -> int:
+	return len(face_batch.scores)
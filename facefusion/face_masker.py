@@ -1,33 +1,55 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from cv2.typing import Size
 from functools import lru_cache
+import os
 import threading
 import cv2
 import numpy
-import onnxruntime
 
 import facefusion.globals
-from facefusion.typing import Frame, Mask, Padding, FaceMaskRegion, ModelSet
-from facefusion.execution_helper import apply_execution_provider_options
-from facefusion.filesystem import resolve_relative_path
+from facefusion.typing import Frame, Mask, Padding, FaceMaskRegion, ModelSet, Kps, Matrix, Template
+from facefusion.inference_manager import get_inference_session, clear_inference_session, resolve_model_path, conditional_quantize_models, run_batch
+from facefusion.face_helper import warp_face_by_kps
+from facefusion.filesystem import is_file, resolve_relative_path
+from facefusion.model_helper import augment_parser_model
 from facefusion.download import conditional_download
 
-FACE_OCCLUDER = None
-FACE_PARSER = None
-THREAD_LOCK : threading.Lock = threading.Lock()
 MODELS : ModelSet =\
 {
 	'face_occluder':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/face_occluder.onnx',
-		'path': resolve_relative_path('../.assets/models/face_occluder.onnx')
+		'path': resolve_relative_path('../.assets/models/face_occluder.onnx'),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/face_occluder_int8.onnx'),
+			'mean': 0.0,
+			'standard_deviation': 255.0,
+			'size': (256, 256),
+			'channel_order': 'bgr',
+			'template': 'ffhq_512'
+		}
 	},
 	'face_parser':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/face_parser.onnx',
-		'path': resolve_relative_path('../.assets/models/face_parser.onnx')
+		'path': resolve_relative_path('../.assets/models/face_parser.onnx'),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/face_parser_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (512, 512),
+			'template': 'ffhq_512'
+		}
 	}
 }
+OCCLUSION_MASKS : Dict[str, List[Tuple[Kps, Matrix, Mask]]] = {}
+OCCLUSION_MASK_BYTES = 0
+OCCLUSION_MASK_BYTE_LIMIT = 256 * 1024 * 1024
+OCCLUSION_MASK_TOLERANCE = 0.05
+THREAD_LOCAL : threading.local = threading.local()
+THREAD_LOCK : threading.Lock = threading.Lock()
 FACE_MASK_REGIONS : Dict[FaceMaskRegion, int] =\
 {
 	'skin': 1,
@@ -44,35 +66,50 @@ FACE_MASK_REGIONS : Dict[FaceMaskRegion, int] =\
 
 
 def get_face_occluder() -> Any:
-	global FACE_OCCLUDER
-
-	with THREAD_LOCK:
-		if FACE_OCCLUDER is None:
-			model_path = MODELS.get('face_occluder').get('path')
-			FACE_OCCLUDER = onnxruntime.InferenceSession(model_path, providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-	return FACE_OCCLUDER
+	return get_inference_session(resolve_model_path(MODELS.get('face_occluder')))
 
 
 def get_face_parser() -> Any:
-	global FACE_PARSER
+	return get_inference_session(resolve_parser_model_path())
 
-	with THREAD_LOCK:
-		if FACE_PARSER is None:
-			model_path = MODELS.get('face_parser').get('path')
-			FACE_PARSER = onnxruntime.InferenceSession(model_path, providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-	return FACE_PARSER
 
+def get_model_paths() -> List[str]:
+	model_paths = []
+	if 'occlusion' in facefusion.globals.face_mask_types:
+		model_paths.append(resolve_model_path(MODELS.get('face_occluder')))
+	if 'region' in facefusion.globals.face_mask_types:
+		model_paths.append(resolve_parser_model_path())
+	return model_paths
 
-def clear_face_occluder() -> None:
-	global FACE_OCCLUDER
 
-	FACE_OCCLUDER = None
+def clear_face_occluder() -> None:
+	clear_inference_session(resolve_model_path(MODELS.get('face_occluder')))
 
 
 def clear_face_parser() -> None:
-	global FACE_PARSER
+	clear_inference_session(resolve_parser_model_path())
+
+
+def resolve_parser_model_path() -> str:
+	model_path = resolve_model_path(MODELS.get('face_parser'))
+	region_model_path = resolve_region_model_path(model_path)
+
+	if is_file(region_model_path):
+		return region_model_path
+	return model_path
+
 
-	FACE_PARSER = None
+def resolve_region_model_path(model_path : str) -> str:
+	model_name, model_extension = os.path.splitext(model_path)
+	return model_name + '_region' + model_extension
+
+
+def conditional_augment_parser_model() -> None:
+	model_path = resolve_model_path(MODELS.get('face_parser'))
+	region_model_path = resolve_region_model_path(model_path)
+
+	if is_file(model_path) and not is_file(region_model_path):
+		augment_parser_model(model_path, region_model_path)
 
 
 def pre_check() -> bool:
@@ -84,6 +121,8 @@ def pre_check() -> bool:
 			MODELS.get('face_parser').get('url'),
 		]
 		conditional_download(download_directory_path, model_urls)
+	conditional_quantize_models(list(MODELS.values()))
+	conditional_augment_parser_model()
 	return True
 
 
@@ -101,29 +140,114 @@ def create_static_box_mask(crop_size : Size, face_mask_blur : float, face_mask_p
 	return box_mask
 
 
-def create_occlusion_mask(crop_frame : Frame) -> Mask:
+def create_occlusion_mask(crop_frame : Frame, kps : Optional[Kps] = None, affine_matrix : Optional[Matrix] = None) -> Mask:
+	if kps is not None and affine_matrix is not None:
+		return create_occlusion_masks([ crop_frame ], [ kps ], [ affine_matrix ])[0]
+	return create_occlusion_masks([ crop_frame ])[0]
+
+
+def create_occlusion_masks(crop_frames : List[Frame], kps_list : Optional[List[Kps]] = None, affine_matrices : Optional[List[Matrix]] = None) -> List[Mask]:
+	occlusion_mask_key = getattr(THREAD_LOCAL, 'occlusion_mask_key', None)
+	has_occlusion_cache = occlusion_mask_key and kps_list is not None and affine_matrices is not None
+	occlusion_masks : List[Optional[Mask]] = [ None ] * len(crop_frames)
+
+	if has_occlusion_cache:
+		occlusion_masks = [ find_occlusion_mask(occlusion_mask_key, kps, affine_matrix, crop_frame.shape[:2][::-1]) for crop_frame, kps, affine_matrix in zip(crop_frames, kps_list, affine_matrices) ]
+	detect_indices = [ index for index, occlusion_mask in enumerate(occlusion_masks) if occlusion_mask is None ]
+	if detect_indices:
+		for index, occlusion_mask in zip(detect_indices, detect_occlusions([ crop_frames[index] for index in detect_indices ])):
+			crop_size = crop_frames[index].shape[:2][::-1]
+			if has_occlusion_cache:
+				append_occlusion_mask(occlusion_mask_key, kps_list[index], scale_affine_matrix(affine_matrices[index], crop_size, occlusion_mask.shape[:2][::-1]), occlusion_mask)
+			occlusion_masks[index] = cv2.resize(occlusion_mask, crop_size)
+	return occlusion_masks
+
+
+def detect_occlusions(crop_frames : List[Frame]) -> numpy.ndarray[Any, Any]:
 	face_occluder = get_face_occluder()
-	prepare_frame = cv2.resize(crop_frame, face_occluder.get_inputs()[0].shape[1:3][::-1])
-	prepare_frame = numpy.expand_dims(prepare_frame, axis = 0).astype(numpy.float32) / 255
-	prepare_frame = prepare_frame.transpose(0, 1, 2, 3)
-	occlusion_mask = face_occluder.run(None,
-	{
-		face_occluder.get_inputs()[0].name: prepare_frame
-	})[0][0]
-	occlusion_mask = occlusion_mask.transpose(0, 1, 2).clip(0, 1).astype(numpy.float32)
-	occlusion_mask = cv2.resize(occlusion_mask, crop_frame.shape[:2][::-1])
-	return occlusion_mask
+	occluder_size = face_occluder.get_inputs()[0].shape[1:3][::-1]
+	prepare_frames = numpy.stack([ cv2.resize(crop_frame, occluder_size) for crop_frame in crop_frames ]).astype(numpy.float32) / 255
+	occlusion_masks = run_batch(face_occluder, prepare_frames)
+	occlusion_masks = occlusion_masks.reshape(occlusion_masks.shape[:3]).clip(0, 1).astype(numpy.float32)
+	return occlusion_masks
+
+
+def scale_affine_matrix(affine_matrix : Matrix, crop_size : Size, target_size : Size) -> Matrix:
+	scale_x = target_size[0] / crop_size[0]
+	scale_y = target_size[1] / crop_size[1]
+	scale_matrix = numpy.array([[ scale_x, 0, 0.5 * scale_x - 0.5 ], [ 0, scale_y, 0.5 * scale_y - 0.5 ]])
+	return scale_matrix @ numpy.vstack([ affine_matrix, [ 0, 0, 1 ] ])
+
+
+def prepare_frame_occlusion_masks(temp_frame : Frame, kps_list : List[Kps], model_template : Template, model_size : Size) -> None:
+	occlusion_mask_key = getattr(THREAD_LOCAL, 'occlusion_mask_key', None)
+	crop_frames = []
+	affine_matrices = []
+
+	if occlusion_mask_key and 'occlusion' in facefusion.globals.face_mask_types:
+		for kps in kps_list:
+			crop_frame, affine_matrix = warp_face_by_kps(temp_frame, kps, model_template, model_size)
+			crop_frames.append(crop_frame)
+			affine_matrices.append(affine_matrix)
+		create_occlusion_masks(crop_frames, kps_list, affine_matrices)
+
+
+def set_occlusion_mask_key(occlusion_mask_key : Optional[str]) -> None:
+	THREAD_LOCAL.occlusion_mask_key = occlusion_mask_key if has_shared_occlusion_masks() else None
+
+
+def has_shared_occlusion_masks() -> bool:
+	frame_processors = facefusion.globals.frame_processors
+	return 'face_swapper' in frame_processors and 'face_enhancer' in frame_processors[frame_processors.index('face_swapper') + 1:]
+
+
+def find_occlusion_mask(occlusion_mask_key : str, kps : Kps, affine_matrix : Matrix, crop_size : Size) -> Optional[Mask]:
+	with THREAD_LOCK:
+		occlusion_masks = OCCLUSION_MASKS.get(occlusion_mask_key, [])
+	face_size = numpy.ptp(kps, axis = 0).max()
+
+	for occlusion_kps, occlusion_matrix, occlusion_mask in occlusion_masks:
+		if numpy.linalg.norm(kps - occlusion_kps, axis = 1).max() < face_size * OCCLUSION_MASK_TOLERANCE:
+			warp_matrix = numpy.vstack([ affine_matrix, [ 0, 0, 1 ] ]) @ numpy.linalg.inv(numpy.vstack([ occlusion_matrix, [ 0, 0, 1 ] ]))
+			return cv2.warpAffine(occlusion_mask.astype(numpy.float32) / 255, warp_matrix[:2], crop_size)
+	return None
+
+
+def append_occlusion_mask(occlusion_mask_key : str, kps : Kps, affine_matrix : Matrix, occlusion_mask : Mask) -> None:
+	global OCCLUSION_MASK_BYTES
+
+	occlusion_mask = (occlusion_mask * 255).round().astype(numpy.uint8)
+	with THREAD_LOCK:
+		if OCCLUSION_MASK_BYTES + occlusion_mask.nbytes <= OCCLUSION_MASK_BYTE_LIMIT:
+			OCCLUSION_MASKS.setdefault(occlusion_mask_key, []).append((kps, affine_matrix, occlusion_mask))
+			OCCLUSION_MASK_BYTES += occlusion_mask.nbytes
+
+
+def clear_occlusion_masks() -> None:
+	global OCCLUSION_MASK_BYTES
+
+	with THREAD_LOCK:
+		OCCLUSION_MASKS.clear()
+		OCCLUSION_MASK_BYTES = 0
 
 
 def create_region_mask(crop_frame : Frame, face_mask_regions : List[FaceMaskRegion]) -> Mask:
+	return create_region_masks([ crop_frame ], face_mask_regions)[0]
+
+
+def create_region_masks(crop_frames : List[Frame], face_mask_regions : List[FaceMaskRegion]) -> List[Mask]:
 	face_parser = get_face_parser()
-	prepare_frame = cv2.flip(cv2.resize(crop_frame, (512, 512)), 1)
-	prepare_frame = numpy.expand_dims(prepare_frame, axis = 0).astype(numpy.float32)[:, :, ::-1] / 127.5 - 1
-	prepare_frame = prepare_frame.transpose(0, 3, 1, 2)
-	region_mask = face_parser.run(None,
-	{
-		face_parser.get_inputs()[0].name: prepare_frame
-	})[0][0]
-	region_mask = numpy.isin(region_mask.argmax(0), [ FACE_MASK_REGIONS[region] for region in face_mask_regions ])
-	region_mask = cv2.resize(region_mask.astype(numpy.float32), crop_frame.shape[:2][::-1])
-	return region_mask
+	prepare_frames = numpy.stack([ cv2.flip(cv2.resize(crop_frame, (512, 512)), 1) for crop_frame in crop_frames ])
+	prepare_frames = prepare_frames.astype(numpy.float32)[:, :, ::-1] / 127.5 - 1
+	prepare_frames = prepare_frames.transpose(0, 3, 1, 2)
+	region_labels = [ FACE_MASK_REGIONS[region] for region in face_mask_regions ]
+
+	if len(face_parser.get_inputs()) > 1:
+		region_lookup = numpy.isin(numpy.arange(face_parser.get_inputs()[1].shape[0]), region_labels).astype(numpy.uint8)
+		region_masks = run_batch(face_parser, prepare_frames,
+		{
+			face_parser.get_inputs()[1].name: region_lookup
+		})
+	else:
+		region_masks = numpy.isin(run_batch(face_parser, prepare_frames).argmax(1), region_labels)
+	return [ cv2.resize(region_mask.astype(numpy.float32), crop_frame.shape[:2][::-1]) for crop_frame, region_mask in zip(crop_frames, region_masks) ]
@@ -1,27 +1,40 @@
-from typing import Optional, List
+from typing import List, Optional
 import hashlib
+import os
 import numpy
+from pathlib import Path
 
-from facefusion.typing import Frame, Face, FaceStore, FaceSet
+import facefusion.globals
+from facefusion.execution_helper import resolve_execution_precision
+from facefusion.face_helper import pack_face_batch, index_face_batch, count_face_batch
+from facefusion.filesystem import is_file, resolve_relative_path
+from facefusion.typing import Frame, Face, FaceBatch, FaceStore, FaceSet, Embedding
+
+FACE_INDEX_DIRECTORY_PATH = resolve_relative_path('../.assets/faces')
 
 FACE_STORE: FaceStore =\
 {
 	'static_faces': {},
-	'reference_faces': {}
+	'reference_faces': {},
+	'reference_embeddings': {}
 }
+FRAME_HASHES : List[str] = []
+FRAME_HASH_RECORDING = False
 
 
-def get_static_faces(frame : Frame) -> Optional[List[Face]]:
+def get_static_faces(frame : Frame) -> Optional[FaceBatch]:
 	frame_hash = create_frame_hash(frame)
+	if FRAME_HASH_RECORDING and frame_hash:
+		FRAME_HASHES.append(frame_hash)
 	if frame_hash in FACE_STORE['static_faces']:
 		return FACE_STORE['static_faces'][frame_hash]
 	return None
 
 
-def set_static_faces(frame : Frame, faces : List[Face]) -> None:
+def set_static_faces(frame : Frame, face_batch : FaceBatch) -> None:
 	frame_hash = create_frame_hash(frame)
 	if frame_hash:
-		FACE_STORE['static_faces'][frame_hash] = faces
+		FACE_STORE['static_faces'][frame_hash] = face_batch
 
 
 def clear_static_faces() -> None:
@@ -32,17 +45,83 @@ def create_frame_hash(frame : Frame) -> Optional[str]:
 	return hashlib.sha1(frame.tobytes()).hexdigest() if numpy.any(frame) else None
 
 
+def set_frame_hash_recording(frame_hash_recording : bool) -> None:
+	global FRAME_HASH_RECORDING
+
+	FRAME_HASH_RECORDING = frame_hash_recording
+
+
+def get_frame_hashes() -> List[str]:
+	return list(dict.fromkeys(FRAME_HASHES))
+
+
+def clear_frame_hashes() -> None:
+	FRAME_HASHES.clear()
+
+
+def create_file_hash(file_path : str) -> Optional[str]:
+	if is_file(file_path):
+		file_stat = os.stat(file_path)
+		file_key = '_'.join([ os.path.abspath(file_path), str(file_stat.st_size), str(file_stat.st_mtime_ns) ])
+		return hashlib.sha1(file_key.encode()).hexdigest()
+	return None
+
+
+def resolve_face_index_path(target_path : str, model_paths : List[str]) -> Optional[str]:
+	target_hash = create_file_hash(target_path)
+	if target_hash:
+		execution_precision = resolve_execution_precision(facefusion.globals.execution_precision, facefusion.globals.execution_providers)
+		model_names = [ os.path.splitext(os.path.basename(model_path))[0] for model_path in model_paths ]
+		face_index_name = '_'.join([ target_hash, facefusion.globals.face_detector_model, facefusion.globals.face_detector_size, str(facefusion.globals.face_detector_score), str(facefusion.globals.face_presence_score), facefusion.globals.face_recognizer_model, execution_precision ] + model_names)
+		return os.path.join(FACE_INDEX_DIRECTORY_PATH, face_index_name + '.npz')
+	return None
+
+
+def load_static_faces(face_index_path : str) -> None:
+	if is_file(face_index_path):
+		with numpy.load(face_index_path) as face_index:
+			face_batch = FaceBatch(*[ face_index[field] for field in FaceBatch._fields ])
+			face_ends = numpy.cumsum(face_index['face_totals'])
+			for frame_hash, face_start, face_end in zip(face_index['frame_hashes'], face_ends - face_index['face_totals'], face_ends):
+				FACE_STORE['static_faces'].setdefault(str(frame_hash), index_face_batch(face_batch, slice(face_start, face_end)))
+
+
+def save_static_faces(face_index_path : str, frame_hashes : List[str]) -> None:
+	frame_hashes = [ frame_hash for frame_hash in frame_hashes if frame_hash in FACE_STORE['static_faces'] ]
+	face_batches = [ FACE_STORE['static_faces'][frame_hash] for frame_hash in frame_hashes ]
+	face_batch = FaceBatch(*[ numpy.concatenate(values) for values in zip(pack_face_batch([]), *face_batches) ])
+	temp_face_index_path = face_index_path + '.' + str(os.getpid())
+
+	Path(os.path.dirname(face_index_path)).mkdir(parents = True, exist_ok = True)
+	with open(temp_face_index_path, 'wb') as face_index_file:
+		numpy.savez(face_index_file,
+			frame_hashes = numpy.array(frame_hashes, dtype = str),
+			face_totals = numpy.array([ count_face_batch(face_batch) for face_batch in face_batches ], dtype = numpy.int64),
+			**face_batch._asdict()
+		)
+	os.replace(temp_face_index_path, face_index_path)
+
+
 def get_reference_faces() -> Optional[FaceSet]:
 	if FACE_STORE['reference_faces']:
 		return FACE_STORE['reference_faces']
 	return None
 
 
+def get_reference_embeddings(name : str) -> Optional[Embedding]:
+	if name in FACE_STORE['reference_embeddings']:
+		return FACE_STORE['reference_embeddings'][name]
+	return None
+
+
 def append_reference_face(name : str, face : Face) -> None:
 	if name not in FACE_STORE['reference_faces']:
 		FACE_STORE['reference_faces'][name] = []
+		FACE_STORE['reference_embeddings'][name] = numpy.empty((0, len(face.normed_embedding)))
 	FACE_STORE['reference_faces'][name].append(face)
+	FACE_STORE['reference_embeddings'][name] = numpy.vstack([ FACE_STORE['reference_embeddings'][name], face.normed_embedding ])
 
 
 def clear_reference_faces() -> None:
 	FACE_STORE['reference_faces'] = {}
+	FACE_STORE['reference_embeddings'] = {}
@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
+import re
 import subprocess
 
 import facefusion.globals
 from facefusion import logger
 from facefusion.typing import OutputVideoPreset, Fps
-from facefusion.filesystem import get_temp_frames_pattern, get_temp_output_video_path
+from facefusion.filesystem import get_temp_frames_pattern, get_temp_directory_path, get_temp_output_video_path, create_temp_frame_store, create_temp_frame_thumbnails, TEMP_FRAME_THUMBNAIL_SIZE, read_temp_frame_index, restore_temp_frame_groups, is_image
+from facefusion.vision import count_video_frame_total, detect_video_fps, unpack_resolution
 
 
 def run_ffmpeg(args : List[str]) -> bool:
@@ -18,6 +20,25 @@ def run_ffmpeg(args : List[str]) -> bool:
 		return False
 
 
+def run_ffmpeg_into_store(args : List[str], temp_frame_store_path : str, frame_size : int) -> bool:
+	commands = [ 'ffmpeg', '-hide_banner', '-loglevel', 'error' ]
+	commands.extend(args)
+	process = subprocess.Popen(commands, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+	frame_buffer = bytearray(frame_size)
+	frame_total = 0
+
+	with open(temp_frame_store_path, 'r+b') as temp_frame_store_file:
+		while process.stdout.readinto(frame_buffer) == frame_size:
+			temp_frame_store_file.write(frame_buffer)
+			frame_total += 1
+		temp_frame_store_file.truncate(frame_total * frame_size)
+	_, stderr = process.communicate()
+	if process.returncode:
+		logger.debug(stderr.decode().strip(), __name__.upper())
+		return False
+	return True
+
+
 def open_ffmpeg(args : List[str]) -> subprocess.Popen[bytes]:
 	commands = [ 'ffmpeg', '-hide_banner', '-loglevel', 'error' ]
 	commands.extend(args)
@@ -29,16 +50,30 @@ def extract_frames(target_path : str, video_resolution : str, video_fps : Fps) -
 	trim_frame_start = facefusion.globals.trim_frame_start
 	trim_frame_end = facefusion.globals.trim_frame_end
 	temp_frames_pattern = get_temp_frames_pattern(target_path, '%04d')
-	commands = [ '-hwaccel', 'auto', '-i', target_path, '-q:v', str(temp_frame_compression), '-pix_fmt', 'rgb24' ]
-	if trim_frame_start is not None and trim_frame_end is not None:
-		commands.extend([ '-vf', 'trim=start_frame=' + str(trim_frame_start) + ':end_frame=' + str(trim_frame_end) + ',scale=' + str(video_resolution) + ',fps=' + str(video_fps) ])
-	elif trim_frame_start is not None:
-		commands.extend([ '-vf', 'trim=start_frame=' + str(trim_frame_start) + ',scale=' + str(video_resolution) + ',fps=' + str(video_fps) ])
-	elif trim_frame_end is not None:
-		commands.extend([ '-vf', 'trim=end_frame=' + str(trim_frame_end) + ',scale=' + str(video_resolution) + ',fps=' + str(video_fps) ])
+	start_time, _ = calc_trim_times(target_path)
+	commands = [ '-hwaccel', 'auto' ]
+	if start_time is not None:
+		commands.extend([ '-ss', str(start_time) ])
+	commands.extend([ '-i', target_path ])
+	if facefusion.globals.temp_frame_format == 'raw':
+		commands.extend([ '-pix_fmt', 'bgr24' ])
 	else:
-		commands.extend([ '-vf', 'scale=' + str(video_resolution) + ',fps=' + str(video_fps) ])
+		commands.extend([ '-q:v', str(temp_frame_compression), '-pix_fmt', 'rgb24' ])
+	video_filter = 'scale=' + str(video_resolution) + ',fps=' + str(video_fps)
+	if trim_frame_end is not None:
+		video_filter = 'trim=end_frame=' + str(trim_frame_end - (trim_frame_start or 0)) + ',' + video_filter
+	commands.extend([ '-vf', video_filter ])
+	thumbnail_commands = [ '-vf', video_filter + ',scale=' + str(TEMP_FRAME_THUMBNAIL_SIZE) + ':' + str(TEMP_FRAME_THUMBNAIL_SIZE) + ':flags=area,format=gray', '-vsync', '0', '-f', 'rawvideo', '-y', create_temp_frame_thumbnails(target_path) ]
+	if facefusion.globals.temp_frame_format == 'raw':
+		target_video_fps = detect_video_fps(target_path) or video_fps
+		temp_frame_total = round(((trim_frame_end or count_video_frame_total(target_path)) - (trim_frame_start or 0)) * video_fps / target_video_fps)
+		width, height = unpack_resolution(video_resolution)
+		temp_frame_store_path = create_temp_frame_store(target_path, (width, height), temp_frame_total)
+		commands.extend([ '-vsync', '0', '-f', 'rawvideo', 'pipe:1' ])
+		commands.extend(thumbnail_commands)
+		return run_ffmpeg_into_store(commands, temp_frame_store_path, width * height * 3)
 	commands.extend([ '-vsync', '0', temp_frames_pattern ])
+	commands.extend(thumbnail_commands)
 	return run_ffmpeg(commands)
 
 
@@ -48,10 +83,32 @@ def compress_image(output_path : str) -> bool:
 	return run_ffmpeg(commands)
 
 
-def merge_video(target_path : str, video_fps : Fps) -> bool:
+def merge_video(target_path : str, video_fps : Fps, audio_path : Optional[str]) -> bool:
 	temp_output_video_path = get_temp_output_video_path(target_path)
 	temp_frames_pattern = get_temp_frames_pattern(target_path, '%04d')
-	commands = [ '-hwaccel', 'auto', '-r', str(video_fps), '-i', temp_frames_pattern, '-c:v', facefusion.globals.output_video_encoder ]
+	temp_frame_index = read_temp_frame_index(get_temp_directory_path(target_path))
+	restore_temp_frame_groups(target_path)
+	if facefusion.globals.temp_frame_format == 'raw' and temp_frame_index:
+		commands = [ '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', str(temp_frame_index.get('width')) + 'x' + str(temp_frame_index.get('height')), '-r', str(video_fps), '-i', temp_frame_index.get('path') ]
+	else:
+		commands = [ '-hwaccel', 'auto', '-r', str(video_fps), '-i', temp_frames_pattern ]
+	if is_image(facefusion.globals.output_video_watermark):
+		commands.extend([ '-i', facefusion.globals.output_video_watermark ])
+	if audio_path:
+		start_time, end_time = calc_trim_times(audio_path)
+		if start_time is not None:
+			commands.extend([ '-ss', str(start_time) ])
+		if end_time is not None:
+			commands.extend([ '-to', str(end_time) ])
+		commands.extend([ '-i', audio_path ])
+	if is_image(facefusion.globals.output_video_watermark):
+		commands.extend([ '-filter_complex', '[0:v][1:v]overlay=W-w-20:H-h-20[v]', '-map', '[v]' ])
+	else:
+		commands.extend([ '-map', '0:v:0' ])
+	if audio_path:
+		audio_input_index = commands.count('-i') - 1
+		commands.extend([ '-map', str(audio_input_index) + ':a:0', '-c:a', 'copy', '-shortest' ])
+	commands.extend([ '-c:v', facefusion.globals.output_video_encoder ])
 	if facefusion.globals.output_video_encoder in [ 'libx264', 'libx265' ]:
 		output_video_compression = round(51 - (facefusion.globals.output_video_quality * 0.51))
 		commands.extend([ '-crf', str(output_video_compression), '-preset', facefusion.globals.output_video_preset ])
@@ -65,19 +122,25 @@ def merge_video(target_path : str, video_fps : Fps) -> bool:
 	return run_ffmpeg(commands)
 
 
-def restore_audio(target_path : str, output_path : str, video_fps : Fps) -> bool:
+def has_audio(target_path : str) -> bool:
+	commands = [ 'ffmpeg', '-hide_banner', '-i', target_path ]
+	output = subprocess.run(commands, stderr = subprocess.PIPE).stderr.decode(errors = 'ignore')
+	return re.search(r'Stream #\d+:\d+.*: Audio: ', output) is not None
+
+
+def calc_trim_times(target_path : str) -> Tuple[Optional[float], Optional[float]]:
 	trim_frame_start = facefusion.globals.trim_frame_start
 	trim_frame_end = facefusion.globals.trim_frame_end
-	temp_output_video_path = get_temp_output_video_path(target_path)
-	commands = [ '-hwaccel', 'auto', '-i', temp_output_video_path ]
-	if trim_frame_start is not None:
-		start_time = trim_frame_start / video_fps
-		commands.extend([ '-ss', str(start_time) ])
-	if trim_frame_end is not None:
-		end_time = trim_frame_end / video_fps
-		commands.extend([ '-to', str(end_time) ])
-	commands.extend([ '-i', target_path, '-c', 'copy', '-map', '0:v:0', '-map', '1:a:0', '-shortest', '-y', output_path ])
-	return run_ffmpeg(commands)
+	target_video_fps = detect_video_fps(target_path)
+	start_time = None
+	end_time = None
+
+	if target_video_fps:
+		if trim_frame_start:
+			start_time = trim_frame_start / target_video_fps
+		if trim_frame_end is not None:
+			end_time = trim_frame_end / target_video_fps
+	return start_time, end_time
 
 
 def map_nvenc_preset(output_video_preset : OutputVideoPreset) -> Optional[str]:
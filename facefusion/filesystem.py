@@ -1,22 +1,158 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import glob
+import json
 import os
 import shutil
 import tempfile
+import threading
 import filetype
+import numpy
+import psutil
 from pathlib import Path
 
 import facefusion.globals
+from facefusion.typing import Frame, Resolution, TempFrameGroups
 
 TEMP_DIRECTORY_PATH = os.path.join(tempfile.gettempdir(), 'facefusion')
+TEMP_MEMORY_DIRECTORY_PATH = os.path.join('/dev/shm', 'facefusion')
 TEMP_OUTPUT_VIDEO_NAME = 'temp.mp4'
+TEMP_FRAME_STORE_NAME = 'frames.raw'
+TEMP_FRAME_INDEX_NAME = 'frames.json'
+TEMP_FRAME_GROUPS_NAME = 'groups.json'
+TEMP_FRAME_THUMBNAILS_NAME = 'thumbnails.raw'
+TEMP_FRAME_THUMBNAIL_SIZE = 64
+TEMP_FRAME_STORES : Dict[str, Any] = {}
+TEMP_FRAME_THUMBNAILS : Dict[str, Any] = {}
+THREAD_LOCK : threading.Lock = threading.Lock()
 
 
 def get_temp_frame_paths(target_path : str) -> List[str]:
+	if facefusion.globals.temp_frame_format == 'raw':
+		temp_frame_store = get_temp_frame_store(get_temp_directory_path(target_path))
+		if temp_frame_store is None:
+			return []
+		temp_frames_pattern = get_temp_frames_pattern(target_path, '%04d')
+		return [ temp_frames_pattern % (frame_number + 1) for frame_number in range(len(temp_frame_store)) ]
 	temp_frames_pattern = get_temp_frames_pattern(target_path, '*')
 	return sorted(glob.glob(temp_frames_pattern))
 
 
+def create_temp_frame_store(target_path : str, resolution : Resolution, frame_total : int) -> str:
+	temp_directory_path = get_temp_directory_path(target_path)
+	temp_frame_store_path = os.path.join(temp_directory_path, TEMP_FRAME_STORE_NAME)
+	width, height = resolution
+	temp_frame_store_size = frame_total * width * height * 3
+
+	with THREAD_LOCK:
+		TEMP_FRAME_STORES.pop(temp_directory_path, None)
+	if is_directory(os.path.dirname(TEMP_MEMORY_DIRECTORY_PATH)) and temp_frame_store_size < min(shutil.disk_usage(os.path.dirname(TEMP_MEMORY_DIRECTORY_PATH)).free, psutil.virtual_memory().available):
+		temp_frame_store_path = os.path.join(TEMP_MEMORY_DIRECTORY_PATH, os.path.basename(temp_directory_path), TEMP_FRAME_STORE_NAME)
+		Path(os.path.dirname(temp_frame_store_path)).mkdir(parents = True, exist_ok = True)
+	with open(os.path.join(temp_directory_path, TEMP_FRAME_INDEX_NAME), 'w') as temp_frame_index_file:
+		json.dump(
+		{
+			'path': temp_frame_store_path,
+			'width': width,
+			'height': height
+		}, temp_frame_index_file)
+	with open(temp_frame_store_path, 'wb') as temp_frame_store_file:
+		temp_frame_store_file.truncate(temp_frame_store_size)
+	return temp_frame_store_path
+
+
+def read_temp_frame_index(temp_directory_path : str) -> Optional[Dict[str, Any]]:
+	temp_frame_index_path = os.path.join(temp_directory_path, TEMP_FRAME_INDEX_NAME)
+	if is_file(temp_frame_index_path):
+		with open(temp_frame_index_path) as temp_frame_index_file:
+			return json.load(temp_frame_index_file)
+	return None
+
+
+def get_temp_frame_store(temp_directory_path : str) -> Optional[numpy.memmap[Any, Any]]:
+	with THREAD_LOCK:
+		if temp_directory_path not in TEMP_FRAME_STORES:
+			temp_frame_index = read_temp_frame_index(temp_directory_path)
+			if temp_frame_index is None or not is_file(temp_frame_index.get('path')):
+				return None
+			width = temp_frame_index.get('width')
+			height = temp_frame_index.get('height')
+			frame_total = os.path.getsize(temp_frame_index.get('path')) // (width * height * 3)
+			TEMP_FRAME_STORES[temp_directory_path] = numpy.memmap(temp_frame_index.get('path'), dtype = numpy.uint8, mode = 'r+', shape = (frame_total, height, width, 3))
+		return TEMP_FRAME_STORES[temp_directory_path]
+
+
+def get_temp_frame_view(temp_frame_path : str) -> Optional[Frame]:
+	if temp_frame_path.endswith('.raw'):
+		temp_frame_store = get_temp_frame_store(os.path.dirname(temp_frame_path))
+		if temp_frame_store is not None:
+			return temp_frame_store[get_temp_frame_index(temp_frame_path)]
+	return None
+
+
+def get_temp_frame_index(temp_frame_path : str) -> int:
+	return int(Path(temp_frame_path).stem) - 1
+
+
+def create_temp_frame_thumbnails(target_path : str) -> str:
+	temp_directory_path = get_temp_directory_path(target_path)
+	with THREAD_LOCK:
+		TEMP_FRAME_THUMBNAILS.pop(temp_directory_path, None)
+	return os.path.join(temp_directory_path, TEMP_FRAME_THUMBNAILS_NAME)
+
+
+def get_temp_frame_thumbnails(temp_directory_path : str) -> Optional[numpy.memmap[Any, Any]]:
+	with THREAD_LOCK:
+		if temp_directory_path not in TEMP_FRAME_THUMBNAILS:
+			temp_frame_thumbnails_path = os.path.join(temp_directory_path, TEMP_FRAME_THUMBNAILS_NAME)
+			if not is_file(temp_frame_thumbnails_path) or not os.path.getsize(temp_frame_thumbnails_path):
+				return None
+			frame_total = os.path.getsize(temp_frame_thumbnails_path) // (TEMP_FRAME_THUMBNAIL_SIZE * TEMP_FRAME_THUMBNAIL_SIZE)
+			TEMP_FRAME_THUMBNAILS[temp_directory_path] = numpy.memmap(temp_frame_thumbnails_path, dtype = numpy.uint8, mode = 'r', shape = (frame_total, TEMP_FRAME_THUMBNAIL_SIZE, TEMP_FRAME_THUMBNAIL_SIZE))
+		return TEMP_FRAME_THUMBNAILS[temp_directory_path]
+
+
+def get_temp_frame_thumbnail(temp_frame_path : str) -> Optional[Frame]:
+	temp_frame_thumbnails = get_temp_frame_thumbnails(os.path.dirname(temp_frame_path))
+	if temp_frame_thumbnails is not None:
+		temp_frame_index = get_temp_frame_index(temp_frame_path)
+		if 0 <= temp_frame_index < len(temp_frame_thumbnails):
+			return numpy.asarray(temp_frame_thumbnails[temp_frame_index])
+	return None
+
+
+def clear_temp_frame_store(temp_directory_path : str) -> None:
+	with THREAD_LOCK:
+		TEMP_FRAME_STORES.pop(temp_directory_path, None)
+		TEMP_FRAME_THUMBNAILS.pop(temp_directory_path, None)
+	temp_frame_index = read_temp_frame_index(temp_directory_path)
+	if temp_frame_index and is_file(temp_frame_index.get('path')):
+		os.remove(temp_frame_index.get('path'))
+
+
+def write_temp_frame_groups(target_path : str, temp_frame_groups : TempFrameGroups) -> None:
+	temp_directory_path = get_temp_directory_path(target_path)
+	with open(os.path.join(temp_directory_path, TEMP_FRAME_GROUPS_NAME), 'w') as temp_frame_groups_file:
+		json.dump(temp_frame_groups, temp_frame_groups_file)
+
+
+def read_temp_frame_groups(target_path : str) -> TempFrameGroups:
+	temp_frame_groups_path = os.path.join(get_temp_directory_path(target_path), TEMP_FRAME_GROUPS_NAME)
+	if is_file(temp_frame_groups_path):
+		with open(temp_frame_groups_path) as temp_frame_groups_file:
+			return json.load(temp_frame_groups_file)
+	return {}
+
+
+def restore_temp_frame_groups(target_path : str) -> None:
+	for temp_frame_path, reference_frame_path in read_temp_frame_groups(target_path).items():
+		temp_frame_view = get_temp_frame_view(temp_frame_path)
+		reference_frame_view = get_temp_frame_view(reference_frame_path)
+		if temp_frame_view is not None and reference_frame_view is not None:
+			temp_frame_view[:] = reference_frame_view
+		elif is_file(reference_frame_path):
+			shutil.copyfile(reference_frame_path, temp_frame_path)
+
+
 def get_temp_frames_pattern(target_path : str, temp_frame_prefix : str) -> str:
 	temp_directory_path = get_temp_directory_path(target_path)
 	return os.path.join(temp_directory_path, temp_frame_prefix + '.' + facefusion.globals.temp_frame_format)
@@ -49,9 +185,11 @@ def clear_temp(target_path : str) -> None:
 	temp_directory_path = get_temp_directory_path(target_path)
 	parent_directory_path = os.path.dirname(temp_directory_path)
 	if not facefusion.globals.keep_temp and is_directory(temp_directory_path):
+		clear_temp_frame_store(temp_directory_path)
 		shutil.rmtree(temp_directory_path)
-	if os.path.exists(parent_directory_path) and not os.listdir(parent_directory_path):
-		os.rmdir(parent_directory_path)
+	for directory_path in [ os.path.join(TEMP_MEMORY_DIRECTORY_PATH, os.path.basename(temp_directory_path)), TEMP_MEMORY_DIRECTORY_PATH, parent_directory_path ]:
+		if os.path.exists(directory_path) and not os.listdir(directory_path):
+			os.rmdir(directory_path)
 
 
 def is_file(file_path : str) -> bool:
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from facefusion.typing import LogLevel, VideoMemoryStrategy, FaceSelectorMode, FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, FaceMaskType, FaceMaskRegion, OutputVideoEncoder, OutputVideoPreset, FaceDetectorModel, FaceRecognizerModel, TempFrameFormat, Padding
+from facefusion.typing import LogLevel, ExecutionGraphOptimization, ExecutionMode, ExecutionMemoryOption, ExecutionPrecision, FaceSelectorMode, FaceAnalyserOrder, FaceAnalyserAge, FaceAnalyserGender, FaceMaskType, FaceMaskRegion, OutputVideoEncoder, OutputVideoPreset, FaceDetectorModel, FaceRecognizerModel, TempFrameFormat, Padding
 
 # general
 source_paths : Optional[List[str]] = None
@@ -14,8 +14,14 @@ log_level : Optional[LogLevel] = None
 execution_providers : List[str] = []
 execution_thread_count : Optional[int] = None
 execution_queue_count : Optional[int] = None
+execution_graph_optimization : Optional[ExecutionGraphOptimization] = None
+execution_intra_op_thread_count : Optional[int] = None
+execution_inter_op_thread_count : Optional[int] = None
+execution_mode : Optional[ExecutionMode] = None
+execution_memory_options : Optional[List[ExecutionMemoryOption]] = None
+execution_precision : Optional[ExecutionPrecision] = None
 # memory
-video_memory_strategy : Optional[VideoMemoryStrategy] = None
+video_memory_limit : Optional[int] = None
 system_memory_limit : Optional[int] = None
 # face analyser
 face_analyser_order : Optional[FaceAnalyserOrder] = None
@@ -24,6 +30,7 @@ face_analyser_gender : Optional[FaceAnalyserGender] = None
 face_detector_model : Optional[FaceDetectorModel] = None
 face_detector_size : Optional[str] = None
 face_detector_score : Optional[float] = None
+face_presence_score : Optional[float] = None
 face_recognizer_model : Optional[FaceRecognizerModel] = None
 # face selector
 face_selector_mode : Optional[FaceSelectorMode] = None
@@ -40,6 +47,7 @@ trim_frame_start : Optional[int] = None
 trim_frame_end : Optional[int] = None
 temp_frame_format : Optional[TempFrameFormat] = None
 temp_frame_quality : Optional[int] = None
+temp_frame_dedup_threshold : Optional[int] = None
 keep_temp : Optional[bool] = None
 # output creation
 output_image_quality : Optional[int] = None
@@ -47,7 +55,9 @@ output_video_encoder : Optional[OutputVideoEncoder] = None
 output_video_preset : Optional[OutputVideoPreset] = None
 output_video_quality : Optional[int] = None
 output_video_resolution : Optional[str] = None
+output_video_max_height : Optional[int] = None
 output_video_fps : Optional[float] = None
+output_video_watermark : Optional[str] = None
 skip_audio : Optional[bool] = None
 # frame processors
 frame_processors : List[str] = []
@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from pathlib import Path
+import os
+import threading
+import numpy
+import onnxruntime
+
+import facefusion.globals
+from facefusion import logger, wording
+from facefusion.execution_helper import apply_execution_provider_options, encode_execution_providers, map_graph_optimization_level, map_execution_mode, calc_op_thread_counts, resolve_execution_precision
+from facefusion.filesystem import is_file
+from facefusion.model_helper import quantize_model, create_calibration_crops, read_calibration_frames
+from facefusion.typing import ModelValue
+
+INFERENCE_SESSIONS : OrderedDict[str, Any] = OrderedDict()
+INFERENCE_FOOTPRINTS : Dict[str, int] = {}
+INFERENCE_LOCKS : Dict[str, threading.Lock] = {}
+THREAD_LOCK : threading.Lock = threading.Lock()
+
+
+def get_inference_session(model_path : str) -> Any:
+	with THREAD_LOCK:
+		if model_path in INFERENCE_SESSIONS:
+			INFERENCE_SESSIONS.move_to_end(model_path)
+			return INFERENCE_SESSIONS[model_path]
+		inference_lock = INFERENCE_LOCKS.setdefault(model_path, threading.Lock())
+
+	with inference_lock:
+		with THREAD_LOCK:
+			if model_path in INFERENCE_SESSIONS:
+				INFERENCE_SESSIONS.move_to_end(model_path)
+				return INFERENCE_SESSIONS[model_path]
+		inference_session = create_inference_session(model_path)
+		with THREAD_LOCK:
+			INFERENCE_SESSIONS[model_path] = inference_session
+			INFERENCE_FOOTPRINTS[model_path] = calc_inference_footprint(model_path)
+	evict_inference_sessions()
+	return inference_session
+
+
+def create_inference_session(model_path : str) -> Any:
+	execution_providers = apply_execution_provider_options(facefusion.globals.execution_providers)
+	session_options = create_session_options()
+	optimized_model_path = resolve_optimized_model_path(model_path)
+
+	if is_file(optimized_model_path):
+		session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+		return onnxruntime.InferenceSession(optimized_model_path, sess_options = session_options, providers = execution_providers)
+	session_options.graph_optimization_level = map_graph_optimization_level(facefusion.globals.execution_graph_optimization)
+	if optimized_model_path:
+		temp_model_path = optimized_model_path + '.' + str(os.getpid())
+		Path(os.path.dirname(optimized_model_path)).mkdir(parents = True, exist_ok = True)
+		session_options.optimized_model_filepath = temp_model_path
+		try:
+			inference_session = onnxruntime.InferenceSession(model_path, sess_options = session_options, providers = execution_providers)
+		except Exception as exception:
+			logger.debug(str(exception), __name__.upper())
+			if is_file(temp_model_path):
+				os.remove(temp_model_path)
+			session_options.optimized_model_filepath = ''
+			return onnxruntime.InferenceSession(model_path, sess_options = session_options, providers = execution_providers)
+		if is_file(temp_model_path):
+			os.replace(temp_model_path, optimized_model_path)
+		return inference_session
+	return onnxruntime.InferenceSession(model_path, sess_options = session_options, providers = execution_providers)
+
+
+def create_session_options() -> onnxruntime.SessionOptions:
+	session_options = onnxruntime.SessionOptions()
+	intra_op_thread_count, inter_op_thread_count = calc_op_thread_counts(facefusion.globals.execution_thread_count, facefusion.globals.execution_mode)
+
+	session_options.intra_op_num_threads = facefusion.globals.execution_intra_op_thread_count or intra_op_thread_count
+	session_options.inter_op_num_threads = facefusion.globals.execution_inter_op_thread_count or inter_op_thread_count
+	session_options.execution_mode = map_execution_mode(facefusion.globals.execution_mode)
+	if facefusion.globals.execution_memory_options is not None:
+		session_options.enable_cpu_mem_arena = 'cpu-memory-arena' in facefusion.globals.execution_memory_options
+		session_options.enable_mem_pattern = 'memory-pattern' in facefusion.globals.execution_memory_options
+	return session_options
+
+
+def has_serializable_execution_providers(execution_providers : List[str]) -> bool:
+	return all(execution_provider in [ 'cpu', 'cuda' ] for execution_provider in encode_execution_providers(execution_providers))
+
+
+def resolve_optimized_model_path(model_path : str) -> Optional[str]:
+	if facefusion.globals.execution_graph_optimization in [ 'basic', 'extended', 'all' ] and has_serializable_execution_providers(facefusion.globals.execution_providers):
+		model_directory_path, model_file_name = os.path.split(model_path)
+		model_name, model_extension = os.path.splitext(model_file_name)
+		execution_provider_names = '_'.join(encode_execution_providers(facefusion.globals.execution_providers))
+		optimized_model_name = model_name + '_' + execution_provider_names + '_' + facefusion.globals.execution_graph_optimization + model_extension
+		return os.path.join(model_directory_path, 'optimized', onnxruntime.__version__, optimized_model_name)
+	return None
+
+
+def resolve_model_path(model_value : ModelValue) -> str:
+	model_quantization = model_value.get('quantization')
+
+	if model_quantization and resolve_execution_precision(facefusion.globals.execution_precision, facefusion.globals.execution_providers) == 'int8' and is_file(model_quantization.get('path')):
+		return model_quantization.get('path')
+	return model_value.get('path')
+
+
+def conditional_quantize_models(model_values : List[ModelValue]) -> None:
+	if resolve_execution_precision(facefusion.globals.execution_precision, facefusion.globals.execution_providers) == 'int8':
+		model_values = [ model_value for model_value in model_values if model_value.get('quantization') and is_file(model_value.get('path')) and not is_file(model_value.get('quantization').get('path')) ]
+		calibration_frames = read_calibration_frames() if model_values else []
+
+		for model_value in model_values:
+			logger.info(wording.get('quantizing_model').format(model_name = os.path.basename(model_value.get('path'))), __name__.upper())
+			if model_value.get('quantization').get('template'):
+				quantize_model(model_value, create_calibration_crops(calibration_frames, model_value))
+			else:
+				quantize_model(model_value, calibration_frames)
+
+
+def run_batch(inference_session : Any, batch_frames : numpy.ndarray[Any, Any], static_inputs : Optional[Dict[str, Any]] = None) -> numpy.ndarray[Any, Any]:
+	input_name = inference_session.get_inputs()[0].name
+	batch_size = inference_session.get_inputs()[0].shape[0]
+	static_inputs = static_inputs or {}
+
+	if isinstance(batch_size, int) and batch_size > 0:
+		batch_total = len(batch_frames)
+		pad_total = -batch_total % batch_size
+		batch_frames = numpy.concatenate([ batch_frames, numpy.zeros((pad_total,) + batch_frames.shape[1:], batch_frames.dtype) ])
+		return numpy.concatenate([ inference_session.run(None, { input_name: batch_frames[index:index + batch_size], **static_inputs })[0] for index in range(0, len(batch_frames), batch_size) ])[:batch_total]
+	return inference_session.run(None,
+	{
+		input_name: batch_frames,
+		**static_inputs
+	})[0]
+
+
+def preload_inference_sessions(model_paths : List[str]) -> threading.Thread:
+	preload_thread = threading.Thread(target = conditional_preload_inference_sessions, args = (model_paths,), daemon = True)
+	preload_thread.start()
+	return preload_thread
+
+
+def conditional_preload_inference_sessions(model_paths : List[str]) -> None:
+	for model_path in model_paths:
+		with THREAD_LOCK:
+			inference_footprint = calc_inference_footprint(model_path)
+			has_inference_session = model_path in INFERENCE_SESSIONS
+			has_inference_budget = not get_inference_budget() or get_inference_footprint() + inference_footprint <= get_inference_budget()
+		if not has_inference_session and has_inference_budget and model_path.endswith('.onnx') and os.path.isfile(model_path):
+			get_inference_session(model_path)
+
+
+def evict_inference_sessions() -> None:
+	inference_budget = get_inference_budget()
+
+	if inference_budget:
+		with THREAD_LOCK:
+			while len(INFERENCE_SESSIONS) > 1 and get_inference_footprint() > inference_budget:
+				model_path, _ = INFERENCE_SESSIONS.popitem(last = False)
+				INFERENCE_FOOTPRINTS.pop(model_path, None)
+
+
+def clear_inference_session(model_path : str) -> None:
+	with THREAD_LOCK:
+		INFERENCE_SESSIONS.pop(model_path, None)
+		INFERENCE_FOOTPRINTS.pop(model_path, None)
+
+
+def clear_inference_sessions() -> None:
+	with THREAD_LOCK:
+		INFERENCE_SESSIONS.clear()
+		INFERENCE_FOOTPRINTS.clear()
+
+
+def calc_inference_footprint(model_path : str) -> int:
+	if os.path.isfile(model_path):
+		return os.path.getsize(model_path)
+	return 0
+
+
+def get_inference_footprint() -> int:
+	return sum(INFERENCE_FOOTPRINTS.values())
+
+
+def get_inference_budget() -> int:
+	if facefusion.globals.video_memory_limit:
+		return facefusion.globals.video_memory_limit * 1024 ** 3
+	return 0
@@ -0,0 +1,167 @@
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import mmap
+import cv2
+import numpy
+import onnx
+import onnxruntime
+from onnx import helper, numpy_helper
+
+from facefusion.face_helper import warp_face_by_kps
+from facefusion.filesystem import is_file, is_directory, is_image, resolve_relative_path
+from facefusion.typing import Frame, ModelValue
+from facefusion.vision import read_image
+
+MODEL_GRAPH_FIELD = 7
+GRAPH_INITIALIZER_FIELD = 5
+CALIBRATION_FRAME_LIMIT = 16
+PARSER_CLASS_TOTAL = 19
+
+
+class CalibrationReader:
+
+	def __init__(self, calibration_inputs : List[Dict[str, numpy.ndarray[Any, Any]]]) -> None:
+		self.calibration_inputs = iter(calibration_inputs)
+
+	def get_next(self) -> Optional[Dict[str, numpy.ndarray[Any, Any]]]:
+		return next(self.calibration_inputs, None)
+
+
+def read_model_initializer(model_path : str, index : int) -> numpy.ndarray[Any, Any]:
+	with open(model_path, 'rb') as model_file, mmap.mmap(model_file.fileno(), 0, access = mmap.ACCESS_READ) as model_buffer:
+		graph_start, graph_end = find_message_fields(model_buffer, 0, len(model_buffer), MODEL_GRAPH_FIELD)[-1]
+		initializer_start, initializer_end = find_message_fields(model_buffer, graph_start, graph_end, GRAPH_INITIALIZER_FIELD)[index]
+		initializer = onnx.TensorProto.FromString(model_buffer[initializer_start:initializer_end])
+	return numpy_helper.to_array(initializer)
+
+
+def find_message_fields(buffer : Any, start : int, end : int, field_number : int) -> List[Tuple[int, int]]:
+	message_fields = []
+	offset = start
+
+	while offset < end:
+		key, offset = read_varint(buffer, offset)
+		wire_type = key & 7
+		if wire_type == 0:
+			_, offset = read_varint(buffer, offset)
+		elif wire_type == 1:
+			offset += 8
+		elif wire_type == 2:
+			length, offset = read_varint(buffer, offset)
+			if key >> 3 == field_number:
+				message_fields.append((offset, offset + length))
+			offset += length
+		elif wire_type == 5:
+			offset += 4
+		else:
+			raise ValueError
+	return message_fields
+
+
+def read_varint(buffer : Any, offset : int) -> Tuple[int, int]:
+	value = 0
+	shift = 0
+
+	while True:
+		byte = buffer[offset]
+		offset += 1
+		value |= (byte & 0x7f) << shift
+		shift += 7
+		if byte < 0x80:
+			return value, offset
+
+
+def augment_parser_model(model_path : str, augmented_model_path : str) -> bool:
+	model = onnx.load(model_path)
+	temp_model_path = augmented_model_path + '.' + str(os.getpid())
+	logits_output = model.graph.output[0]
+	class_total = logits_output.type.tensor_type.shape.dim[1].dim_value or PARSER_CLASS_TOTAL
+
+	model.graph.node.extend(
+	[
+		helper.make_node('ArgMax', [ logits_output.name ], [ 'region_labels' ], axis = 1, keepdims = 0),
+		helper.make_node('Gather', [ 'region_lookup', 'region_labels' ], [ 'region_mask' ], axis = 0)
+	])
+	model.graph.input.append(helper.make_tensor_value_info('region_lookup', onnx.TensorProto.UINT8, [ class_total ]))
+	del model.graph.output[:]
+	model.graph.output.append(helper.make_tensor_value_info('region_mask', onnx.TensorProto.UINT8, None))
+	onnx.save(model, temp_model_path)
+	if is_file(temp_model_path):
+		os.replace(temp_model_path, augmented_model_path)
+	return is_file(augmented_model_path)
+
+
+def quantize_model(model_value : ModelValue, calibration_frames : List[Frame]) -> bool:
+	from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+	model_path = model_value.get('path')
+	quantized_model_path = model_value.get('quantization').get('path')
+	temp_model_path = quantized_model_path + '.' + str(os.getpid())
+
+	if calibration_frames:
+		calibration_reader = CalibrationReader(create_calibration_inputs(model_value, calibration_frames))
+		quantize_static(model_path, temp_model_path, calibration_reader, quant_format = QuantFormat.QDQ, activation_type = QuantType.QUInt8, weight_type = QuantType.QInt8, per_channel = True)
+	else:
+		quantize_dynamic(model_path, temp_model_path, weight_type = QuantType.QUInt8)
+	if is_file(temp_model_path):
+		os.replace(temp_model_path, quantized_model_path)
+	return is_file(quantized_model_path)
+
+
+def create_calibration_inputs(model_value : ModelValue, calibration_frames : List[Frame]) -> List[Dict[str, numpy.ndarray[Any, Any]]]:
+	model_inputs = onnxruntime.InferenceSession(model_value.get('path'), providers = [ 'CPUExecutionProvider' ]).get_inputs()
+	calibration_inputs = []
+
+	for calibration_frame in calibration_frames:
+		calibration_input = {}
+		for model_input in model_inputs:
+			input_type = numpy.float64 if model_input.type == 'tensor(double)' else numpy.float32
+			if len(model_input.shape) == 4:
+				calibration_input[model_input.name] = prepare_calibration_frame(calibration_frame, model_input.shape, model_value).astype(input_type)
+			else:
+				input_shape = [ dimension if isinstance(dimension, int) else 1 for dimension in model_input.shape ]
+				calibration_input[model_input.name] = numpy.ones(input_shape, input_type)
+		calibration_inputs.append(calibration_input)
+	return calibration_inputs
+
+
+def prepare_calibration_frame(calibration_frame : Frame, input_shape : List[Any], model_value : ModelValue) -> Frame:
+	model_quantization = model_value.get('quantization')
+	is_channel_last = input_shape[-1] == 3
+	input_height, input_width = input_shape[1:3] if is_channel_last else input_shape[2:4]
+
+	if not isinstance(input_width, int) or not isinstance(input_height, int):
+		input_width, input_height = model_quantization.get('size')
+	calibration_frame = cv2.resize(calibration_frame, (input_width, input_height)).astype(numpy.float32)
+	if model_quantization.get('channel_order', 'rgb') == 'rgb':
+		calibration_frame = calibration_frame[:, :, ::-1]
+	calibration_frame = (calibration_frame - model_quantization.get('mean')) / model_quantization.get('standard_deviation')
+	if not is_channel_last:
+		calibration_frame = calibration_frame.transpose(2, 0, 1)
+	return numpy.expand_dims(calibration_frame, axis = 0)
+
+
+def create_calibration_crops(calibration_frames : List[Frame], model_value : ModelValue) -> List[Frame]:
+	from facefusion.face_analyser import get_many_faces
+
+	model_quantization = model_value.get('quantization')
+	calibration_crops = []
+
+	for calibration_frame in calibration_frames:
+		for face in get_many_faces(calibration_frame):
+			if len(calibration_crops) < CALIBRATION_FRAME_LIMIT:
+				crop_frame, _ = warp_face_by_kps(calibration_frame, face.kps, model_quantization.get('template'), model_quantization.get('size'))
+				calibration_crops.append(crop_frame)
+	return calibration_crops
+
+
+def read_calibration_frames() -> List[Frame]:
+	calibration_directory_path = resolve_relative_path('../.assets/examples')
+	calibration_frames = []
+
+	if is_directory(calibration_directory_path):
+		for file_name in sorted(os.listdir(calibration_directory_path)):
+			calibration_path = os.path.join(calibration_directory_path, file_name)
+			if is_image(calibration_path) and len(calibration_frames) < CALIBRATION_FRAME_LIMIT:
+				calibration_frames.append(read_image(calibration_path))
+	return calibration_frames
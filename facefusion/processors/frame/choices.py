@@ -9,5 +9,9 @@ frame_enhancer_models : List[FrameEnhancerModel] = [ 'real_esrgan_x2plus', 'real
 face_debugger_items : List[FaceDebuggerItem] = [ 'bbox', 'kps', 'face-mask', 'score' ]
 
 face_enhancer_blend_range : List[int] = create_int_range(0, 100, 1)
+face_size_range : List[int] = create_int_range(0, 1024, 1)
 frame_enhancer_blend_range : List[int] = create_int_range(0, 100, 1)
+frame_enhancer_tile_size_range : List[int] = create_int_range(64, 1024, 64)
+frame_enhancer_tile_overlap_range : List[int] = create_int_range(0, 64, 1)
+frame_enhancer_reuse_threshold_range : List[int] = create_int_range(0, 255, 1)
 
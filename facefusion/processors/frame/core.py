@@ -8,9 +8,9 @@ from tqdm import tqdm
 import inspect
 
 import facefusion.globals
-from facefusion.typing import Process_Frames
+from facefusion.typing import Process_Frames, Update_Process
 from facefusion.execution_helper import encode_execution_providers
-from facefusion import logger, wording
+from facefusion import face_analyser, scene_detector, logger, wording
 
 FRAME_PROCESSORS_MODULES : List[ModuleType] = []
 FRAME_PROCESSORS_METHODS =\
@@ -90,12 +90,18 @@ def multi_process_frames(source_paths : List[str], temp_frame_paths : List[str],
 			queue_per_future = max(len(temp_frame_paths) // facefusion.globals.execution_thread_count * facefusion.globals.execution_queue_count, 1)
 			while not queue_frame_paths.empty():
 				submit_frame_paths = pick_queue(queue_frame_paths, queue_per_future)
-				future = executor.submit(process_frames, source_paths, submit_frame_paths, progress.update)
-				futures.append(future)
+				for scene_frame_paths in scene_detector.split_frame_paths(submit_frame_paths):
+					future = executor.submit(process_scene_frames, process_frames, source_paths, scene_frame_paths, progress.update)
+					futures.append(future)
 			for future_done in as_completed(futures):
 				future_done.result()
 
 
+def process_scene_frames(process_frames : Process_Frames, source_paths : List[str], temp_frame_paths : List[str], update_progress : Update_Process) -> None:
+	face_analyser.clear_adaptive_detector()
+	process_frames(source_paths, temp_frame_paths, update_progress)
+
+
 def create_queue(temp_frame_paths : List[str]) -> Queue[str]:
 	queue : Queue[str] = Queue()
 	for frame_path in temp_frame_paths:
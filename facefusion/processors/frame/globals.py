@@ -5,6 +5,12 @@ from facefusion.processors.frame.typings import FaceSwapperModel, FaceEnhancerMo
 face_swapper_model : Optional[FaceSwapperModel] = None
 face_enhancer_model : Optional[FaceEnhancerModel] = None
 face_enhancer_blend : Optional[int] = None
+face_enhancer_min_face_size : Optional[int] = None
+face_enhancer_medium_face_size : Optional[int] = None
+face_swapper_min_face_size : Optional[int] = None
 frame_enhancer_model : Optional[FrameEnhancerModel] = None
 frame_enhancer_blend : Optional[int] = None
+frame_enhancer_tile_size : Optional[int] = None
+frame_enhancer_tile_overlap : Optional[int] = None
+frame_enhancer_reuse_threshold : Optional[int] = None
 face_debugger_items : Optional[List[FaceDebuggerItem]] = None
@@ -6,13 +6,12 @@ import numpy
 import facefusion.globals
 import facefusion.processors.frame.core as frame_processors
 from facefusion import config, wording
-from facefusion.face_analyser import get_one_face, get_average_face, get_many_faces, find_similar_faces, clear_face_analyser
+from facefusion.face_analyser import get_one_face, get_average_face, get_many_faces, find_similar_faces
 from facefusion.face_store import get_reference_faces
-from facefusion.content_analyser import clear_content_analyser
 from facefusion.typing import Face, FaceSet, Frame, Update_Process, ProcessMode
-from facefusion.vision import read_image, read_static_image, read_static_images, write_image
+from facefusion.vision import read_static_image, read_static_images, write_image, read_temp_frame, write_temp_frame
 from facefusion.face_helper import warp_face_by_kps
-from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_region_mask, clear_face_occluder, clear_face_parser
+from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_region_mask
 from facefusion.processors.frame import globals as frame_processors_globals, choices as frame_processors_choices
 
 NAME = __name__.upper()
@@ -56,14 +55,7 @@ def pre_process(mode : ProcessMode) -> bool:
 
 
 def post_process() -> None:
-	if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-		clear_frame_processor()
-		read_static_image.cache_clear()
-	if facefusion.globals.video_memory_strategy == 'strict':
-		clear_face_analyser()
-		clear_content_analyser()
-		clear_face_occluder()
-		clear_face_parser()
+	read_static_image.cache_clear()
 
 
 def debug_face(source_face : Face, target_face : Face, reference_faces : FaceSet, temp_frame : Frame) -> Frame:
@@ -130,9 +122,10 @@ def process_frames(source_paths : List[str], temp_frame_paths : List[str], updat
 	source_face = get_average_face(source_frames)
 	reference_faces = get_reference_faces() if 'reference' in facefusion.globals.face_selector_mode else None
 	for temp_frame_path in temp_frame_paths:
-		temp_frame = read_image(temp_frame_path)
+		temp_frame = read_temp_frame(temp_frame_path)
 		result_frame = process_frame(source_face, reference_faces, temp_frame)
-		write_image(temp_frame_path, result_frame)
+		if result_frame is not temp_frame:
+			write_temp_frame(temp_frame_path, result_frame)
 		update_progress()
 
 
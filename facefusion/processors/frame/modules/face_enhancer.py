@@ -1,30 +1,25 @@
 from typing import Any, List, Literal, Optional
 from argparse import ArgumentParser
-import cv2
 import threading
 import numpy
-import onnxruntime
 
 import facefusion.globals
 import facefusion.processors.frame.core as frame_processors
 from facefusion import config, logger, wording
-from facefusion.face_analyser import get_many_faces, clear_face_analyser, find_similar_faces, get_one_face
-from facefusion.execution_helper import apply_execution_provider_options
-from facefusion.face_helper import warp_face_by_kps, paste_back
-from facefusion.content_analyser import clear_content_analyser
+from facefusion.face_analyser import get_many_faces, find_similar_faces, get_one_face
+from facefusion.inference_manager import get_inference_session, clear_inference_session, resolve_model_path, conditional_quantize_models
+from facefusion.face_helper import warp_face_by_kps, paste_back, calc_face_size
 from facefusion.face_store import get_reference_faces
-from facefusion.typing import Face, FaceSet, Frame, Update_Process, ProcessMode, ModelSet, OptionsWithModel
+from facefusion.typing import Face, FaceSet, Frame, Update_Process, ProcessMode, ModelSet, ModelValue, OptionsWithModel
 from facefusion.common_helper import create_metavar
 from facefusion.filesystem import is_file, is_image, is_video, resolve_relative_path
 from facefusion.download import conditional_download, is_download_done
-from facefusion.vision import read_image, read_static_image, write_image
+from facefusion.vision import read_static_image, write_image, read_temp_frame, write_temp_frame
 from facefusion.processors.frame import globals as frame_processors_globals
 from facefusion.processors.frame import choices as frame_processors_choices
-from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, clear_face_occluder
+from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, set_occlusion_mask_key, prepare_frame_occlusion_masks
 
-FRAME_PROCESSOR = None
 THREAD_SEMAPHORE : threading.Semaphore = threading.Semaphore()
-THREAD_LOCK : threading.Lock = threading.Lock()
 NAME = __name__.upper()
 MODELS : ModelSet =\
 {
@@ -33,28 +28,60 @@ MODELS : ModelSet =\
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/codeformer.onnx',
 		'path': resolve_relative_path('../.assets/models/codeformer.onnx'),
 		'template': 'ffhq_512',
-		'size': (512, 512)
+		'size': (512, 512),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/codeformer_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (512, 512),
+			'template': 'ffhq_512'
+		}
 	},
 	'gfpgan_1.2':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/gfpgan_1.2.onnx',
 		'path': resolve_relative_path('../.assets/models/gfpgan_1.2.onnx'),
 		'template': 'ffhq_512',
-		'size': (512, 512)
+		'size': (512, 512),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/gfpgan_1.2_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (512, 512),
+			'template': 'ffhq_512'
+		}
 	},
 	'gfpgan_1.3':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/gfpgan_1.3.onnx',
 		'path': resolve_relative_path('../.assets/models/gfpgan_1.3.onnx'),
 		'template': 'ffhq_512',
-		'size': (512, 512)
+		'size': (512, 512),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/gfpgan_1.3_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (512, 512),
+			'template': 'ffhq_512'
+		}
 	},
 	'gfpgan_1.4':
 	{
 		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/gfpgan_1.4.onnx',
 		'path': resolve_relative_path('../.assets/models/gfpgan_1.4.onnx'),
 		'template': 'ffhq_512',
-		'size': (512, 512)
+		'size': (512, 512),
+		'quantization':
+		{
+			'path': resolve_relative_path('../.assets/models/gfpgan_1.4_int8.onnx'),
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (512, 512),
+			'template': 'ffhq_512'
+		}
 	},
 	'gpen_bfr_256':
 	{
@@ -81,20 +108,12 @@ MODELS : ModelSet =\
 OPTIONS : Optional[OptionsWithModel] = None
 
 
-def get_frame_processor() -> Any:
-	global FRAME_PROCESSOR
-
-	with THREAD_LOCK:
-		if FRAME_PROCESSOR is None:
-			model_path = get_options('model').get('path')
-			FRAME_PROCESSOR = onnxruntime.InferenceSession(model_path, providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-	return FRAME_PROCESSOR
+def get_frame_processor(model_value : Optional[ModelValue] = None) -> Any:
+	return get_inference_session(resolve_model_path(model_value or get_options('model')))
 
 
 def clear_frame_processor() -> None:
-	global FRAME_PROCESSOR
-
-	FRAME_PROCESSOR = None
+	clear_inference_session(resolve_model_path(get_options('model')))
 
 
 def get_options(key : Literal['model']) -> Any:
@@ -117,31 +136,53 @@ def set_options(key : Literal['model'], value : Any) -> None:
 def register_args(program : ArgumentParser) -> None:
 	program.add_argument('--face-enhancer-model', help = wording.get('frame_processor_model_help'), default = config.get_str_value('frame_processors.face_enhancer_model', 'gfpgan_1.4'), choices = frame_processors_choices.face_enhancer_models)
 	program.add_argument('--face-enhancer-blend', help = wording.get('frame_processor_blend_help'), type = int, default = config.get_int_value('frame_processors.face_enhancer_blend', '80'), choices = frame_processors_choices.face_enhancer_blend_range, metavar = create_metavar(frame_processors_choices.face_enhancer_blend_range))
+	program.add_argument('--face-enhancer-min-face-size', help = wording.get('frame_processor_min_face_size_help'), type = int, default = config.get_int_value('frame_processors.face_enhancer_min_face_size', '0'), choices = frame_processors_choices.face_size_range, metavar = create_metavar(frame_processors_choices.face_size_range))
+	program.add_argument('--face-enhancer-medium-face-size', help = wording.get('face_enhancer_medium_face_size_help'), type = int, default = config.get_int_value('frame_processors.face_enhancer_medium_face_size', '0'), choices = frame_processors_choices.face_size_range, metavar = create_metavar(frame_processors_choices.face_size_range))
 
 
 def apply_args(program : ArgumentParser) -> None:
 	args = program.parse_args()
 	frame_processors_globals.face_enhancer_model = args.face_enhancer_model
 	frame_processors_globals.face_enhancer_blend = args.face_enhancer_blend
+	frame_processors_globals.face_enhancer_min_face_size = args.face_enhancer_min_face_size
+	frame_processors_globals.face_enhancer_medium_face_size = args.face_enhancer_medium_face_size
 
 
 def pre_check() -> bool:
 	if not facefusion.globals.skip_download:
 		download_directory_path = resolve_relative_path('../.assets/models')
-		model_url = get_options('model').get('url')
-		conditional_download(download_directory_path, [ model_url ])
+		model_urls = [ model_value.get('url') for model_value in get_model_values() ]
+		conditional_download(download_directory_path, model_urls)
+	conditional_quantize_models(get_model_values())
 	return True
 
 
+def get_model_values() -> List[ModelValue]:
+	model_values = [ get_options('model') ]
+	if frame_processors_globals.face_enhancer_medium_face_size and get_options('model').get('size')[0] > MODELS.get('gpen_bfr_256').get('size')[0]:
+		model_values.append(MODELS.get('gpen_bfr_256'))
+	return model_values
+
+
+def resolve_face_model(target_face : Face) -> Optional[ModelValue]:
+	face_size = calc_face_size(target_face.bbox)
+	if face_size < (frame_processors_globals.face_enhancer_min_face_size or 0):
+		return None
+	if face_size < (frame_processors_globals.face_enhancer_medium_face_size or 0) and MODELS.get('gpen_bfr_256') in get_model_values():
+		return MODELS.get('gpen_bfr_256')
+	return get_options('model')
+
+
 def post_check() -> bool:
-	model_url = get_options('model').get('url')
-	model_path = get_options('model').get('path')
-	if not facefusion.globals.skip_download and not is_download_done(model_url, model_path):
-		logger.error(wording.get('model_download_not_done') + wording.get('exclamation_mark'), NAME)
-		return False
-	elif not is_file(model_path):
-		logger.error(wording.get('model_file_not_present') + wording.get('exclamation_mark'), NAME)
-		return False
+	for model_value in get_model_values():
+		model_url = model_value.get('url')
+		model_path = model_value.get('path')
+		if not facefusion.globals.skip_download and not is_download_done(model_url, model_path):
+			logger.error(wording.get('model_download_not_done') + wording.get('exclamation_mark'), NAME)
+			return False
+		elif not is_file(model_path):
+			logger.error(wording.get('model_file_not_present') + wording.get('exclamation_mark'), NAME)
+			return False
 	return True
 
 
@@ -156,36 +197,41 @@ def pre_process(mode : ProcessMode) -> bool:
 
 
 def post_process() -> None:
-	if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-		clear_frame_processor()
-		read_static_image.cache_clear()
-	if facefusion.globals.video_memory_strategy == 'strict':
-		clear_face_analyser()
-		clear_content_analyser()
-		clear_face_occluder()
+	read_static_image.cache_clear()
 
 
 def enhance_face(target_face: Face, temp_frame : Frame) -> Frame:
-	model_template = get_options('model').get('template')
-	model_size = get_options('model').get('size')
+	model_value = resolve_face_model(target_face)
+	if model_value is None:
+		return temp_frame
+	model_template = model_value.get('template')
+	model_size = model_value.get('size')
 	crop_frame, affine_matrix = warp_face_by_kps(temp_frame, target_face.kps, model_template, model_size)
 	crop_mask_list =\
 	[
 		create_static_box_mask(crop_frame.shape[:2][::-1], facefusion.globals.face_mask_blur, (0, 0, 0, 0))
 	]
 	if 'occlusion' in facefusion.globals.face_mask_types:
-		crop_mask_list.append(create_occlusion_mask(crop_frame))
+		crop_mask_list.append(create_occlusion_mask(crop_frame, target_face.kps, affine_matrix))
 	crop_frame = prepare_crop_frame(crop_frame)
-	crop_frame = apply_enhance(crop_frame)
+	crop_frame = apply_enhance(crop_frame, model_value)
 	crop_frame = normalize_crop_frame(crop_frame)
 	crop_mask = numpy.minimum.reduce(crop_mask_list).clip(0, 1)
-	paste_frame = paste_back(temp_frame, crop_frame, crop_mask, affine_matrix)
-	temp_frame = blend_frame(temp_frame, paste_frame)
+	temp_frame = paste_back(temp_frame, crop_frame, crop_mask, affine_matrix, frame_processors_globals.face_enhancer_blend / 100)
 	return temp_frame
 
 
-def apply_enhance(crop_frame : Frame) -> Frame:
-	frame_processor = get_frame_processor()
+def enhance_faces(target_faces : List[Face], temp_frame : Frame) -> Frame:
+	target_faces = [ target_face for target_face in target_faces if resolve_face_model(target_face) ]
+	paste_frame = temp_frame.copy() if target_faces else temp_frame
+
+	for target_face in target_faces:
+		enhance_face(target_face, paste_frame)
+	return paste_frame
+
+
+def apply_enhance(crop_frame : Frame, model_value : Optional[ModelValue] = None) -> Frame:
+	frame_processor = get_frame_processor(model_value)
 	frame_processor_inputs = {}
 
 	for frame_processor_input in frame_processor.get_inputs():
@@ -215,41 +261,38 @@ def normalize_crop_frame(crop_frame : Frame) -> Frame:
 	return crop_frame
 
 
-def blend_frame(temp_frame : Frame, paste_frame : Frame) -> Frame:
-	face_enhancer_blend = 1 - (frame_processors_globals.face_enhancer_blend / 100)
-	temp_frame = cv2.addWeighted(temp_frame, face_enhancer_blend, paste_frame, 1 - face_enhancer_blend, 0)
-	return temp_frame
-
-
 def get_reference_frame(source_face : Face, target_face : Face, temp_frame : Frame) -> Frame:
-	return enhance_face(target_face, temp_frame)
+	return enhance_faces([ target_face ], temp_frame)
 
 
 def process_frame(source_face : Face, reference_faces : FaceSet, temp_frame : Frame) -> Frame:
 	if 'reference' in facefusion.globals.face_selector_mode:
 		similar_faces = find_similar_faces(temp_frame, reference_faces, facefusion.globals.reference_face_distance)
 		if similar_faces:
-			for similar_face in similar_faces:
-				temp_frame = enhance_face(similar_face, temp_frame)
+			prepare_frame_occlusion_masks(temp_frame, [ similar_face.kps for similar_face in similar_faces if resolve_face_model(similar_face) is get_options('model') ], get_options('model').get('template'), get_options('model').get('size'))
+			temp_frame = enhance_faces(similar_faces, temp_frame)
 	if 'one' in facefusion.globals.face_selector_mode:
 		target_face = get_one_face(temp_frame)
 		if target_face:
-			temp_frame = enhance_face(target_face, temp_frame)
+			temp_frame = enhance_faces([ target_face ], temp_frame)
 	if 'many' in facefusion.globals.face_selector_mode:
 		many_faces = get_many_faces(temp_frame)
 		if many_faces:
-			for target_face in many_faces:
-				temp_frame = enhance_face(target_face, temp_frame)
+			prepare_frame_occlusion_masks(temp_frame, [ target_face.kps for target_face in many_faces if resolve_face_model(target_face) is get_options('model') ], get_options('model').get('template'), get_options('model').get('size'))
+			temp_frame = enhance_faces(many_faces, temp_frame)
 	return temp_frame
 
 
 def process_frames(source_path : List[str], temp_frame_paths : List[str], update_progress : Update_Process) -> None:
 	reference_faces = get_reference_faces() if 'reference' in facefusion.globals.face_selector_mode else None
 	for temp_frame_path in temp_frame_paths:
-		temp_frame = read_image(temp_frame_path)
+		set_occlusion_mask_key(temp_frame_path)
+		temp_frame = read_temp_frame(temp_frame_path)
 		result_frame = process_frame(None, reference_faces, temp_frame)
-		write_image(temp_frame_path, result_frame)
+		if result_frame is not temp_frame:
+			write_temp_frame(temp_frame_path, result_frame)
 		update_progress()
+	set_occlusion_mask_key(None)
 
 
 def process_image(source_path : str, target_path : str, output_path : str) -> None:
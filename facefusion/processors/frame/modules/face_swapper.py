@@ -1,30 +1,29 @@
-from typing import Any, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 from argparse import ArgumentParser
+import hashlib
 import platform
 import threading
 import numpy
-import onnx
-import onnxruntime
-from onnx import numpy_helper
 
 import facefusion.globals
 import facefusion.processors.frame.core as frame_processors
 from facefusion import config, logger, wording
-from facefusion.execution_helper import apply_execution_provider_options
-from facefusion.face_analyser import get_one_face, get_average_face, get_many_faces, find_similar_faces, clear_face_analyser
-from facefusion.face_helper import warp_face_by_kps, paste_back
+from facefusion.inference_manager import get_inference_session, clear_inference_session
+from facefusion.model_helper import read_model_initializer
+from facefusion.face_analyser import get_one_face, get_average_face, get_many_faces, find_similar_faces
+from facefusion.face_helper import warp_face_by_kps, paste_back, calc_face_size
 from facefusion.face_store import get_reference_faces
-from facefusion.content_analyser import clear_content_analyser
-from facefusion.typing import Face, FaceSet, Frame, Update_Process, ProcessMode, ModelSet, OptionsWithModel, Embedding
+from facefusion.common_helper import create_metavar
+from facefusion.typing import Face, FaceSet, Frame, Update_Process, ProcessMode, ModelSet, OptionsWithModel, Embedding, Mask
 from facefusion.filesystem import is_file, is_image, are_images, is_video, resolve_relative_path
 from facefusion.download import conditional_download, is_download_done
-from facefusion.vision import read_image, read_static_image, read_static_images, write_image
+from facefusion.vision import read_static_image, read_static_images, write_image, read_temp_frame, write_temp_frame
 from facefusion.processors.frame import globals as frame_processors_globals
 from facefusion.processors.frame import choices as frame_processors_choices
-from facefusion.face_masker import create_static_box_mask, create_occlusion_mask, create_region_mask, clear_face_occluder, clear_face_parser
+from facefusion.face_masker import create_static_box_mask, create_occlusion_masks, set_occlusion_mask_key, create_region_masks
 
-FRAME_PROCESSOR = None
 MODEL_MATRIX = None
+SOURCE_TENSORS : Dict[str, Any] = {}
 THREAD_LOCK : threading.Lock = threading.Lock()
 NAME = __name__.upper()
 MODELS : ModelSet =\
@@ -84,19 +83,12 @@ OPTIONS : Optional[OptionsWithModel] = None
 
 
 def get_frame_processor() -> Any:
-	global FRAME_PROCESSOR
-
-	with THREAD_LOCK:
-		if FRAME_PROCESSOR is None:
-			model_path = get_options('model').get('path')
-			FRAME_PROCESSOR = onnxruntime.InferenceSession(model_path, providers = apply_execution_provider_options(facefusion.globals.execution_providers))
-	return FRAME_PROCESSOR
+	return get_inference_session(get_options('model').get('path'))
 
 
 def clear_frame_processor() -> None:
-	global FRAME_PROCESSOR
-
-	FRAME_PROCESSOR = None
+	clear_inference_session(get_options('model').get('path'))
+	clear_source_tensors()
 
 
 def get_model_matrix() -> Any:
@@ -105,8 +97,7 @@ def get_model_matrix() -> Any:
 	with THREAD_LOCK:
 		if MODEL_MATRIX is None:
 			model_path = get_options('model').get('path')
-			model = onnx.load(model_path)
-			MODEL_MATRIX = numpy_helper.to_array(model.graph.initializer[-1])
+			MODEL_MATRIX = read_model_initializer(model_path, -1)
 	return MODEL_MATRIX
 
 
@@ -116,6 +107,24 @@ def clear_model_matrix() -> None:
 	MODEL_MATRIX = None
 
 
+def get_source_tensor(source_face : Face) -> Any:
+	source_tensor_hash = hashlib.sha1(source_face.embedding.tobytes()).hexdigest()
+	source_tensor = SOURCE_TENSORS.get(source_tensor_hash)
+
+	if source_tensor is None:
+		model_type = get_options('model').get('type')
+		if model_type == 'blendswap':
+			source_tensor = prepare_source_frame(source_face)
+		else:
+			source_tensor = prepare_source_embedding(source_face)
+		SOURCE_TENSORS[source_tensor_hash] = source_tensor
+	return source_tensor
+
+
+def clear_source_tensors() -> None:
+	SOURCE_TENSORS.clear()
+
+
 def get_options(key : Literal['model']) -> Any:
 	global OPTIONS
 
@@ -139,15 +148,23 @@ def register_args(program : ArgumentParser) -> None:
 	else:
 		face_swapper_model_fallback = 'inswapper_128_fp16'
 	program.add_argument('--face-swapper-model', help = wording.get('frame_processor_model_help'), default = config.get_str_value('frame_processors.face_swapper_model', face_swapper_model_fallback), choices = frame_processors_choices.face_swapper_models)
+	program.add_argument('--face-swapper-min-face-size', help = wording.get('frame_processor_min_face_size_help'), type = int, default = config.get_int_value('frame_processors.face_swapper_min_face_size', '0'), choices = frame_processors_choices.face_size_range, metavar = create_metavar(frame_processors_choices.face_size_range))
 
 
 def apply_args(program : ArgumentParser) -> None:
 	args = program.parse_args()
 	frame_processors_globals.face_swapper_model = args.face_swapper_model
+	frame_processors_globals.face_swapper_min_face_size = args.face_swapper_min_face_size
 	if args.face_swapper_model == 'blendswap_256':
 		facefusion.globals.face_recognizer_model = 'arcface_blendswap'
 	if args.face_swapper_model == 'inswapper_128' or args.face_swapper_model == 'inswapper_128_fp16':
 		facefusion.globals.face_recognizer_model = 'arcface_inswapper'
+		if facefusion.globals.execution_precision == 'fp16':
+			frame_processors_globals.face_swapper_model = 'inswapper_128_fp16'
+		if facefusion.globals.execution_precision in [ 'fp32', 'int8' ]:
+			frame_processors_globals.face_swapper_model = 'inswapper_128'
+		if frame_processors_globals.face_swapper_model != args.face_swapper_model:
+			logger.info(wording.get('model_substituted').format(model_name = args.face_swapper_model, substitute_model_name = frame_processors_globals.face_swapper_model, execution_precision = facefusion.globals.execution_precision), NAME)
 	if args.face_swapper_model == 'simswap_256' or args.face_swapper_model == 'simswap_512_unofficial':
 		facefusion.globals.face_recognizer_model = 'arcface_simswap'
 
@@ -190,48 +207,54 @@ def pre_process(mode : ProcessMode) -> bool:
 
 
 def post_process() -> None:
-	if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-		clear_frame_processor()
-		clear_model_matrix()
-		read_static_image.cache_clear()
-	if facefusion.globals.video_memory_strategy == 'strict':
-		clear_face_analyser()
-		clear_content_analyser()
-		clear_face_occluder()
-		clear_face_parser()
+	clear_source_tensors()
+	read_static_image.cache_clear()
 
 
 def swap_face(source_face : Face, target_face : Face, temp_frame : Frame) -> Frame:
+	return swap_faces(source_face, [ target_face ], temp_frame)
+
+
+def swap_faces(source_face : Face, target_faces : List[Face], temp_frame : Frame) -> Frame:
+	target_faces = [ target_face for target_face in target_faces if is_face_swappable(target_face) ]
 	model_template = get_options('model').get('template')
 	model_size = get_options('model').get('size')
-	crop_frame, affine_matrix = warp_face_by_kps(temp_frame, target_face.kps, model_template, model_size)
-	crop_mask_list = []
-
+	crop_frames = []
+	affine_matrices = []
+	crop_mask_lists : List[List[Mask]] = []
+
+	if not target_faces:
+		return temp_frame
+	for target_face in target_faces:
+		crop_frame, affine_matrix = warp_face_by_kps(temp_frame, target_face.kps, model_template, model_size)
+		crop_frames.append(crop_frame)
+		affine_matrices.append(affine_matrix)
 	if 'box' in facefusion.globals.face_mask_types:
-		crop_mask_list.append(create_static_box_mask(crop_frame.shape[:2][::-1], facefusion.globals.face_mask_blur, facefusion.globals.face_mask_padding))
+		box_mask = create_static_box_mask(model_size, facefusion.globals.face_mask_blur, facefusion.globals.face_mask_padding)
+		crop_mask_lists.append([ box_mask ] * len(crop_frames))
 	if 'occlusion' in facefusion.globals.face_mask_types:
-		crop_mask_list.append(create_occlusion_mask(crop_frame))
-	crop_frame = prepare_crop_frame(crop_frame)
-	crop_frame = apply_swap(source_face, crop_frame)
-	crop_frame = normalize_crop_frame(crop_frame)
+		crop_mask_lists.append(create_occlusion_masks(crop_frames, [ target_face.kps for target_face in target_faces ], affine_matrices))
+	crop_frames = [ normalize_crop_frame(apply_swap(source_face, prepare_crop_frame(crop_frame))) for crop_frame in crop_frames ]
 	if 'region' in facefusion.globals.face_mask_types:
-		crop_mask_list.append(create_region_mask(crop_frame, facefusion.globals.face_mask_regions))
-	crop_mask = numpy.minimum.reduce(crop_mask_list).clip(0, 1)
-	temp_frame = paste_back(temp_frame, crop_frame, crop_mask, affine_matrix)
-	return temp_frame
+		crop_mask_lists.append(create_region_masks(crop_frames, facefusion.globals.face_mask_regions))
+	paste_frame = temp_frame.copy()
+	for index, (crop_frame, affine_matrix) in enumerate(zip(crop_frames, affine_matrices)):
+		crop_mask = numpy.minimum.reduce([ crop_mask_list[index] for crop_mask_list in crop_mask_lists ]).clip(0, 1)
+		paste_back(paste_frame, crop_frame, crop_mask, affine_matrix)
+	return paste_frame
+
+
+def is_face_swappable(target_face : Face) -> bool:
+	return calc_face_size(target_face.bbox) >= (frame_processors_globals.face_swapper_min_face_size or 0)
 
 
 def apply_swap(source_face : Face, crop_frame : Frame) -> Frame:
 	frame_processor = get_frame_processor()
-	model_type = get_options('model').get('type')
 	frame_processor_inputs = {}
 
 	for frame_processor_input in frame_processor.get_inputs():
 		if frame_processor_input.name == 'source':
-			if model_type == 'blendswap':
-				frame_processor_inputs[frame_processor_input.name] = prepare_source_frame(source_face)
-			else:
-				frame_processor_inputs[frame_processor_input.name] = prepare_source_embedding(source_face)
+			frame_processor_inputs[frame_processor_input.name] = get_source_tensor(source_face)
 		if frame_processor_input.name == 'target':
 			frame_processor_inputs[frame_processor_input.name] = crop_frame
 	crop_frame = frame_processor.run(None, frame_processor_inputs)[0][0]
@@ -283,8 +306,7 @@ def process_frame(source_face : Face, reference_faces : FaceSet, temp_frame : Fr
 	if 'reference' in facefusion.globals.face_selector_mode:
 		similar_faces = find_similar_faces(temp_frame, reference_faces, facefusion.globals.reference_face_distance)
 		if similar_faces:
-			for similar_face in similar_faces:
-				temp_frame = swap_face(source_face, similar_face, temp_frame)
+			temp_frame = swap_faces(source_face, similar_faces, temp_frame)
 	if 'one' in facefusion.globals.face_selector_mode:
 		target_face = get_one_face(temp_frame)
 		if target_face:
@@ -292,8 +314,7 @@ def process_frame(source_face : Face, reference_faces : FaceSet, temp_frame : Fr
 	if 'many' in facefusion.globals.face_selector_mode:
 		many_faces = get_many_faces(temp_frame)
 		if many_faces:
-			for target_face in many_faces:
-				temp_frame = swap_face(source_face, target_face, temp_frame)
+			temp_frame = swap_faces(source_face, many_faces, temp_frame)
 	return temp_frame
 
 
@@ -302,10 +323,13 @@ def process_frames(source_paths : List[str], temp_frame_paths : List[str], updat
 	source_face = get_average_face(source_frames)
 	reference_faces = get_reference_faces() if 'reference' in facefusion.globals.face_selector_mode else None
 	for temp_frame_path in temp_frame_paths:
-		temp_frame = read_image(temp_frame_path)
+		set_occlusion_mask_key(temp_frame_path)
+		temp_frame = read_temp_frame(temp_frame_path)
 		result_frame = process_frame(source_face, reference_faces, temp_frame)
-		write_image(temp_frame_path, result_frame)
+		if result_frame is not temp_frame:
+			write_temp_frame(temp_frame_path, result_frame)
 		update_progress()
+	set_occlusion_mask_key(None)
 
 
 def process_image(source_paths : List[str], target_path : str, output_path : str) -> None:
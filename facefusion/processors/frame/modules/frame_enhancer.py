@@ -1,46 +1,65 @@
-from typing import Any, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 from argparse import ArgumentParser
 import threading
 import cv2
-from basicsr.archs.rrdbnet_arch import RRDBNet
-from realesrgan import RealESRGANer
+import numpy
 
 import facefusion.globals
 import facefusion.processors.frame.core as frame_processors
 from facefusion import config, logger, wording
-from facefusion.face_analyser import clear_face_analyser
-from facefusion.content_analyser import clear_content_analyser
+from facefusion.inference_manager import get_inference_session, clear_inference_session, resolve_model_path, run_batch
 from facefusion.typing import Face, FaceSet, Frame, Update_Process, ProcessMode, ModelSet, OptionsWithModel
 from facefusion.common_helper import create_metavar
 from facefusion.execution_helper import map_torch_backend
-from facefusion.filesystem import is_file, resolve_relative_path
+from facefusion.filesystem import is_file, is_video, resolve_relative_path
 from facefusion.download import conditional_download, is_download_done
-from facefusion.vision import read_image, read_static_image, write_image
+from facefusion.vision import read_static_image, write_image, read_temp_frame, write_temp_frame, create_tile_frames, create_tile_starts, merge_tile_frames
 from facefusion.processors.frame import globals as frame_processors_globals
 from facefusion.processors.frame import choices as frame_processors_choices
 
 FRAME_PROCESSOR = None
 THREAD_SEMAPHORE : threading.Semaphore = threading.Semaphore()
 THREAD_LOCK : threading.Lock = threading.Lock()
+TILE_BATCH_SIZE = 16
+TILE_REUSE_STATS : Dict[str, int] =\
+{
+	'reused': 0,
+	'total': 0
+}
 NAME = __name__.upper()
 MODELS : ModelSet =\
 {
 	'real_esrgan_x2plus':
 	{
-		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrgan_x2plus.pth',
-		'path': resolve_relative_path('../.assets/models/real_esrgan_x2plus.pth'),
+		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrgan_x2plus.onnx',
+		'path': resolve_relative_path('../.assets/models/real_esrgan_x2plus.onnx'),
+		'fallback':
+		{
+			'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrgan_x2plus.pth',
+			'path': resolve_relative_path('../.assets/models/real_esrgan_x2plus.pth')
+		},
 		'scale': 2
 	},
 	'real_esrgan_x4plus':
 	{
-		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrgan_x4plus.pth',
-		'path': resolve_relative_path('../.assets/models/real_esrgan_x4plus.pth'),
+		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrgan_x4plus.onnx',
+		'path': resolve_relative_path('../.assets/models/real_esrgan_x4plus.onnx'),
+		'fallback':
+		{
+			'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrgan_x4plus.pth',
+			'path': resolve_relative_path('../.assets/models/real_esrgan_x4plus.pth')
+		},
 		'scale': 4
 	},
 	'real_esrnet_x4plus':
 	{
-		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrnet_x4plus.pth',
-		'path': resolve_relative_path('../.assets/models/real_esrnet_x4plus.pth'),
+		'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrnet_x4plus.onnx',
+		'path': resolve_relative_path('../.assets/models/real_esrnet_x4plus.onnx'),
+		'fallback':
+		{
+			'url': 'https://github.com/lab861265/fusion2/releases/download/assets/real_esrnet_x4plus.pth',
+			'path': resolve_relative_path('../.assets/models/real_esrnet_x4plus.pth')
+		},
 		'scale': 4
 	}
 }
@@ -48,11 +67,20 @@ OPTIONS : Optional[OptionsWithModel] = None
 
 
 def get_frame_processor() -> Any:
+	if has_onnx_model():
+		return get_inference_session(resolve_model_path(get_options('model')))
+	return get_fallback_frame_processor()
+
+
+def get_fallback_frame_processor() -> Any:
 	global FRAME_PROCESSOR
 
+	from basicsr.archs.rrdbnet_arch import RRDBNet
+	from realesrgan import RealESRGANer
+
 	with THREAD_LOCK:
 		if FRAME_PROCESSOR is None:
-			model_path = get_options('model').get('path')
+			model_path = get_options('model').get('fallback').get('path')
 			model_scale = get_options('model').get('scale')
 			FRAME_PROCESSOR = RealESRGANer(
 				model_path = model_path,
@@ -71,6 +99,11 @@ def clear_frame_processor() -> None:
 	global FRAME_PROCESSOR
 
 	FRAME_PROCESSOR = None
+	clear_inference_session(resolve_model_path(get_options('model')))
+
+
+def has_onnx_model() -> bool:
+	return is_file(get_options('model').get('path'))
 
 
 def get_options(key : Literal['model']) -> Any:
@@ -93,12 +126,18 @@ def set_options(key : Literal['model'], value : Any) -> None:
 def register_args(program : ArgumentParser) -> None:
 	program.add_argument('--frame-enhancer-model', help = wording.get('frame_processor_model_help'), default = config.get_str_value('frame_processors.frame_enhancer_model', 'real_esrgan_x2plus'), choices = frame_processors_choices.frame_enhancer_models)
 	program.add_argument('--frame-enhancer-blend', help = wording.get('frame_processor_blend_help'), type = int, default = config.get_int_value('frame_processors.frame_enhancer_blend', '80'), choices = frame_processors_choices.frame_enhancer_blend_range, metavar = create_metavar(frame_processors_choices.frame_enhancer_blend_range))
+	program.add_argument('--frame-enhancer-tile-size', help = wording.get('frame_enhancer_tile_size_help'), type = int, default = config.get_int_value('frame_processors.frame_enhancer_tile_size', '256'), choices = frame_processors_choices.frame_enhancer_tile_size_range, metavar = create_metavar(frame_processors_choices.frame_enhancer_tile_size_range))
+	program.add_argument('--frame-enhancer-tile-overlap', help = wording.get('frame_enhancer_tile_overlap_help'), type = int, default = config.get_int_value('frame_processors.frame_enhancer_tile_overlap', '16'), choices = frame_processors_choices.frame_enhancer_tile_overlap_range, metavar = create_metavar(frame_processors_choices.frame_enhancer_tile_overlap_range))
+	program.add_argument('--frame-enhancer-reuse-threshold', help = wording.get('frame_enhancer_reuse_threshold_help'), type = int, default = config.get_int_value('frame_processors.frame_enhancer_reuse_threshold', '0'), choices = frame_processors_choices.frame_enhancer_reuse_threshold_range, metavar = create_metavar(frame_processors_choices.frame_enhancer_reuse_threshold_range))
 
 
 def apply_args(program : ArgumentParser) -> None:
 	args = program.parse_args()
 	frame_processors_globals.frame_enhancer_model = args.frame_enhancer_model
 	frame_processors_globals.frame_enhancer_blend = args.frame_enhancer_blend
+	frame_processors_globals.frame_enhancer_tile_size = args.frame_enhancer_tile_size
+	frame_processors_globals.frame_enhancer_tile_overlap = args.frame_enhancer_tile_overlap
+	frame_processors_globals.frame_enhancer_reuse_threshold = args.frame_enhancer_reuse_threshold
 
 
 def pre_check() -> bool:
@@ -106,12 +145,15 @@ def pre_check() -> bool:
 		download_directory_path = resolve_relative_path('../.assets/models')
 		model_url = get_options('model').get('url')
 		conditional_download(download_directory_path, [ model_url ])
+		if not has_onnx_model():
+			conditional_download(download_directory_path, [ get_options('model').get('fallback').get('url') ])
 	return True
 
 
 def post_check() -> bool:
-	model_url = get_options('model').get('url')
-	model_path = get_options('model').get('path')
+	model_value = get_options('model') if has_onnx_model() else get_options('model').get('fallback')
+	model_url = model_value.get('url')
+	model_path = model_value.get('path')
 	if not facefusion.globals.skip_download and not is_download_done(model_url, model_path):
 		logger.error(wording.get('model_download_not_done') + wording.get('exclamation_mark'), NAME)
 		return False
@@ -125,33 +167,123 @@ def pre_process(mode : ProcessMode) -> bool:
 	if mode == 'output' and not facefusion.globals.output_path:
 		logger.error(wording.get('select_file_or_directory_output') + wording.get('exclamation_mark'), NAME)
 		return False
+	if mode == 'output' and is_video(facefusion.globals.target_path) and facefusion.globals.temp_frame_format == 'raw':
+		logger.error(wording.get('temp_frame_format_not_supported').format(temp_frame_format = facefusion.globals.temp_frame_format) + wording.get('exclamation_mark'), NAME)
+		return False
 	return True
 
 
 def post_process() -> None:
-	if facefusion.globals.video_memory_strategy == 'strict' or facefusion.globals.video_memory_strategy == 'moderate':
-		clear_frame_processor()
-		read_static_image.cache_clear()
-	if facefusion.globals.video_memory_strategy == 'strict':
-		clear_face_analyser()
-		clear_content_analyser()
+	read_static_image.cache_clear()
+	with THREAD_LOCK:
+		if TILE_REUSE_STATS.get('total'):
+			tile_reuse_ratio = round(TILE_REUSE_STATS.get('reused') / TILE_REUSE_STATS.get('total') * 100, 2)
+			logger.info(wording.get('reusing_tiles').format(reused = TILE_REUSE_STATS.get('reused'), total = TILE_REUSE_STATS.get('total'), ratio = tile_reuse_ratio), NAME)
+		TILE_REUSE_STATS['reused'] = 0
+		TILE_REUSE_STATS['total'] = 0
 
 
 def enhance_frame(temp_frame : Frame) -> Frame:
+	return enhance_frames([ temp_frame ])[0]
+
+
+def enhance_frames(temp_frames : List[Frame], reference_tiles : Optional[Dict[Tuple[int, int], Tuple[Frame, Any]]] = None) -> List[Frame]:
+	if not has_onnx_model():
+		return [ enhance_frame_fallback(temp_frame) for temp_frame in temp_frames ]
+	model_scale = get_options('model').get('scale')
+	tile_size = frame_processors_globals.frame_enhancer_tile_size
+	tile_overlap = frame_processors_globals.frame_enhancer_tile_overlap
+	tile_frames = []
+	tile_sources_list = []
+	tile_positions_list = []
+	result_frames = []
+
+	for temp_frame in temp_frames:
+		temp_tile_frames, temp_tile_positions = create_tile_frames(temp_frame, tile_size, tile_overlap)
+		tile_sources = []
+		for tile_frame, tile_position in zip(temp_tile_frames, temp_tile_positions):
+			reference_tile = reference_tiles.get(tile_position) if reference_tiles is not None else None
+			if reference_tile and is_tile_static(tile_frame, reference_tile[0]):
+				tile_sources.append(reference_tile[1])
+			else:
+				tile_sources.append(len(tile_frames))
+				if reference_tiles is not None:
+					reference_tiles[tile_position] = (tile_frame.copy(), len(tile_frames))
+				tile_frames.append(tile_frame)
+		tile_sources_list.append(tile_sources)
+		tile_positions_list.append(temp_tile_positions)
+	enhance_tile_frames = apply_enhance(tile_frames)
+	update_tile_reuse_stats(sum(map(len, tile_sources_list)) - len(tile_frames), sum(map(len, tile_sources_list)))
+	if reference_tiles is not None:
+		for tile_position, (tile_frame, tile_source) in reference_tiles.items():
+			if isinstance(tile_source, int):
+				reference_tiles[tile_position] = (tile_frame, enhance_tile_frames[tile_source].copy())
+	for temp_frame, tile_sources, tile_positions in zip(temp_frames, tile_sources_list, tile_positions_list):
+		temp_frame_height, temp_frame_width = temp_frame.shape[:2]
+		temp_tile_frames = [ enhance_tile_frames[tile_source] if isinstance(tile_source, int) else tile_source for tile_source in tile_sources ]
+		tile_positions = [ (top * model_scale, left * model_scale) for top, left in tile_positions ]
+		paste_frame = merge_tile_frames(temp_tile_frames, tile_positions, temp_frame_width * model_scale, temp_frame_height * model_scale, tile_overlap * model_scale)
+		result_frames.append(blend_frame(temp_frame, paste_frame))
+	return result_frames
+
+
+def enhance_frame_fallback(temp_frame : Frame) -> Frame:
 	with THREAD_SEMAPHORE:
 		paste_frame, _ = get_frame_processor().enhance(temp_frame)
-		temp_frame = blend_frame(temp_frame, paste_frame)
-	return temp_frame
+	return blend_frame(temp_frame, paste_frame)
+
+
+def apply_enhance(tile_frames : List[Frame]) -> List[Frame]:
+	frame_processor = get_frame_processor()
+	enhance_tile_frames = []
+
+	for index in range(0, len(tile_frames), TILE_BATCH_SIZE):
+		prepare_frames = prepare_tile_frames(tile_frames[index:index + TILE_BATCH_SIZE])
+		with THREAD_SEMAPHORE:
+			enhance_tile_frames.extend(normalize_tile_frames(run_batch(frame_processor, prepare_frames)))
+	return enhance_tile_frames
+
+
+def is_tile_static(tile_frame : Frame, reference_tile_frame : Frame) -> bool:
+	if tile_frame.shape == reference_tile_frame.shape:
+		return bool(cv2.absdiff(tile_frame, reference_tile_frame).max() <= frame_processors_globals.frame_enhancer_reuse_threshold)
+	return False
+
+
+def update_tile_reuse_stats(reused_total : int, tile_total : int) -> None:
+	with THREAD_LOCK:
+		TILE_REUSE_STATS['reused'] += reused_total
+		TILE_REUSE_STATS['total'] += tile_total
+
+
+def prepare_tile_frames(tile_frames : List[Frame]) -> numpy.ndarray[Any, Any]:
+	prepare_frames = numpy.stack(tile_frames)[:, :, :, ::-1].transpose(0, 3, 1, 2)
+	return prepare_frames.astype(numpy.float32) / 255
+
+
+def normalize_tile_frames(tile_frames : numpy.ndarray[Any, Any]) -> List[Frame]:
+	tile_frames = tile_frames.transpose(0, 2, 3, 1)[:, :, :, ::-1].clip(0, 1) * 255
+	return list(tile_frames)
 
 
 def blend_frame(temp_frame : Frame, paste_frame : Frame) -> Frame:
 	frame_enhancer_blend = 1 - (frame_processors_globals.frame_enhancer_blend / 100)
+	if frame_enhancer_blend == 0:
+		return paste_frame
 	paste_frame_height, paste_frame_width = paste_frame.shape[0:2]
 	temp_frame = cv2.resize(temp_frame, (paste_frame_width, paste_frame_height))
 	temp_frame = cv2.addWeighted(temp_frame, frame_enhancer_blend, paste_frame, 1 - frame_enhancer_blend, 0)
 	return temp_frame
 
 
+def calc_frame_batch_size(temp_frame : Frame) -> int:
+	temp_frame_height, temp_frame_width = temp_frame.shape[:2]
+	tile_size = frame_processors_globals.frame_enhancer_tile_size
+	tile_overlap = frame_processors_globals.frame_enhancer_tile_overlap
+	tile_total = len(create_tile_starts(max(temp_frame_height, tile_size), tile_size, tile_overlap)) * len(create_tile_starts(max(temp_frame_width, tile_size), tile_size, tile_overlap))
+	return max(TILE_BATCH_SIZE // tile_total, 1)
+
+
 def get_reference_frame(source_face : Face, target_face : Face, temp_frame : Frame) -> Frame:
 	pass
 
@@ -161,11 +293,15 @@ def process_frame(source_face : Face, reference_faces : FaceSet, temp_frame : Fr
 
 
 def process_frames(source_paths : List[str], temp_frame_paths : List[str], update_progress : Update_Process) -> None:
-	for temp_frame_path in temp_frame_paths:
-		temp_frame = read_image(temp_frame_path)
-		result_frame = process_frame(None, None, temp_frame)
-		write_image(temp_frame_path, result_frame)
-		update_progress()
+	frame_batch_size = calc_frame_batch_size(read_temp_frame(temp_frame_paths[0])) if temp_frame_paths else 1
+	reference_tiles : Dict[Tuple[int, int], Tuple[Frame, Any]] = {}
+
+	for index in range(0, len(temp_frame_paths), frame_batch_size):
+		batch_frame_paths = temp_frame_paths[index:index + frame_batch_size]
+		result_frames = enhance_frames([ read_temp_frame(temp_frame_path) for temp_frame_path in batch_frame_paths ], reference_tiles)
+		for temp_frame_path, result_frame in zip(batch_frame_paths, result_frames):
+			write_temp_frame(temp_frame_path, result_frame)
+			update_progress()
 
 
 def process_image(source_paths : List[str], target_path : str, output_path : str) -> None:
@@ -0,0 +1,75 @@
+from typing import Any, List
+import bisect
+import cv2
+import numpy
+
+from facefusion.filesystem import get_temp_frame_index
+from facefusion.typing import Frame
+from facefusion.vision import read_temp_frame_thumbnail
+
+SCENE_CUT_HISTOGRAM_THRESHOLD = 0.3
+SCENE_CUT_LUMA_THRESHOLD = 24
+SCENE_LENGTH_MIN = 8
+SCENE_CUTS : List[int] = []
+
+
+def get_scene_cuts() -> List[int]:
+	return SCENE_CUTS
+
+
+def set_scene_cuts(scene_cuts : List[int]) -> None:
+	global SCENE_CUTS
+
+	SCENE_CUTS = sorted(scene_cuts)
+
+
+def clear_scene_cuts() -> None:
+	global SCENE_CUTS
+
+	SCENE_CUTS = []
+
+
+def find_scene_index(frame_index : int) -> int:
+	return bisect.bisect_right(SCENE_CUTS, frame_index)
+
+
+def split_frame_paths(temp_frame_paths : List[str]) -> List[List[str]]:
+	scene_frame_paths : List[List[str]] = []
+	scene_index = None
+
+	for temp_frame_path in temp_frame_paths:
+		temp_scene_index = find_scene_index(get_temp_frame_index(temp_frame_path))
+		if not scene_frame_paths or temp_scene_index != scene_index:
+			scene_frame_paths.append([])
+			scene_index = temp_scene_index
+		scene_frame_paths[-1].append(temp_frame_path)
+	return scene_frame_paths
+
+
+def detect_scene_cuts(temp_frame_paths : List[str]) -> List[int]:
+	scene_cuts = []
+	previous_thumbnail = None
+	previous_histogram = None
+
+	for frame_index, temp_frame_path in enumerate(temp_frame_paths):
+		temp_thumbnail = read_temp_frame_thumbnail(temp_frame_path)
+		if temp_thumbnail is None:
+			continue
+		temp_histogram = create_frame_histogram(temp_thumbnail)
+		if previous_thumbnail is not None and is_scene_change(previous_thumbnail, previous_histogram, temp_thumbnail, temp_histogram):
+			if frame_index - (scene_cuts[-1] if scene_cuts else 0) >= SCENE_LENGTH_MIN:
+				scene_cuts.append(frame_index)
+		previous_thumbnail = temp_thumbnail
+		previous_histogram = temp_histogram
+	return scene_cuts
+
+
+def create_frame_histogram(thumbnail : Frame) -> numpy.ndarray[Any, Any]:
+	histogram = cv2.calcHist([ thumbnail ], [ 0 ], None, [ 32 ], [ 0, 256 ])
+	return cv2.normalize(histogram, histogram, 1, 0, cv2.NORM_L1)
+
+
+def is_scene_change(previous_thumbnail : Frame, previous_histogram : numpy.ndarray[Any, Any], temp_thumbnail : Frame, temp_histogram : numpy.ndarray[Any, Any]) -> bool:
+	histogram_distance = cv2.compareHist(previous_histogram, temp_histogram, cv2.HISTCMP_BHATTACHARYYA)
+	luma_distance = numpy.mean(cv2.absdiff(previous_thumbnail, temp_thumbnail))
+	return bool(histogram_distance > SCENE_CUT_HISTOGRAM_THRESHOLD and luma_distance > SCENE_CUT_LUMA_THRESHOLD)
@@ -16,11 +16,22 @@ Face = namedtuple('Face',
 	'gender',
 	'age'
 ])
+FaceBatch = namedtuple('FaceBatch',
+[
+	'bboxes',
+	'kps',
+	'scores',
+	'embeddings',
+	'normed_embeddings',
+	'genders',
+	'ages'
+])
 FaceSet = Dict[str, List[Face]]
 FaceStore = TypedDict('FaceStore',
 {
-	'static_faces' : FaceSet,
-	'reference_faces': FaceSet
+	'static_faces' : Dict[str, FaceBatch],
+	'reference_faces': FaceSet,
+	'reference_embeddings' : Dict[str, numpy.ndarray[Any, Any]]
 })
 Frame = numpy.ndarray[Any, Any]
 Mask = numpy.ndarray[Any, Any]
@@ -29,6 +40,7 @@ Matrix = numpy.ndarray[Any, Any]
 Fps = float
 Padding = Tuple[int, int, int, int]
 Resolution = Tuple[int, int]
+TempFrameGroups = Dict[str, str]
 
 Update_Process = Callable[[], None]
 Process_Frames = Callable[[List[str], List[str], Update_Process], None]
@@ -37,7 +49,10 @@ Template = Literal['arcface_112_v1', 'arcface_112_v2', 'arcface_128_v2', 'ffhq_5
 ProcessMode = Literal['output', 'preview', 'stream']
 
 LogLevel = Literal['error', 'warn', 'info', 'debug']
-VideoMemoryStrategy = Literal['strict', 'moderate', 'tolerant']
+ExecutionGraphOptimization = Literal['disabled', 'basic', 'extended', 'all']
+ExecutionMode = Literal['sequential', 'parallel']
+ExecutionMemoryOption = Literal['cpu-memory-arena', 'memory-pattern']
+ExecutionPrecision = Literal['auto', 'fp32', 'fp16', 'int8']
 FaceSelectorMode = Literal['reference', 'one', 'many']
 FaceAnalyserOrder = Literal['left-right', 'right-left', 'top-bottom', 'bottom-top', 'small-large', 'large-small', 'best-worst', 'worst-best']
 FaceAnalyserAge = Literal['child', 'teen', 'adult', 'senior']
@@ -46,7 +61,7 @@ FaceDetectorModel = Literal['retinaface', 'yunet']
 FaceRecognizerModel = Literal['arcface_blendswap', 'arcface_inswapper', 'arcface_simswap']
 FaceMaskType = Literal['box', 'occlusion', 'region']
 FaceMaskRegion = Literal['skin', 'left-eyebrow', 'right-eyebrow', 'left-eye', 'right-eye', 'eye-glasses', 'nose', 'mouth', 'upper-lip', 'lower-lip']
-TempFrameFormat = Literal['jpg', 'png', 'bmp']
+TempFrameFormat = Literal['jpg', 'png', 'bmp', 'raw']
 OutputVideoEncoder = Literal['libx264', 'libx265', 'libvpx-vp9', 'h264_nvenc', 'hevc_nvenc']
 OutputVideoPreset = Literal['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow']
 
@@ -5,6 +5,7 @@ import onnxruntime
 import facefusion.globals
 from facefusion import wording
 from facefusion.face_analyser import clear_face_analyser
+from facefusion.inference_manager import clear_inference_sessions
 from facefusion.processors.frame.core import clear_frame_processors_modules
 from facefusion.execution_helper import encode_execution_providers, decode_execution_providers
 
@@ -28,6 +29,7 @@ def listen() -> None:
 def update_execution_providers(execution_providers : List[str]) -> gradio.CheckboxGroup:
 	clear_face_analyser()
 	clear_frame_processors_modules()
+	clear_inference_sessions()
 	if not execution_providers:
 		execution_providers = encode_execution_providers(onnxruntime.get_available_providers())
 	facefusion.globals.execution_providers = decode_execution_providers(execution_providers)
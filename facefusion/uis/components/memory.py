@@ -3,21 +3,23 @@ import gradio
 
 import facefusion.globals
 import facefusion.choices
-from facefusion.typing import VideoMemoryStrategy
 from facefusion import wording
+from facefusion.inference_manager import evict_inference_sessions
 
-VIDEO_MEMORY_STRATEGY : Optional[gradio.Dropdown] = None
+VIDEO_MEMORY_LIMIT_SLIDER : Optional[gradio.Slider] = None
 SYSTEM_MEMORY_LIMIT_SLIDER : Optional[gradio.Slider] = None
 
 
 def render() -> None:
-	global VIDEO_MEMORY_STRATEGY
+	global VIDEO_MEMORY_LIMIT_SLIDER
 	global SYSTEM_MEMORY_LIMIT_SLIDER
 
-	VIDEO_MEMORY_STRATEGY = gradio.Dropdown(
-		label = wording.get('video_memory_strategy_dropdown_label'),
-		choices = facefusion.choices.video_memory_strategies,
-		value = facefusion.globals.video_memory_strategy
+	VIDEO_MEMORY_LIMIT_SLIDER = gradio.Slider(
+		label = wording.get('video_memory_limit_slider_label'),
+		step = facefusion.choices.video_memory_limit_range[1] - facefusion.choices.video_memory_limit_range[0],
+		minimum = facefusion.choices.video_memory_limit_range[0],
+		maximum = facefusion.choices.video_memory_limit_range[-1],
+		value = facefusion.globals.video_memory_limit
 	)
 	SYSTEM_MEMORY_LIMIT_SLIDER = gradio.Slider(
 		label = wording.get('system_memory_limit_slider_label'),
@@ -29,12 +31,13 @@ def render() -> None:
 
 
 def listen() -> None:
-	VIDEO_MEMORY_STRATEGY.change(update_video_memory_strategy, inputs = VIDEO_MEMORY_STRATEGY)
+	VIDEO_MEMORY_LIMIT_SLIDER.change(update_video_memory_limit, inputs = VIDEO_MEMORY_LIMIT_SLIDER)
 	SYSTEM_MEMORY_LIMIT_SLIDER.change(update_system_memory_limit, inputs = SYSTEM_MEMORY_LIMIT_SLIDER)
 
 
-def update_video_memory_strategy(video_memory_strategy : VideoMemoryStrategy) -> None:
-	facefusion.globals.video_memory_strategy = video_memory_strategy
+def update_video_memory_limit(video_memory_limit : int) -> None:
+	facefusion.globals.video_memory_limit = video_memory_limit
+	evict_inference_sessions()
 
 
 def update_system_memory_limit(system_memory_limit : int) -> None:
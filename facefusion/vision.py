@@ -1,10 +1,11 @@
-from typing import Optional, List, Tuple
+from typing import Optional, Iterator, List, Tuple
 from functools import lru_cache
 import cv2
+import numpy
 
-from facefusion.typing import Frame, Resolution
+from facefusion.typing import Frame, Mask, Resolution, TempFrameGroups
 from facefusion.choices import video_template_sizes
-from facefusion.filesystem import is_image, is_video
+from facefusion.filesystem import is_image, is_video, get_temp_frame_view, get_temp_frame_thumbnail
 
 
 def get_video_frame(video_path : str, frame_number : int = 0) -> Optional[Frame]:
@@ -20,6 +21,21 @@ def get_video_frame(video_path : str, frame_number : int = 0) -> Optional[Frame]
 	return None
 
 
+def read_video_frames(video_path : str, start_frame : int, end_frame : int, frame_interval : int) -> Iterator[Optional[Frame]]:
+	if is_video(video_path):
+		video_capture = cv2.VideoCapture(video_path)
+		if video_capture.isOpened():
+			video_capture.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+			for frame_number in range(start_frame, end_frame):
+				if frame_number % frame_interval == 0:
+					has_frame, frame = video_capture.read()
+					yield frame if has_frame else None
+				else:
+					video_capture.grab()
+					yield None
+			video_capture.release()
+
+
 def count_video_frame_total(video_path : str) -> int:
 	if is_video(video_path):
 		video_capture = cv2.VideoCapture(video_path)
@@ -91,6 +107,14 @@ def unpack_resolution(resolution : str) -> Resolution:
 	return width, height
 
 
+def restrict_video_resolution(video_resolution : Resolution, max_height : int) -> Resolution:
+	width, height = video_resolution
+
+	if height > max_height:
+		return normalize_resolution((width * max_height / height, max_height))
+	return video_resolution
+
+
 def resize_frame_resolution(frame : Frame, max_width : int, max_height : int) -> Frame:
 	height, width = frame.shape[:2]
 
@@ -129,3 +153,105 @@ def write_image(image_path : str, frame : Frame) -> bool:
 	if image_path:
 		return cv2.imwrite(image_path, frame)
 	return False
+
+
+def read_temp_frame(temp_frame_path : str) -> Optional[Frame]:
+	temp_frame_view = get_temp_frame_view(temp_frame_path)
+	if temp_frame_view is not None:
+		return temp_frame_view
+	return read_image(temp_frame_path)
+
+
+def write_temp_frame(temp_frame_path : str, frame : Frame) -> bool:
+	temp_frame_view = get_temp_frame_view(temp_frame_path)
+	if temp_frame_view is not None:
+		if frame.shape != temp_frame_view.shape:
+			raise ValueError
+		temp_frame_view[:] = frame
+		return True
+	return write_image(temp_frame_path, frame)
+
+
+def create_frame_thumbnail(frame : Frame) -> Frame:
+	if frame.ndim == 3:
+		frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+	return cv2.resize(frame, (64, 64), interpolation = cv2.INTER_AREA)
+
+
+def read_temp_frame_thumbnail(temp_frame_path : str) -> Optional[Frame]:
+	temp_frame_thumbnail = get_temp_frame_thumbnail(temp_frame_path)
+	if temp_frame_thumbnail is not None:
+		return temp_frame_thumbnail
+	temp_frame_view = get_temp_frame_view(temp_frame_path)
+	if temp_frame_view is not None:
+		return create_frame_thumbnail(numpy.ascontiguousarray(temp_frame_view[::4, ::4]))
+	if is_image(temp_frame_path):
+		temp_frame = cv2.imread(temp_frame_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+		if temp_frame is not None:
+			return create_frame_thumbnail(temp_frame)
+	return None
+
+
+def group_temp_frames(temp_frame_paths : List[str], threshold : int) -> TempFrameGroups:
+	temp_frame_groups = {}
+	reference_frame_path = None
+	reference_thumbnail = None
+
+	for temp_frame_path in temp_frame_paths:
+		temp_thumbnail = read_temp_frame_thumbnail(temp_frame_path)
+		if temp_thumbnail is None:
+			reference_thumbnail = None
+			continue
+		if reference_thumbnail is not None and cv2.absdiff(temp_thumbnail, reference_thumbnail).max() <= threshold:
+			temp_frame_groups[temp_frame_path] = reference_frame_path
+		else:
+			reference_frame_path = temp_frame_path
+			reference_thumbnail = temp_thumbnail
+	return temp_frame_groups
+
+
+def create_tile_frames(frame : Frame, tile_size : int, tile_overlap : int) -> Tuple[List[Frame], List[Tuple[int, int]]]:
+	frame_height, frame_width = frame.shape[:2]
+	pad_frame = numpy.pad(frame, ((0, max(tile_size - frame_height, 0)), (0, max(tile_size - frame_width, 0)), (0, 0)), mode = 'edge')
+	tile_frames = []
+	tile_positions = []
+
+	for top in create_tile_starts(pad_frame.shape[0], tile_size, tile_overlap):
+		for left in create_tile_starts(pad_frame.shape[1], tile_size, tile_overlap):
+			tile_frames.append(pad_frame[top:top + tile_size, left:left + tile_size])
+			tile_positions.append((top, left))
+	return tile_frames, tile_positions
+
+
+def create_tile_starts(length : int, tile_size : int, tile_overlap : int) -> List[int]:
+	tile_stride = max(tile_size - tile_overlap, 1)
+	tile_starts = list(range(0, max(length - tile_size, 0), tile_stride))
+	tile_starts.append(max(length - tile_size, 0))
+	return tile_starts
+
+
+def merge_tile_frames(tile_frames : List[Frame], tile_positions : List[Tuple[int, int]], frame_width : int, frame_height : int, tile_overlap : int) -> Frame:
+	tile_size = tile_frames[0].shape[0]
+	merge_height = max(top for top, _ in tile_positions) + tile_size
+	merge_width = max(left for _, left in tile_positions) + tile_size
+	merge_frame = numpy.zeros((merge_height, merge_width, 3), numpy.float32)
+	merge_weight = numpy.zeros((merge_height, merge_width, 1), numpy.float32)
+
+	for tile_frame, (top, left) in zip(tile_frames, tile_positions):
+		tile_weight = numpy.outer(create_tile_weight(tile_size, tile_overlap, top > 0, top + tile_size < merge_height), create_tile_weight(tile_size, tile_overlap, left > 0, left + tile_size < merge_width))
+		tile_weight = numpy.expand_dims(tile_weight, axis = -1)
+		merge_frame[top:top + tile_size, left:left + tile_size] += tile_frame * tile_weight
+		merge_weight[top:top + tile_size, left:left + tile_size] += tile_weight
+	merge_frame = merge_frame[:frame_height, :frame_width] / merge_weight[:frame_height, :frame_width]
+	return merge_frame.round().clip(0, 255).astype(numpy.uint8)
+
+
+def create_tile_weight(tile_size : int, tile_overlap : int, has_start : bool, has_end : bool) -> Mask:
+	tile_weight = numpy.ones(tile_size, numpy.float32)
+	tile_ramp = (numpy.arange(tile_overlap, dtype = numpy.float32) + 0.5) / max(tile_overlap, 1)
+
+	if has_start and tile_overlap:
+		tile_weight[:tile_overlap] = numpy.minimum(tile_weight[:tile_overlap], tile_ramp)
+	if has_end and tile_overlap:
+		tile_weight[-tile_overlap:] = numpy.minimum(tile_weight[-tile_overlap:], tile_ramp[::-1])
+	return tile_weight
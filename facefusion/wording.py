@@ -10,6 +10,11 @@ WORDING =\
 	'frame_processors_help': 'choose from the available frame processors (choices: {choices}, ...)',
 	'frame_processor_model_help': 'choose the model for the frame processor',
 	'frame_processor_blend_help': 'specify the blend amount for the frame processor',
+	'frame_processor_min_face_size_help': 'skip faces smaller than the size in pixels for the frame processor',
+	'face_enhancer_medium_face_size_help': 'enhance faces smaller than the size in pixels using gpen_bfr_256',
+	'frame_enhancer_tile_size_help': 'specify the tile size in pixels for the frame enhancer',
+	'frame_enhancer_tile_overlap_help': 'specify the tile overlap in pixels for the frame enhancer',
+	'frame_enhancer_reuse_threshold_help': 'reuse the enhanced tile of the previous frame when no pixel differs more than the threshold',
 	'face_debugger_items_help': 'specify the face debugger items (choices: {choices})',
 	'ui_layouts_help': 'choose from the available ui layouts (choices: {choices}, ...)',
 	'keep_temp_help': 'retain temporary frames after processing',
@@ -20,6 +25,7 @@ WORDING =\
 	'face_detector_model_help': 'specify the model used for the face detector',
 	'face_detector_size_help': 'specify the size threshold used for the face detector',
 	'face_detector_score_help': 'specify the score threshold used for the face detector',
+	'face_presence_score_help': 'skip the face detector when the face presence check scores below the threshold',
 	'face_selector_mode_help': 'specify the mode for the face selector',
 	'reference_face_position_help': 'specify the position of the reference face',
 	'reference_face_distance_help': 'specify the distance between the reference face and the target face',
@@ -32,25 +38,40 @@ WORDING =\
 	'trim_frame_end_help': 'specify the end frame for extraction',
 	'temp_frame_format_help': 'specify the image format used for frame extraction',
 	'temp_frame_quality_help': 'specify the image quality used for frame extraction',
+	'temp_frame_dedup_threshold_help': 'process consecutive frames that differ less than the threshold only once',
 	'output_image_quality_help': 'specify the quality used for the output image',
 	'output_video_encoder_help': 'specify the encoder used for the output video',
 	'output_video_preset_help': 'specify the preset used for the output video',
 	'output_video_quality_help': 'specify the quality used for the output video',
 	'output_video_resolution_help': 'specify the resolution used for the output video',
+	'output_video_max_height_help': 'specify the maximum height used for the output video',
 	'output_video_fps_help': 'specify the frames per second (fps) used for the output video',
-	'video_memory_strategy_help': 'specify strategy to handle the video memory',
+	'output_video_watermark_help': 'specify the image overlaid as watermark on the output video',
+	'video_memory_limit_help': 'specify the amount (gb) of video memory to be used by models',
 	'system_memory_limit_help': 'specify the amount (gb) of system memory to be used',
 	'execution_providers_help': 'choose from the available execution providers (choices: {choices}, ...)',
 	'execution_thread_count_help': 'specify the number of execution threads',
 	'execution_queue_count_help': 'specify the number of execution queries',
+	'execution_graph_optimization_help': 'specify the graph optimization level used to prepare the models',
+	'execution_intra_op_thread_count_help': 'specify the number of threads used within an operator (0 to split the cores between the execution threads)',
+	'execution_inter_op_thread_count_help': 'specify the number of threads used across operators (0 to split the cores between the execution threads)',
+	'execution_mode_help': 'specify the mode used to execute the operators of a model',
+	'execution_memory_options_help': 'choose from the available execution memory options (choices: {choices})',
+	'execution_precision_help': 'specify the precision of the model variants (auto picks fp16 for gpu providers and fp32 otherwise, int8 is opt-in)',
 	'skip_download_help': 'omit automate downloads and lookups',
 	'headless_help': 'run the program in headless mode',
 	'log_level_help': 'choose from the available log levels',
 	'creating_temp': 'Creating temporary resources',
 	'extracting_frames_fps': 'Extracting frames with {video_fps} FPS',
+	'detecting_scene_cuts': 'Detected {scene_cut_total} scene cuts',
+	'skipping_faceless_frames': 'Skipped face detection on {skipped} of {checked} frames',
+	'deduplicating_frames': 'Deduplicating {frame_total} frames',
 	'analysing': 'Analysing',
 	'processing': 'Processing',
 	'downloading': 'Downloading',
+	'temp_frame_format_not_supported': 'Temp frame format {temp_frame_format} does not support upscaled frames',
+	'model_substituted': 'Using {substitute_model_name} instead of {model_name} for the {execution_precision} precision',
+	'quantizing_model': 'Quantizing {model_name} to int8',
 	'temp_frames_not_found': 'Temporary frames not found',
 	'compressing_image': 'Compressing image',
 	'compressing_image_failed': 'Compressing image failed',
@@ -60,6 +81,7 @@ WORDING =\
 	'restoring_audio': 'Restoring audio',
 	'restoring_audio_skipped': 'Restoring audio skipped',
 	'clearing_temp': 'Clearing temporary resources',
+	'reusing_tiles': 'Reused {reused} of {total} tiles ({ratio}%)',
 	'processing_image_succeed': 'Processing to image succeed in {seconds} seconds',
 	'processing_image_failed': 'Processing to image failed',
 	'processing_video_succeed': 'Processing to video succeed in {seconds} seconds',
@@ -101,7 +123,7 @@ WORDING =\
 	'face_mask_padding_left_slider_label': 'FACE MASK PADDING LEFT',
 	'face_mask_padding_right_slider_label': 'FACE MASK PADDING RIGHT',
 	'face_mask_region_checkbox_group_label': 'FACE MASK REGIONS',
-	'video_memory_strategy_dropdown_label': 'VIDEO MEMORY STRATEGY',
+	'video_memory_limit_slider_label': 'VIDEO MEMORY LIMIT',
 	'system_memory_limit_slider_label': 'SYSTEM MEMORY LIMIT',
 	'output_image_or_video_label': 'OUTPUT',
 	'output_path_textbox_label': 'OUTPUT PATH',
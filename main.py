@@ -4,7 +4,6 @@ import os
 import sys
 import cv2
 import subprocess
-import os
 import requests
 import time
 import hashlib
@@ -13,7 +12,6 @@ from datetime import datetime
 import threading
 
 
-from moviepy.editor import VideoFileClip
 
 from typing import List
 import platform
@@ -27,61 +25,23 @@ from tqdm import tqdm
 #from PIL import Image
 #import imageio
 
-def convert_to_720p(input_path, need_credit, start_time=0, end_time=0):
-    clip = VideoFileClip(input_path)
-    resolution = clip.size  # (width, height)
-    fps = clip.fps
+def create_video_args(input_path, start_time=0, end_time=0):
+    video_capture = cv2.VideoCapture(input_path)
+    fps = video_capture.get(cv2.CAP_PROP_FPS)
+    video_capture.release()
 
-    # 生成重命名后的文件名
-    file_name, file_extension = os.path.splitext(os.path.basename(input_path))
-    renamed_path = os.path.join(os.path.dirname(input_path), f"src_{file_name}{file_extension}")
-
-    # 备份原始文件
-    shutil.copy(input_path, renamed_path)
-
-    # 输出文件路径保持与输入文件名一致
-    output_path = input_path
-
-    # 构建 FFmpeg 命令
-    ffmpeg_command = ['ffmpeg', '-y', '-i', renamed_path]
+    # 缩放，帧率和水印交给 facefusion 在抽帧与合成时完成
+    video_args = ['--output-video-max-height', '1080', '--output-video-fps', '25']
 
     # 视频裁剪（可选）
-    if start_time > 0 or end_time > 0:
-        ffmpeg_command.extend(['-ss', str(start_time), '-to', str(end_time)])
-
-    # 判断分辨率并设置缩放
-    if resolution[1] > 1080:  # 仅在高度大于720时缩放
-        drawtext_filter = (
-            f"scale=trunc(iw*1080/ih/2)*2:1080,"
-            f"drawtext=text='':"
-            f"x=w-tw-20:y=h-th-20:fontsize=h*0.03:"
-            f"fontcolor=white@0.3:shadowx=2:shadowy=2:shadowcolor=black@0.3"
-        )
-        ffmpeg_command.extend(['-vf', drawtext_filter])
-    else:  # 不缩放，仅添加水印
-        drawtext_filter = (
-            f"drawtext=text='':"
-            f"x=w-tw-20:y=h-th-20:fontsize=h*0.03:"
-            f"fontcolor=white@0.3:shadowx=2:shadowy=2:shadowcolor=black@0.3"
-        )
-        ffmpeg_command.extend(['-vf', drawtext_filter])
-
-    # 降低帧率（如必要）
-    ffmpeg_command.extend(['-r', '25'])
-
-    # 音频处理
-    ffmpeg_command.extend(['-c:a', 'aac', '-b:a', '128k'])
-
-    # 设置输出路径
-    ffmpeg_command.append("media.mp4")
+    if fps > 0 and start_time > 0:
+        video_args.extend(['--trim-frame-start', str(int(start_time * fps))])
+    if fps > 0 and end_time > 0:
+        video_args.extend(['--trim-frame-end', str(int(end_time * fps))])
 
-    # 执行 FFmpeg 命令
-    print("FFmpeg Command: ", ' '.join(ffmpeg_command))
-    subprocess.run(ffmpeg_command, check=True)
-    print(f"视频成功转换并保存为: {output_path}")
-
-    # 释放资源
-    clip.close()
+    if os.path.isfile('watermark.png'):
+        video_args.extend(['--output-video-watermark', 'watermark.png'])
+    return video_args
 
 
 def add_watermark_to_mp4(input_path):
@@ -206,8 +166,6 @@ def download_file(url, filename):
     else:
         print(f"Error downloading file from {url}")
 
-import requests
-
 def upload_image(upload_url, image_path):
     files = {'file': (image_path, open(image_path, 'rb'), 'image/jpeg')}
     try:
@@ -399,7 +357,7 @@ def mp42gif(input_mp4_filename, output_gif_filename):
     subprocess.run(ffmpeg_gif_command)
 
 
-def proc_media(media_filename, face_filename, out_file_path, is_enhancement, need_credit):
+def proc_media(media_filename, face_filename, out_file_path, is_enhancement, need_credit, video_args=None):
     print(media_filename, face_filename, out_file_path)
 
     #clip = VideoFileClip(media_filename)
@@ -434,7 +392,6 @@ def proc_media(media_filename, face_filename, out_file_path, is_enhancement, nee
         #'--reference-face-distance','1',
         '--execution-thread-count', '32',
         '--execution-queue-count','2',
-        '--video-memory-strategy','tolerant',
         '--temp-frame-format','jpg',
         '--output-video-quality','70',
         '--output-video-preset','ultrafast',
@@ -443,6 +400,7 @@ def proc_media(media_filename, face_filename, out_file_path, is_enhancement, nee
     ]
     if is_enhancement:
         command.append('face_enhancer')
+    command.extend(video_args or [])
         
     subprocess.run(command)
 
@@ -533,14 +491,10 @@ def work():
         
     if media_filename.lower().endswith(('.mp4', '.m4v', '.mkv', '.avi', '.mov', '.webm', '.mpeg', '.mpg', '.wmv', '.flv', '.asf', '.3gp', '.3g2', '.ogg', '.vob', '.rmvb', '.ts', '.m2ts', '.divx', '.xvid', '.h264', '.avc', '.hevc', '.vp9', '.avchd')):
         
-        try:
-    	    convert_to_720p(media_filename, need_credit, start_time, end_time)
-        except Exception as e:
-            print(e)
-        media_filename = 'media.mp4'
+        video_args = create_video_args(media_filename, start_time, end_time)
         
         out_file_path = 'media_out.mp4'
-        proc_media(media_filename, face_filename, out_file_path, is_enhancement, need_credit)
+        proc_media(media_filename, face_filename, out_file_path, is_enhancement, need_credit, video_args)
         thumb_file_path = 'thumb_media.jpg'
         generate_video_thumbnail(out_file_path, thumb_file_path)
         if not os.path.exists(out_file_path):
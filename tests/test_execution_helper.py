@@ -1,4 +1,7 @@
-from facefusion.execution_helper import encode_execution_providers, decode_execution_providers, apply_execution_provider_options, map_torch_backend
+import os
+import onnxruntime
+
+from facefusion.execution_helper import encode_execution_providers, decode_execution_providers, apply_execution_provider_options, map_graph_optimization_level, map_execution_mode, calc_op_thread_counts, resolve_execution_precision, map_torch_backend
 
 
 def test_encode_execution_providers() -> None:
@@ -21,6 +24,33 @@ def test_multiple_execution_providers() -> None:
 	assert apply_execution_provider_options([ 'CPUExecutionProvider', 'CUDAExecutionProvider' ]) == execution_provider_with_options
 
 
+def test_map_graph_optimization_level() -> None:
+	assert map_graph_optimization_level('disabled') == onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+	assert map_graph_optimization_level('extended') == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+	assert map_graph_optimization_level('all') == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+
 def test_map_device() -> None:
 	assert map_torch_backend([ 'CPUExecutionProvider' ]) == 'cpu'
 	assert map_torch_backend([ 'CPUExecutionProvider', 'CUDAExecutionProvider' ]) == 'cuda'
+
+
+def test_map_execution_mode() -> None:
+	assert map_execution_mode('sequential') == onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+	assert map_execution_mode('parallel') == onnxruntime.ExecutionMode.ORT_PARALLEL
+
+
+def test_calc_op_thread_counts() -> None:
+	cpu_thread_count = os.cpu_count() or 1
+
+	assert calc_op_thread_counts(1, 'sequential') == (cpu_thread_count, 1)
+	assert calc_op_thread_counts(cpu_thread_count * 2, 'sequential') == (1, 1)
+	assert calc_op_thread_counts(cpu_thread_count * 2, 'parallel') == (1, 1)
+
+
+def test_resolve_execution_precision() -> None:
+	assert resolve_execution_precision('auto', [ 'CPUExecutionProvider' ]) == 'fp32'
+	assert resolve_execution_precision('auto', [ 'CUDAExecutionProvider', 'CPUExecutionProvider' ]) == 'fp16'
+	assert resolve_execution_precision('auto', [ 'CoreMLExecutionProvider' ]) == 'fp32'
+	assert resolve_execution_precision('fp32', [ 'CPUExecutionProvider' ]) == 'fp32'
+	assert resolve_execution_precision('int8', [ 'CPUExecutionProvider' ]) == 'int8'
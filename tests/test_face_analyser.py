@@ -0,0 +1,108 @@
+import numpy
+import pytest
+
+import facefusion.globals
+from facefusion.face_analyser import pre_check, clear_face_analyser, get_one_face, calc_embeddings, MODELS, sort_by_order, filter_by_age, filter_by_gender, find_similar_faces, calc_refresh_detector_size, calc_adaptive_detector_size, clear_adaptive_detector, THREAD_LOCAL, has_face_presence, update_face_presence_stats, get_face_presence_stats, clear_face_presence_stats
+from facefusion.face_helper import pack_face_batch, unpack_face_batch
+from facefusion.face_store import set_static_faces, clear_static_faces, append_reference_face, get_reference_faces, get_reference_embeddings, clear_reference_faces
+from facefusion.filesystem import is_file
+from facefusion.typing import Face
+from facefusion.vision import read_static_image
+
+
+def test_sort_and_filter_face_batch() -> None:
+	faces =\
+	[
+		Face(bbox = numpy.array([ 20, 0, 30, 10 ]), kps = numpy.zeros((5, 2)), score = 0.5, embedding = numpy.ones(512), normed_embedding = numpy.ones(512), gender = 0, age = 10),
+		Face(bbox = numpy.array([ 0, 20, 40, 60 ]), kps = numpy.zeros((5, 2)), score = 0.9, embedding = numpy.ones(512), normed_embedding = numpy.ones(512), gender = 1, age = 40),
+		Face(bbox = numpy.array([ 10, 10, 15, 15 ]), kps = numpy.zeros((5, 2)), score = 0.7, embedding = numpy.ones(512), normed_embedding = numpy.ones(512), gender = 1, age = 70)
+	]
+	face_batch = pack_face_batch(faces)
+
+	assert sort_by_order(face_batch, 'left-right').scores.tolist() == [ 0.9, 0.7, 0.5 ]
+	assert sort_by_order(face_batch, 'bottom-top').scores.tolist() == [ 0.9, 0.7, 0.5 ]
+	assert sort_by_order(face_batch, 'small-large').scores.tolist() == [ 0.7, 0.5, 0.9 ]
+	assert sort_by_order(face_batch, 'worst-best').scores.tolist() == [ 0.5, 0.7, 0.9 ]
+	assert filter_by_age(face_batch, 'child').ages.tolist() == [ 10 ]
+	assert filter_by_age(face_batch, 'senior').ages.tolist() == [ 70 ]
+	assert filter_by_gender(face_batch, 'male').ages.tolist() == [ 40, 70 ]
+	assert unpack_face_batch(filter_by_gender(face_batch, 'female'))[0].age == 10
+	assert unpack_face_batch(pack_face_batch([])) == []
+
+
+def test_find_similar_faces() -> None:
+	faces = [ Face(bbox = numpy.array([ index, 0, index + 10, 10 ]), kps = numpy.zeros((5, 2)), score = 0.9, embedding = numpy.eye(4)[index], normed_embedding = numpy.eye(4)[index], gender = 0, age = 30) for index in range(4) ]
+	frame = numpy.ones((8, 8, 3), numpy.uint8)
+	set_static_faces(frame, pack_face_batch(faces))
+	append_reference_face('origin', faces[2])
+	append_reference_face('origin', faces[0])
+
+	assert get_reference_embeddings('origin').shape == (2, 4)
+	assert [ face.bbox[0] for face in find_similar_faces(frame, get_reference_faces(), 0.5) ] == [ 2, 0 ]
+	assert find_similar_faces(frame, { 'origin': [ faces[3] ] }, 0.5)[0].bbox[0] == 3
+
+	clear_reference_faces()
+	clear_static_faces()
+
+	assert get_reference_embeddings('origin') is None
+
+
+def test_calc_adaptive_detector_size() -> None:
+	frame = numpy.zeros((1080, 1920, 3), numpy.uint8)
+	large_face_batch = pack_face_batch([ Face(bbox = numpy.array([ 0, 0, 600, 700 ]), kps = numpy.zeros((5, 2)), score = 0.9, embedding = numpy.ones(512), normed_embedding = numpy.ones(512), gender = 0, age = 30) ])
+	small_face_batch = pack_face_batch([ Face(bbox = numpy.array([ 0, 0, 40, 40 ]), kps = numpy.zeros((5, 2)), score = 0.9, embedding = numpy.ones(512), normed_embedding = numpy.ones(512), gender = 0, age = 30) ])
+
+	assert calc_refresh_detector_size(frame) == 640
+	assert calc_refresh_detector_size(numpy.zeros((2160, 3840, 3), numpy.uint8)) == 1024
+	assert calc_adaptive_detector_size(frame, large_face_batch) == 320
+	assert calc_adaptive_detector_size(frame, small_face_batch) == 1024
+	assert calc_adaptive_detector_size(frame, pack_face_batch([])) is None
+
+	THREAD_LOCAL.face_detector_size = 320
+	THREAD_LOCAL.frame_count = 10
+	clear_adaptive_detector()
+
+	assert THREAD_LOCAL.face_detector_size is None
+	assert THREAD_LOCAL.frame_count == 0
+
+
+def test_face_presence_stats() -> None:
+	facefusion.globals.face_presence_score = None
+
+	assert has_face_presence(numpy.zeros((240, 320, 3), numpy.uint8)) is True
+	assert get_face_presence_stats() == { 'checked': 0, 'skipped': 0 }
+
+	update_face_presence_stats(True)
+	update_face_presence_stats(False)
+
+	assert get_face_presence_stats() == { 'checked': 2, 'skipped': 1 }
+	clear_face_presence_stats()
+	assert get_face_presence_stats() == { 'checked': 0, 'skipped': 0 }
+
+
+def test_calc_embeddings_with_int8_precision() -> None:
+	facefusion.globals.execution_providers = [ 'CPUExecutionProvider' ]
+	facefusion.globals.execution_precision = 'fp32'
+	facefusion.globals.face_detector_model = 'retinaface'
+	facefusion.globals.face_detector_size = '640x640'
+	facefusion.globals.face_detector_score = 0.5
+	facefusion.globals.face_recognizer_model = 'arcface_inswapper'
+	facefusion.globals.face_presence_score = None
+	pre_check()
+	if not all(is_file(MODELS.get(model_name).get('path')) for model_name in [ 'face_detector_retinaface', 'face_recognizer_arcface_inswapper', 'gender_age' ]):
+		pytest.skip('face analyser models are not available')
+	source_frame = read_static_image('.assets/examples/source.jpg')
+	source_face = get_one_face(source_frame)
+	_, fp32_embeddings = calc_embeddings(source_frame, [ source_face.kps ])
+
+	facefusion.globals.execution_precision = 'int8'
+	pre_check()
+	clear_face_analyser()
+	_, int8_embeddings = calc_embeddings(source_frame, [ source_face.kps ])
+
+	assert is_file(MODELS.get('face_recognizer_arcface_inswapper').get('quantization').get('path')) is True
+	assert numpy.dot(fp32_embeddings[0], int8_embeddings[0]) > 0.95
+
+	facefusion.globals.execution_precision = 'auto'
+	clear_face_analyser()
+	clear_static_faces()
@@ -0,0 +1,32 @@
+import cv2
+import numpy
+
+from facefusion.face_helper import warp_face_by_kps, paste_back, calc_face_size
+
+
+def test_paste_back() -> None:
+	temp_frame = cv2.resize(numpy.random.randint(0, 255, (9, 16, 3), numpy.uint8), (640, 360))
+	kps = numpy.array([[ 300, 160 ], [ 340, 160 ], [ 320, 185 ], [ 305, 210 ], [ 335, 210 ]], numpy.float32)
+	crop_frame, affine_matrix = warp_face_by_kps(temp_frame, kps, 'ffhq_512', (512, 512))
+	crop_frame = 255 - crop_frame
+	crop_mask = numpy.ones((512, 512), numpy.float32)
+	inverse_matrix = cv2.invertAffineTransform(affine_matrix)
+	inverse_crop_mask = numpy.expand_dims(cv2.warpAffine(crop_mask, inverse_matrix, (640, 360)).clip(0, 1), axis = -1)
+	inverse_crop_frame = cv2.warpAffine(crop_frame, inverse_matrix, (640, 360), borderMode = cv2.BORDER_REPLICATE)
+	full_frame = (inverse_crop_mask * inverse_crop_frame + (1 - inverse_crop_mask) * temp_frame).astype(numpy.uint8)
+	blend_frame = cv2.addWeighted(temp_frame, 0.2, full_frame, 0.8, 0)
+
+	assert numpy.abs(paste_back(temp_frame.copy(), crop_frame, crop_mask, affine_matrix).astype(int) - full_frame).mean() < 0.01
+	assert numpy.abs(paste_back(temp_frame.copy(), crop_frame, crop_mask, affine_matrix, 0.8).astype(int) - blend_frame).mean() < 0.1
+	assert numpy.array_equal(paste_back(temp_frame.copy(), crop_frame, crop_mask, affine_matrix)[:, :200], temp_frame[:, :200])
+
+	paste_frame = temp_frame.copy()
+
+	assert paste_back(paste_frame, crop_frame, crop_mask, affine_matrix) is paste_frame
+	assert numpy.abs(paste_frame.astype(int) - full_frame).mean() < 0.01
+	assert paste_back(temp_frame, crop_frame, crop_mask, numpy.array([[ 1, 0, 2000 ], [ 0, 1, 2000 ]], numpy.float64)) is temp_frame
+
+
+def test_calc_face_size() -> None:
+	assert calc_face_size(numpy.array([ 10, 20, 50, 120 ])) == 100
+	assert calc_face_size(numpy.array([ 0, 0, 64, 32 ])) == 64
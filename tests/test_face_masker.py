@@ -0,0 +1,126 @@
+import cv2
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import helper, numpy_helper
+
+import facefusion.globals
+from facefusion import face_masker
+from facefusion.face_helper import warp_face_by_kps
+from facefusion.face_masker import OCCLUSION_MASKS, create_occlusion_mask, create_occlusion_masks, create_region_mask, create_region_masks, append_occlusion_mask, find_occlusion_mask, set_occlusion_mask_key, clear_occlusion_masks, THREAD_LOCAL, scale_affine_matrix
+
+
+def test_find_occlusion_mask() -> None:
+	temp_frame = numpy.zeros((512, 512, 3), numpy.uint8)
+	kps = numpy.array([[ 200, 220 ], [ 300, 220 ], [ 250, 270 ], [ 210, 320 ], [ 290, 320 ]], numpy.float32)
+	_, swapper_matrix = warp_face_by_kps(temp_frame, kps, 'arcface_128_v2', (128, 128))
+	_, enhancer_matrix = warp_face_by_kps(temp_frame, kps, 'ffhq_512', (512, 512))
+	occlusion_mask = numpy.ones((128, 128), numpy.float32)
+	append_occlusion_mask('0001.png', kps, swapper_matrix, occlusion_mask)
+
+	assert find_occlusion_mask('0002.png', kps, enhancer_matrix, (512, 512)) is None
+	assert find_occlusion_mask('0001.png', kps + 50, enhancer_matrix, (512, 512)) is None
+	assert find_occlusion_mask('0001.png', kps + 1, swapper_matrix, (128, 128))[64, 64] == 1
+	assert find_occlusion_mask('0001.png', kps, enhancer_matrix, (512, 512)).shape == (512, 512)
+	assert find_occlusion_mask('0001.png', kps, enhancer_matrix, (512, 512))[256, 256] == 1
+	assert find_occlusion_mask('0001.png', kps, enhancer_matrix, (512, 512))[0, 0] == 0
+
+	clear_occlusion_masks()
+
+	assert find_occlusion_mask('0001.png', kps, enhancer_matrix, (512, 512)) is None
+
+
+def test_scale_affine_matrix() -> None:
+	temp_frame = numpy.zeros((512, 512, 3), numpy.uint8)
+	kps = numpy.array([[ 200, 220 ], [ 300, 220 ], [ 250, 270 ], [ 210, 320 ], [ 290, 320 ]], numpy.float32)
+	_, affine_matrix = warp_face_by_kps(temp_frame, kps, 'arcface_128_v2', (128, 128))
+	occlusion_mask = cv2.GaussianBlur(numpy.random.rand(256, 256).astype(numpy.float32), (0, 0), 8)
+	append_occlusion_mask('0001.png', kps, scale_affine_matrix(affine_matrix, (128, 128), (256, 256)), occlusion_mask)
+
+	assert numpy.abs(find_occlusion_mask('0001.png', kps, affine_matrix, (128, 128)) - cv2.resize(occlusion_mask, (128, 128))).max() < 0.01
+
+	clear_occlusion_masks()
+
+
+def test_append_occlusion_mask_with_byte_limit(monkeypatch : pytest.MonkeyPatch) -> None:
+	kps = numpy.zeros((5, 2), numpy.float32)
+	affine_matrix = numpy.eye(2, 3)
+	occlusion_mask = numpy.ones((16, 16), numpy.float32)
+	monkeypatch.setattr(face_masker, 'OCCLUSION_MASK_BYTE_LIMIT', 1024)
+
+	for frame_number in range(10):
+		append_occlusion_mask(str(frame_number).zfill(4) + '.png', kps, affine_matrix, occlusion_mask)
+
+	assert len(OCCLUSION_MASKS) == 4
+	assert '0000.png' in OCCLUSION_MASKS
+
+	clear_occlusion_masks()
+	append_occlusion_mask('0001.png', kps, affine_matrix, occlusion_mask)
+
+	assert len(OCCLUSION_MASKS) == 1
+	clear_occlusion_masks()
+
+
+def test_set_occlusion_mask_key() -> None:
+	facefusion.globals.frame_processors = [ 'face_swapper', 'face_enhancer' ]
+	set_occlusion_mask_key('0001.png')
+
+	assert THREAD_LOCAL.occlusion_mask_key == '0001.png'
+
+	facefusion.globals.frame_processors = [ 'face_enhancer', 'face_swapper' ]
+	set_occlusion_mask_key('0001.png')
+
+	assert THREAD_LOCAL.occlusion_mask_key is None
+
+	facefusion.globals.frame_processors = [ 'face_swapper' ]
+	set_occlusion_mask_key('0001.png')
+
+	assert THREAD_LOCAL.occlusion_mask_key is None
+
+
+def create_face_occluder() -> onnxruntime.InferenceSession:
+	node = helper.make_node('ReduceMean', [ 'input' ], [ 'output' ], axes = [ 3 ], keepdims = 1)
+	graph = helper.make_graph([ node ], 'test', [ helper.make_tensor_value_info('input', onnx.TensorProto.FLOAT, [ 'batch', 256, 256, 3 ]) ], [ helper.make_tensor_value_info('output', onnx.TensorProto.FLOAT, [ 'batch', 256, 256, 1 ]) ])
+	model = helper.make_model(graph, producer_name = 'test', opset_imports = [ helper.make_opsetid('', 13) ])
+	return onnxruntime.InferenceSession(model.SerializeToString(), providers = [ 'CPUExecutionProvider' ])
+
+
+def create_face_parser() -> onnxruntime.InferenceSession:
+	node = helper.make_node('Conv', [ 'input', 'weight' ], [ 'output' ])
+	graph = helper.make_graph([ node ], 'test', [ helper.make_tensor_value_info('input', onnx.TensorProto.FLOAT, [ 'batch', 3, 512, 512 ]) ], [ helper.make_tensor_value_info('output', onnx.TensorProto.FLOAT, [ 'batch', 19, 512, 512 ]) ],
+	[
+		numpy_helper.from_array(numpy.random.RandomState(0).randn(19, 3, 1, 1).astype(numpy.float32), 'weight')
+	])
+	model = helper.make_model(graph, producer_name = 'test', opset_imports = [ helper.make_opsetid('', 13) ])
+	return onnxruntime.InferenceSession(model.SerializeToString(), providers = [ 'CPUExecutionProvider' ])
+
+
+def test_create_occlusion_masks(monkeypatch : pytest.MonkeyPatch) -> None:
+	monkeypatch.setattr(face_masker, 'get_face_occluder', create_face_occluder)
+	crop_frames = [ numpy.random.RandomState(index).randint(0, 255, (128, 128, 3), numpy.uint8) for index in range(3) ]
+	kps_list = [ numpy.array([[ 40, 50 ], [ 90, 50 ], [ 64, 75 ], [ 45, 100 ], [ 85, 100 ]], numpy.float32) + index * 20 for index in range(3) ]
+	affine_matrices = [ numpy.eye(2, 3) for _ in range(3) ]
+	facefusion.globals.frame_processors = [ 'face_swapper', 'face_enhancer' ]
+	set_occlusion_mask_key(None)
+
+	for occlusion_mask, crop_frame in zip(create_occlusion_masks(crop_frames), crop_frames):
+		assert numpy.array_equal(occlusion_mask, create_occlusion_mask(crop_frame))
+
+	set_occlusion_mask_key('0001.png')
+	occlusion_masks = create_occlusion_masks(crop_frames, kps_list, affine_matrices)
+
+	assert len(OCCLUSION_MASKS.get('0001.png')) == 3
+	for occlusion_mask, crop_frame, kps, affine_matrix in zip(occlusion_masks, crop_frames, kps_list, affine_matrices):
+		assert numpy.abs(occlusion_mask - create_occlusion_mask(crop_frame, kps, affine_matrix)).max() < 0.01
+
+	set_occlusion_mask_key(None)
+	clear_occlusion_masks()
+
+
+def test_create_region_masks(monkeypatch : pytest.MonkeyPatch) -> None:
+	monkeypatch.setattr(face_masker, 'get_face_parser', create_face_parser)
+	crop_frames = [ numpy.random.RandomState(index).randint(0, 255, (128, 128, 3), numpy.uint8) for index in range(3) ]
+
+	for region_mask, crop_frame in zip(create_region_masks(crop_frames, [ 'skin', 'nose' ]), crop_frames):
+		assert numpy.array_equal(region_mask, create_region_mask(crop_frame, [ 'skin', 'nose' ]))
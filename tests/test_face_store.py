@@ -0,0 +1,69 @@
+from pathlib import Path
+import numpy
+
+from facefusion.face_helper import pack_face_batch
+from facefusion.face_store import FACE_STORE, set_static_faces, get_static_faces, clear_static_faces, load_static_faces, save_static_faces, create_frame_hash, create_file_hash, set_frame_hash_recording, get_frame_hashes, clear_frame_hashes
+from facefusion.typing import Face
+
+
+def test_save_and_load_static_faces(tmp_path : Path) -> None:
+	face_index_path = str(tmp_path / 'test_faces.npz')
+	face = Face(
+		bbox = numpy.array([ 0, 0, 10, 10 ]),
+		kps = numpy.zeros((5, 2)),
+		score = 0.9,
+		embedding = numpy.ones(512),
+		normed_embedding = numpy.ones(512),
+		gender = 1,
+		age = 30
+	)
+	frame = numpy.ones((8, 8, 3), numpy.uint8)
+	empty_frame = numpy.full((8, 8, 3), 2, numpy.uint8)
+	other_frame = numpy.full((8, 8, 3), 3, numpy.uint8)
+	set_static_faces(frame, pack_face_batch([ face, face ]))
+	set_static_faces(empty_frame, pack_face_batch([]))
+	set_static_faces(other_frame, pack_face_batch([ face ]))
+	save_static_faces(face_index_path, [ create_frame_hash(frame), create_frame_hash(empty_frame) ])
+	clear_static_faces()
+
+	assert get_static_faces(frame) is None
+
+	load_static_faces(face_index_path)
+
+	assert len(get_static_faces(frame).scores) == 2
+	assert len(get_static_faces(empty_frame).scores) == 0
+	assert numpy.array_equal(get_static_faces(frame).bboxes[0], face.bbox)
+	assert get_static_faces(frame).ages[1] == 30
+	assert get_static_faces(other_frame) is None
+	clear_static_faces()
+	save_static_faces(face_index_path, [ create_frame_hash(frame) ])
+	load_static_faces(face_index_path)
+
+	assert FACE_STORE['static_faces'] == {}
+
+
+def test_record_frame_hashes() -> None:
+	frame = numpy.ones((8, 8, 3), numpy.uint8)
+	other_frame = numpy.full((8, 8, 3), 3, numpy.uint8)
+	get_static_faces(frame)
+
+	assert get_frame_hashes() == []
+
+	set_frame_hash_recording(True)
+	get_static_faces(frame)
+	get_static_faces(other_frame)
+	get_static_faces(frame)
+	get_static_faces(numpy.zeros((8, 8, 3), numpy.uint8))
+	set_frame_hash_recording(False)
+
+	assert get_frame_hashes() == [ create_frame_hash(frame), create_frame_hash(other_frame) ]
+
+	clear_frame_hashes()
+
+	assert get_frame_hashes() == []
+
+
+def test_create_file_hash() -> None:
+	assert create_file_hash('.assets/examples/source.jpg') == create_file_hash('.assets/examples/source.jpg')
+	assert create_file_hash('.assets/examples/source.jpg') != create_file_hash('.assets/examples/target-240p.mp4')
+	assert create_file_hash('invalid') is None
@@ -3,9 +3,10 @@ import subprocess
 import pytest
 
 import facefusion.globals
-from facefusion.filesystem import get_temp_directory_path, create_temp, clear_temp
+from facefusion.filesystem import get_temp_directory_path, get_temp_output_video_path, get_temp_frame_paths, get_temp_frame_thumbnails, create_temp, clear_temp
 from facefusion.download import conditional_download
-from facefusion.ffmpeg import extract_frames
+from facefusion.ffmpeg import extract_frames, merge_video, has_audio, calc_trim_times
+from facefusion.vision import count_video_frame_total, read_temp_frame, read_temp_frame_thumbnail, write_temp_frame
 
 
 @pytest.fixture(scope = 'module', autouse = True)
@@ -18,6 +19,7 @@ def before_all() -> None:
 	subprocess.run([ 'ffmpeg', '-i', '.assets/examples/target-240p.mp4', '-vf', 'fps=25', '.assets/examples/target-240p-25fps.mp4' ])
 	subprocess.run([ 'ffmpeg', '-i', '.assets/examples/target-240p.mp4', '-vf', 'fps=30', '.assets/examples/target-240p-30fps.mp4' ])
 	subprocess.run([ 'ffmpeg', '-i', '.assets/examples/target-240p.mp4', '-vf', 'fps=60', '.assets/examples/target-240p-60fps.mp4' ])
+	subprocess.run([ 'ffmpeg', '-i', '.assets/examples/target-240p.mp4', '-an', '.assets/examples/target-240p-no-audio.mp4' ])
 
 
 @pytest.fixture(scope = 'function', autouse = True)
@@ -26,6 +28,10 @@ def before_each() -> None:
 	facefusion.globals.trim_frame_end = None
 	facefusion.globals.temp_frame_quality = 80
 	facefusion.globals.temp_frame_format = 'jpg'
+	facefusion.globals.output_video_encoder = 'libx264'
+	facefusion.globals.output_video_preset = 'ultrafast'
+	facefusion.globals.output_video_quality = 80
+	facefusion.globals.output_video_watermark = None
 
 
 def test_extract_frames() -> None:
@@ -41,6 +47,7 @@ def test_extract_frames() -> None:
 
 		assert extract_frames(target_path, '452x240', 30.0) is True
 		assert len(glob.glob1(temp_directory_path, '*.jpg')) == 324
+		assert len(get_temp_frame_thumbnails(temp_directory_path)) == 324
 
 		clear_temp(target_path)
 
@@ -98,3 +105,61 @@ def test_extract_frames_with_trim_end() -> None:
 		assert len(glob.glob1(temp_directory_path, '*.jpg')) == frame_total
 
 		clear_temp(target_path)
+
+
+def test_calc_trim_times() -> None:
+	assert calc_trim_times('.assets/examples/target-240p-25fps.mp4') == (None, None)
+
+	facefusion.globals.trim_frame_start = 124
+	facefusion.globals.trim_frame_end = 224
+
+	assert calc_trim_times('.assets/examples/target-240p-25fps.mp4') == (4.96, 8.96)
+	assert calc_trim_times('invalid') == (None, None)
+
+
+def test_extract_frames_with_raw_format() -> None:
+	facefusion.globals.temp_frame_format = 'raw'
+	facefusion.globals.trim_frame_start = 124
+	facefusion.globals.trim_frame_end = 224
+	target_path = '.assets/examples/target-240p-30fps.mp4'
+	create_temp(target_path)
+
+	assert extract_frames(target_path, '452x240', 30.0) is True
+
+	temp_frame_paths = get_temp_frame_paths(target_path)
+	temp_frame = read_temp_frame(temp_frame_paths[0])
+
+	assert len(temp_frame_paths) == 100
+	assert temp_frame.shape == (240, 452, 3)
+	assert len(get_temp_frame_thumbnails(get_temp_directory_path(target_path))) == 100
+	assert read_temp_frame_thumbnail(temp_frame_paths[-1]).shape == (64, 64)
+	assert write_temp_frame(temp_frame_paths[0], temp_frame * 0) is True
+	assert read_temp_frame(temp_frame_paths[0]).max() == 0
+	with pytest.raises(ValueError):
+		write_temp_frame(temp_frame_paths[0], temp_frame[:120])
+	assert merge_video(target_path, 30.0, None) is True
+	assert count_video_frame_total(get_temp_output_video_path(target_path)) == 100
+
+	clear_temp(target_path)
+
+
+def test_merge_video() -> None:
+	facefusion.globals.trim_frame_start = 124
+	facefusion.globals.trim_frame_end = 224
+	target_path = '.assets/examples/target-240p-25fps.mp4'
+	create_temp(target_path)
+	extract_frames(target_path, '452x240', 25.0)
+
+	assert merge_video(target_path, 25.0, target_path) is True
+	assert has_audio(get_temp_output_video_path(target_path)) is True
+	assert count_video_frame_total(get_temp_output_video_path(target_path)) == 100
+	assert merge_video(target_path, 25.0, None) is True
+	assert has_audio(get_temp_output_video_path(target_path)) is False
+
+	clear_temp(target_path)
+
+
+def test_has_audio() -> None:
+	assert has_audio('.assets/examples/target-240p.mp4') is True
+	assert has_audio('.assets/examples/target-240p-no-audio.mp4') is False
+	assert has_audio('invalid') is False
@@ -1,7 +1,8 @@
+import shutil
 import pytest
 
 from facefusion.download import conditional_download
-from facefusion.filesystem import is_file, is_directory, is_image, are_images, is_video, list_directory
+from facefusion.filesystem import get_temp_directory_path, create_temp, write_temp_frame_groups, read_temp_frame_groups, restore_temp_frame_groups, is_file, is_directory, is_image, are_images, is_video, list_directory
 
 
 @pytest.fixture(scope = 'module', autouse = True)
@@ -46,3 +47,19 @@ def test_list_directory() -> None:
 	assert list_directory('.assets/examples')
 	assert list_directory('.assets/examples/source.jpg') is None
 	assert list_directory('invalid') is None
+
+
+def test_restore_temp_frame_groups() -> None:
+	create_temp('target-groups.mp4')
+	temp_directory_path = get_temp_directory_path('target-groups.mp4')
+	shutil.copyfile('.assets/examples/source.jpg', temp_directory_path + '/0001.jpg')
+	write_temp_frame_groups('target-groups.mp4',
+	{
+		temp_directory_path + '/0002.jpg': temp_directory_path + '/0001.jpg'
+	})
+	restore_temp_frame_groups('target-groups.mp4')
+
+	assert len(read_temp_frame_groups('target-groups.mp4')) == 1
+	assert is_file(temp_directory_path + '/0002.jpg') is True
+	assert read_temp_frame_groups('invalid') == {}
+	shutil.rmtree(temp_directory_path)
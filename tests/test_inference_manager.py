@@ -0,0 +1,133 @@
+from typing import Any, List
+from pathlib import Path
+import os
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import helper
+
+import facefusion.globals
+from facefusion.filesystem import is_file
+from facefusion.inference_manager import get_inference_session, create_inference_session, resolve_optimized_model_path, resolve_model_path, clear_inference_session, clear_inference_sessions, get_inference_footprint, run_batch, INFERENCE_SESSIONS
+
+
+@pytest.fixture(scope = 'module', autouse = True)
+def before_all() -> None:
+	facefusion.globals.execution_providers = [ 'CPUExecutionProvider' ]
+	facefusion.globals.execution_thread_count = 1
+	facefusion.globals.video_memory_limit = 0
+
+
+@pytest.fixture(scope = 'function', autouse = True)
+def before_each() -> None:
+	clear_inference_sessions()
+
+
+@pytest.fixture(scope = 'module')
+def model_path(tmp_path_factory : pytest.TempPathFactory) -> str:
+	model_path = str(tmp_path_factory.mktemp('models') / 'test_identity.onnx')
+	node = helper.make_node('Identity', [ 'input' ], [ 'output' ])
+	graph = helper.make_graph([ node ], 'test', [ helper.make_tensor_value_info('input', onnx.TensorProto.FLOAT, [ 1, 4 ]) ], [ helper.make_tensor_value_info('output', onnx.TensorProto.FLOAT, [ 1, 4 ]) ])
+	onnx.save(helper.make_model(graph, opset_imports = [ helper.make_opsetid('', 13) ]), model_path)
+	return model_path
+
+
+def test_get_inference_session(model_path : str) -> None:
+	inference_session = get_inference_session(model_path)
+
+	assert get_inference_session(model_path) is inference_session
+	assert get_inference_footprint() > 0
+
+
+def test_clear_inference_session(model_path : str) -> None:
+	get_inference_session(model_path)
+	clear_inference_session(model_path)
+
+	assert model_path not in INFERENCE_SESSIONS
+	assert get_inference_footprint() == 0
+
+
+def test_create_inference_session_with_graph_optimization(model_path : str) -> None:
+	facefusion.globals.execution_graph_optimization = 'all'
+	optimized_model_path = resolve_optimized_model_path(model_path)
+	if is_file(optimized_model_path):
+		os.remove(optimized_model_path)
+	create_inference_session(model_path)
+
+	assert is_file(optimized_model_path) is True
+	assert create_inference_session(model_path).get_inputs()[0].name == 'input'
+
+	facefusion.globals.execution_graph_optimization = 'disabled'
+
+	assert resolve_optimized_model_path(model_path) is None
+
+
+def test_create_inference_session_with_graph_optimization_and_compiled_provider(model_path : str) -> None:
+	facefusion.globals.execution_graph_optimization = 'all'
+	facefusion.globals.execution_providers = [ 'TensorrtExecutionProvider', 'CPUExecutionProvider' ]
+
+	assert resolve_optimized_model_path(model_path) is None
+	assert create_inference_session(model_path).get_inputs()[0].name == 'input'
+
+	facefusion.globals.execution_providers = [ 'CPUExecutionProvider' ]
+
+
+def test_create_inference_session_with_failed_serialization(model_path : str, monkeypatch : pytest.MonkeyPatch) -> None:
+	inference_session_class = onnxruntime.InferenceSession
+
+	def create_compiled_inference_session(model_path : str, sess_options : onnxruntime.SessionOptions, providers : List[Any]) -> onnxruntime.InferenceSession:
+		if sess_options.optimized_model_filepath:
+			raise RuntimeError('Unable to serialize model as it contains compiled nodes')
+		return inference_session_class(model_path, sess_options = sess_options, providers = providers)
+
+	monkeypatch.setattr(onnxruntime, 'InferenceSession', create_compiled_inference_session)
+	facefusion.globals.execution_graph_optimization = 'all'
+	optimized_model_path = resolve_optimized_model_path(model_path)
+	if is_file(optimized_model_path):
+		os.remove(optimized_model_path)
+
+	assert create_inference_session(model_path).get_inputs()[0].name == 'input'
+	assert is_file(optimized_model_path) is False
+
+
+def test_resolve_model_path(model_path : str) -> None:
+	int8_model_path = model_path.replace('.onnx', '_int8.onnx')
+	model_value =\
+	{
+		'path': model_path,
+		'quantization':
+		{
+			'path': int8_model_path
+		}
+	}
+	facefusion.globals.execution_precision = 'auto'
+
+	assert resolve_model_path(model_value) == model_path
+
+	Path(int8_model_path).write_bytes(Path(model_path).read_bytes())
+
+	assert resolve_model_path(model_value) == model_path
+
+	facefusion.globals.execution_precision = 'int8'
+
+	assert resolve_model_path(model_value) == int8_model_path
+
+	facefusion.globals.execution_precision = 'fp32'
+
+	assert resolve_model_path(model_value) == model_path
+
+
+def create_batch_inference_session(batch_size : object) -> onnxruntime.InferenceSession:
+	node = helper.make_node('ReduceMean', [ 'input' ], [ 'output' ], axes = [ 1, 2, 3 ], keepdims = 0)
+	graph = helper.make_graph([ node ], 'test', [ helper.make_tensor_value_info('input', onnx.TensorProto.FLOAT, [ batch_size, 3, 4, 4 ]) ], [ helper.make_tensor_value_info('output', onnx.TensorProto.FLOAT, [ batch_size ]) ])
+	model = helper.make_model(graph, producer_name = 'test', opset_imports = [ helper.make_opsetid('', 13) ])
+	return onnxruntime.InferenceSession(model.SerializeToString(), providers = [ 'CPUExecutionProvider' ])
+
+
+def test_run_batch() -> None:
+	batch_frames = numpy.arange(5, dtype = numpy.float32).reshape(5, 1, 1, 1) * numpy.ones((5, 3, 4, 4), numpy.float32)
+
+	assert numpy.array_equal(run_batch(create_batch_inference_session('batch'), batch_frames), numpy.arange(5))
+	assert numpy.array_equal(run_batch(create_batch_inference_session(1), batch_frames), numpy.arange(5))
+	assert numpy.array_equal(run_batch(create_batch_inference_session(2), batch_frames), numpy.arange(5))
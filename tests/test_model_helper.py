@@ -0,0 +1,74 @@
+import os
+import numpy
+import onnx
+import onnxruntime
+import pytest
+from onnx import helper, numpy_helper
+
+from facefusion.model_helper import read_model_initializer, augment_parser_model, create_calibration_inputs, prepare_calibration_frame
+
+
+@pytest.fixture(scope = 'module')
+def model_directory_path(tmp_path_factory : pytest.TempPathFactory) -> str:
+	model_directory_path = str(tmp_path_factory.mktemp('models'))
+	node = helper.make_node('MatMul', [ 'input', 'matrix' ], [ 'output' ])
+	graph = helper.make_graph([ node ], 'test', [ helper.make_tensor_value_info('input', onnx.TensorProto.FLOAT, [ 1, 4 ]) ], [ helper.make_tensor_value_info('output', onnx.TensorProto.FLOAT, [ 1, 4 ]) ],
+	[
+		numpy_helper.from_array(numpy.zeros((2, 2), numpy.float32), 'bias'),
+		numpy_helper.from_array(numpy.arange(16, dtype = numpy.float32).reshape(4, 4), 'matrix')
+	])
+	onnx.save(helper.make_model(graph, producer_name = 'test'), os.path.join(model_directory_path, 'test_model.onnx'))
+	node = helper.make_node('Identity', [ 'input' ], [ 'output' ])
+	graph = helper.make_graph([ node ], 'test', [ helper.make_tensor_value_info('input', onnx.TensorProto.FLOAT, [ 'batch', 3, 4, 4 ]) ], [ helper.make_tensor_value_info('output', onnx.TensorProto.FLOAT, [ 'batch', 3, 4, 4 ]) ])
+	onnx.save(helper.make_model(graph, producer_name = 'test', opset_imports = [ helper.make_opsetid('', 13) ]), os.path.join(model_directory_path, 'test_parser.onnx'))
+	return model_directory_path
+
+
+def test_read_model_initializer(model_directory_path : str) -> None:
+	model = onnx.load(os.path.join(model_directory_path, 'test_model.onnx'))
+
+	assert numpy.array_equal(read_model_initializer(os.path.join(model_directory_path, 'test_model.onnx'), -1), numpy_helper.to_array(model.graph.initializer[-1]))
+	assert numpy.array_equal(read_model_initializer(os.path.join(model_directory_path, 'test_model.onnx'), 0), numpy.zeros((2, 2), numpy.float32))
+
+
+def test_augment_parser_model(model_directory_path : str) -> None:
+	assert augment_parser_model(os.path.join(model_directory_path, 'test_parser.onnx'), os.path.join(model_directory_path, 'test_parser_region.onnx')) is True
+
+	inference_session = onnxruntime.InferenceSession(os.path.join(model_directory_path, 'test_parser_region.onnx'), providers = [ 'CPUExecutionProvider' ])
+	logits = numpy.random.rand(2, 3, 4, 4).astype(numpy.float32)
+	region_mask = inference_session.run(None,
+	{
+		'input': logits,
+		'region_lookup': numpy.array([ 0, 1, 1 ], numpy.uint8)
+	})[0]
+
+	assert region_mask.dtype == numpy.uint8
+	assert numpy.array_equal(region_mask, numpy.isin(logits.argmax(1), [ 1, 2 ]))
+
+
+def test_create_calibration_inputs(model_directory_path : str) -> None:
+	model_value =\
+	{
+		'path': os.path.join(model_directory_path, 'test_model.onnx'),
+		'quantization':
+		{
+			'mean': 127.5,
+			'standard_deviation': 127.5,
+			'size': (4, 4)
+		}
+	}
+	calibration_frames = [ numpy.zeros((8, 8, 3), numpy.uint8) ]
+	calibration_inputs = create_calibration_inputs(model_value, calibration_frames)
+
+	assert len(calibration_inputs) == 1
+	assert calibration_inputs[0].get('input').shape == (1, 4)
+	assert prepare_calibration_frame(calibration_frames[0], [ 1, 3, 'height', 'width' ], model_value).shape == (1, 3, 4, 4)
+	assert prepare_calibration_frame(calibration_frames[0], [ 1, 2, 2, 3 ], model_value).shape == (1, 2, 2, 3)
+	assert numpy.all(prepare_calibration_frame(calibration_frames[0], [ 1, 2, 2, 3 ], model_value) == -1)
+
+	blue_frame = numpy.zeros((8, 8, 3), numpy.uint8)
+	blue_frame[:, :, 0] = 255
+
+	assert prepare_calibration_frame(blue_frame, [ 1, 3, 4, 4 ], model_value)[0, 2, 0, 0] == 1
+	model_value['quantization']['channel_order'] = 'bgr'
+	assert prepare_calibration_frame(blue_frame, [ 1, 3, 4, 4 ], model_value)[0, 0, 0, 0] == 1
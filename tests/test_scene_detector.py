@@ -0,0 +1,36 @@
+from typing import List
+import cv2
+import numpy
+import pytest
+
+from facefusion.scene_detector import detect_scene_cuts, set_scene_cuts, clear_scene_cuts, find_scene_index, split_frame_paths
+
+
+@pytest.fixture(scope = 'module')
+def temp_frame_paths(tmp_path_factory : pytest.TempPathFactory) -> List[str]:
+	temp_directory_path = tmp_path_factory.mktemp('scenes')
+	temp_frame_paths = []
+	dark_frame = numpy.random.randint(0, 100, (240, 320, 3), numpy.uint8)
+	bright_frame = numpy.random.randint(150, 255, (240, 320, 3), numpy.uint8)
+
+	for frame_number in range(30):
+		temp_frame = dark_frame if frame_number < 10 or frame_number == 25 else bright_frame
+		temp_frame_path = str(temp_directory_path / (str(frame_number + 1).zfill(4) + '.png'))
+		cv2.imwrite(temp_frame_path, temp_frame)
+		temp_frame_paths.append(temp_frame_path)
+	return temp_frame_paths
+
+
+def test_detect_scene_cuts(temp_frame_paths : List[str]) -> None:
+	assert detect_scene_cuts(temp_frame_paths) == [ 10, 25 ]
+	assert detect_scene_cuts(temp_frame_paths[:10]) == []
+
+
+def test_find_scene_index() -> None:
+	set_scene_cuts([ 25, 10 ])
+
+	assert find_scene_index(9) == 0
+	assert find_scene_index(10) == 1
+	assert split_frame_paths([ '0009.jpg', '0010.jpg', '0011.jpg', '0030.jpg' ]) == [ [ '0009.jpg', '0010.jpg' ], [ '0011.jpg' ], [ '0030.jpg' ] ]
+	clear_scene_cuts()
+	assert split_frame_paths([ '0001.jpg', '0030.jpg' ]) == [ [ '0001.jpg', '0030.jpg' ] ]
@@ -1,8 +1,11 @@
 import subprocess
+from pathlib import Path
+import cv2
+import numpy
 import pytest
 
 from facefusion.download import conditional_download
-from facefusion.vision import get_video_frame, count_video_frame_total, detect_video_fps, detect_video_resolution, pack_resolution, unpack_resolution, create_video_resolutions
+from facefusion.vision import get_video_frame, read_video_frames, count_video_frame_total, detect_video_fps, detect_video_resolution, pack_resolution, unpack_resolution, restrict_video_resolution, create_video_resolutions, create_tile_frames, merge_tile_frames, group_temp_frames
 
 
 @pytest.fixture(scope = 'module', autouse = True)
@@ -25,6 +28,14 @@ def test_get_video_frame() -> None:
 	assert get_video_frame('invalid') is None
 
 
+def test_read_video_frames() -> None:
+	video_frames = list(read_video_frames('.assets/examples/target-240p-25fps.mp4', 10, 60, 25))
+
+	assert len(video_frames) == 50
+	assert [ video_frame is not None for video_frame in video_frames ].count(True) == 2
+	assert list(read_video_frames('invalid', 10, 60, 25)) == []
+
+
 def test_count_video_frame_total() -> None:
 	assert count_video_frame_total('.assets/examples/target-240p-25fps.mp4') == 270
 	assert count_video_frame_total('.assets/examples/target-240p-30fps.mp4') == 324
@@ -55,9 +66,52 @@ def test_unpack_resolution() -> None:
 	assert unpack_resolution('2x2') == (2, 2)
 
 
+def test_restrict_video_resolution() -> None:
+	assert restrict_video_resolution((3840, 2160), 1080) == (1920, 1080)
+	assert restrict_video_resolution((2160, 3840), 1080) == (608, 1080)
+	assert restrict_video_resolution((1280, 720), 1080) == (1280, 720)
+
+
 def test_create_video_resolutions() -> None:
 	assert create_video_resolutions('.assets/examples/target-240p.mp4') == [ '426x226', '452x240', '678x360', '904x480', '1018x540', '1358x720', '2036x1080', '2714x1440', '4072x2160' ]
 	assert create_video_resolutions('.assets/examples/target-240p-90deg.mp4') == [ '226x426', '240x452', '360x678', '480x904', '540x1018', '720x1358', '1080x2036', '1440x2714', '2160x4072' ]
 	assert create_video_resolutions('.assets/examples/target-1080p.mp4') == [ '456x240', '682x360', '910x480', '1024x540', '1366x720', '2048x1080', '2730x1440', '4096x2160' ]
 	assert create_video_resolutions('.assets/examples/target-1080p-90deg.mp4') == [ '240x456', '360x682', '480x910', '540x1024', '720x1366', '1080x2048', '1440x2730', '2160x4096' ]
 	assert create_video_resolutions('invalid') is None
+
+
+def test_create_and_merge_tile_frames() -> None:
+	frame = numpy.random.randint(0, 255, (300, 500, 3), numpy.uint8)
+	tile_frames, tile_positions = create_tile_frames(frame, 128, 16)
+
+	assert len(tile_frames) == 3 * 5
+	assert all(tile_frame.shape == (128, 128, 3) for tile_frame in tile_frames)
+	assert tile_positions[-1] == (300 - 128, 500 - 128)
+	assert numpy.array_equal(merge_tile_frames(tile_frames, tile_positions, 500, 300, 16), frame)
+
+	scale_tile_frames = [ cv2.resize(tile_frame, (256, 256), interpolation = cv2.INTER_NEAREST) for tile_frame in tile_frames ]
+	scale_tile_positions = [ (top * 2, left * 2) for top, left in tile_positions ]
+
+	assert numpy.array_equal(merge_tile_frames(scale_tile_frames, scale_tile_positions, 1000, 600, 32), cv2.resize(frame, (1000, 600), interpolation = cv2.INTER_NEAREST))
+
+	small_frame = numpy.random.randint(0, 255, (64, 80, 3), numpy.uint8)
+	tile_frames, tile_positions = create_tile_frames(small_frame, 128, 16)
+
+	assert len(tile_frames) == 1
+	assert numpy.array_equal(merge_tile_frames(tile_frames, tile_positions, 80, 64, 16), small_frame)
+
+
+def test_group_temp_frames(tmp_path : Path) -> None:
+	frame = numpy.random.randint(0, 255, (240, 320, 3), numpy.uint8)
+	next_frame = cv2.add(frame, (8, 8, 8, 0))
+	temp_frame_paths = [ str(tmp_path / (str(frame_number + 1).zfill(4) + '.png')) for frame_number in range(5) ]
+
+	for temp_frame_path, temp_frame in zip(temp_frame_paths, [ frame, frame, next_frame, next_frame, frame ]):
+		cv2.imwrite(temp_frame_path, temp_frame)
+
+	assert group_temp_frames(temp_frame_paths, 0) ==\
+	{
+		temp_frame_paths[1]: temp_frame_paths[0],
+		temp_frame_paths[3]: temp_frame_paths[2]
+	}
+	assert len(group_temp_frames(temp_frame_paths, 32)) == 4